@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Account Store Module
+Keeps the account values /status needs in memory, updated from the
+account update stream
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Any, Iterable, Optional
+from ib_insync import IB, AccountValue
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Tags always tracked, Config.ACCOUNT_EXTRA_TAGS adds more
+ACCOUNT_TAGS = ('BuyingPower', 'NetLiquidation', 'TotalCashValue', 'GrossPositionValue')
+
+class AccountStore:
+    """Parsed account values maintained from accountValueEvent/accountSummaryEvent"""
+
+    def __init__(self, ib: IB, tags: Iterable[str] = None, currency: str = None):
+        self.ib = ib
+        self.tags = set(ACCOUNT_TAGS) | set(tags if tags is not None else Config.ACCOUNT_EXTRA_TAGS)
+        self.currency = currency or Config.ACCOUNT_CURRENCY
+
+        # tag -> parsed value
+        self.values: Dict[str, float] = {}
+        self.account: Optional[str] = None
+        self.updated: Optional[float] = None
+
+        # Account updates are subscribed by ib_insync on connect
+        ib.accountValueEvent += self._on_value
+        ib.accountSummaryEvent += self._on_value
+
+    def load(self):
+        """Seed from the account values synced on connect"""
+        for value in self.ib.accountValues():
+            self._on_value(value)
+        logger.info(f"Account store loaded {len(self.values)} values")
+
+    def _on_value(self, value: AccountValue):
+        if value.tag not in self.tags or value.currency not in (self.currency, '') or value.modelCode:
+            return
+        try:
+            self.values[value.tag] = float(value.value)
+        except ValueError:
+            logger.debug(f"Ignoring non-numeric account value {value.tag}={value.value}")
+            return
+        self.account = value.account
+        self.updated = time.time()
+
+    def get(self, tag: str, default: float = 0.0) -> float:
+        """Latest value for a tag"""
+        return self.values.get(tag, default)
+
+    def as_of(self) -> Optional[datetime]:
+        """Time of the last update"""
+        return datetime.fromtimestamp(self.updated) if self.updated else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All tracked values with the update time"""
+        return {
+            "account": self.account,
+            "values": dict(self.values),
+            "as_of": self.as_of().isoformat() if self.updated else None
+        }
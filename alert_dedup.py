@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Alert Dedup Module
+Idempotency and coalescing for retried or double-fired TradingView alerts
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from models import AlertRequest
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class AlertDeduplicator:
+    """
+    Bounded TTL cache mapping alert identities to the alert id that handled them
+
+    An alert is a duplicate when the same endpoint already received an alert
+    with the same explicit alert id, or with identical symbol, action,
+    timestamp and message, within `ttl` seconds. This holds whatever became
+    of the original: a retry of an alert that failed is still ignored until
+    the TTL expires. Alerts with neither an id nor a timestamp are never
+    treated as duplicates, since an identical repeat, such as a second exit
+    after sell -> buy -> sell, is a real signal. With a coalescing window,
+    any alert on an endpoint within `coalesce_ms` of the previous accepted
+    alert on that endpoint is merged into it as well.
+    """
+
+    def __init__(self, ttl: float = None, max_size: int = None, coalesce_ms: int = None):
+        self.ttl = ttl if ttl is not None else Config.ALERT_DEDUP_TTL
+        self.max_size = max_size or Config.ALERT_DEDUP_SIZE
+        self.coalesce_ms = coalesce_ms if coalesce_ms is not None else Config.ALERT_COALESCE_MS
+
+        # identity key -> (alert id, monotonic expiry), oldest first
+        self.seen: "OrderedDict[Tuple, Tuple[str, float]]" = OrderedDict()
+
+        # endpoint -> (alert id, monotonic time it was accepted)
+        self.windows: Dict[str, Tuple[str, float]] = {}
+
+        # Metrics
+        self.duplicates = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def alert_key(endpoint: str, alert: AlertRequest) -> Optional[Tuple]:
+        """Identity of an alert: its explicit id, or its fields if it has a timestamp, else None"""
+        if alert.alert_id:
+            return (endpoint, "id", alert.alert_id)
+        if alert.timestamp:
+            return (endpoint, "fields", alert.symbol, alert.action, alert.timestamp, alert.message)
+        return None
+
+    def _prune(self, now: float):
+        """Drop expired entries; insertion order is expiry order"""
+        while self.seen:
+            _, (_, expires) = next(iter(self.seen.items()))
+            if expires > now:
+                break
+            self.seen.popitem(last=False)
+
+    def check(self, endpoint: str, alert: AlertRequest) -> Optional[Tuple[str, str]]:
+        """
+        Look for an earlier alert this one should fold into
+
+        Returns:
+            tuple: (existing alert id, "duplicate" or "coalesced"), or None for a new alert
+        """
+        now = time.monotonic()
+
+        key = self.alert_key(endpoint, alert)
+        if self.ttl > 0 and key:
+            self._prune(now)
+            entry = self.seen.get(key)
+            if entry:
+                self.duplicates += 1
+                logger.info(f"Duplicate alert on {endpoint} ignored (original {entry[0]})")
+                return entry[0], "duplicate"
+
+        if self.coalesce_ms > 0:
+            window = self.windows.get(endpoint)
+            if window and (now - window[1]) * 1000 < self.coalesce_ms:
+                self.coalesced += 1
+                logger.info(f"Alert on {endpoint} coalesced into {window[0]}")
+                return window[0], "coalesced"
+
+        return None
+
+    def remember(self, endpoint: str, alert: AlertRequest, alert_id: str):
+        """Record an accepted alert"""
+        now = time.monotonic()
+
+        key = self.alert_key(endpoint, alert)
+        if self.ttl > 0 and key:
+            self.seen.pop(key, None)
+            self.seen[key] = (alert_id, now + self.ttl)
+            while len(self.seen) > self.max_size:
+                self.seen.popitem(last=False)
+
+        if self.coalesce_ms > 0:
+            self.windows[endpoint] = (alert_id, now)
+
+    def metrics(self) -> Dict[str, int]:
+        """Duplicate and coalesced alert counts"""
+        return {
+            "tracked": len(self.seen),
+            "duplicates": self.duplicates,
+            "coalesced": self.coalesced
+        }
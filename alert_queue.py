@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Alert Queue Module
+In-process webhook alert queue with priority lanes so exits preempt entries
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+from fastapi import HTTPException
+from models import AlertRecord
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Id of the alert being processed by the current task
+current_alert_id: contextvars.ContextVar = contextvars.ContextVar('current_alert_id', default=None)
+
+# (endpoint, perf_counter at receipt) of the alert being processed by the current task
+current_alert_origin: contextvars.ContextVar = contextvars.ContextVar('current_alert_origin', default=None)
+
+# Priority lanes: exits (sells, liquidations, force-closes) always dispatch first
+EXIT_LANE = "exit"
+ENTRY_LANE = "entry"
+LANES = (EXIT_LANE, ENTRY_LANE)
+
+class AlertQueue:
+    """
+    Webhook alert queue with exit and entry priority lanes
+
+    Up to `workers` alerts run at once. Entries are capped at
+    `entry_concurrency` so the remaining slots stay reserved for exits, and a
+    queued exit is always dispatched before a queued entry unless that entry
+    has waited longer than `entry_max_wait` seconds.
+    """
+
+    def __init__(self, workers: int = None, history_size: int = None,
+                 entry_concurrency: int = None, entry_max_wait: float = None, journal=None):
+        self.workers = workers or Config.ALERT_WORKERS
+        self.history_size = history_size or Config.ALERT_HISTORY_SIZE
+        self.entry_max_wait = entry_max_wait if entry_max_wait is not None else Config.ALERT_ENTRY_MAX_WAIT
+
+        # Per-lane concurrency; entries never take the last exit slots
+        entry_limit = entry_concurrency or Config.ALERT_ENTRY_CONCURRENCY
+        self.limits = {
+            EXIT_LANE: self.workers,
+            ENTRY_LANE: max(1, min(entry_limit, self.workers - 1)) if self.workers > 1 else 1
+        }
+
+        # lane -> queued alert ids, oldest first
+        self.lanes: Dict[str, deque] = {lane: deque() for lane in LANES}
+        self.running: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._wakeup = asyncio.Event()
+
+        # alert id -> record, oldest first, bounded to history_size
+        self.alerts: "OrderedDict[str, AlertRecord]" = OrderedDict()
+
+        # alert id -> (handler, monotonic enqueue time)
+        self._jobs: Dict[str, tuple] = {}
+
+        # Optional ExecutionJournal receiving alert lifecycle events
+        self.journal = journal
+
+        # While held, alerts are accepted and queued but not dispatched
+        self.held = False
+
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._tasks = set()
+        self.in_flight = 0
+
+        # Metrics
+        self.processed = 0
+        self.failed = 0
+        self.expired = 0
+        self.promoted = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.total_processing_time = 0.0
+        self.max_processing_time = 0.0
+        self.lane_wait = {lane: {"total": 0.0, "max": 0.0, "count": 0} for lane in LANES}
+
+    def start(self):
+        """Start the dispatcher task"""
+        if self._dispatcher:
+            return
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        logger.info(f"Alert queue started with {self.workers} workers "
+                    f"(entry lane limit {self.limits[ENTRY_LANE]})")
+
+    async def stop(self):
+        """Cancel the dispatcher and any running alerts"""
+        tasks = list(self._tasks)
+        if self._dispatcher:
+            tasks.append(self._dispatcher)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._dispatcher = None
+        self._tasks = set()
+
+    async def drain(self, timeout: float = None):
+        """Wait until queued and running alerts have finished, up to timeout seconds"""
+        timeout = Config.ALERT_DRAIN_TIMEOUT if timeout is None else timeout
+        deadline = time.perf_counter() + timeout
+        while (self._jobs or self._tasks) and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        if self._jobs or self._tasks:
+            logger.warning(f"{len(self._jobs) + len(self._tasks)} alerts still pending after {timeout}s drain")
+
+    def submit(self, endpoint: str, handler: Callable[[], Awaitable[Any]], payload: Dict[str, Any] = None,
+               lane: str = ENTRY_LANE) -> AlertRecord:
+        """Enqueue an alert handler on a lane and return its record immediately"""
+        if lane not in self.lanes:
+            raise ValueError(f"Unknown alert lane: {lane}")
+
+        record = AlertRecord(
+            alert_id=uuid.uuid4().hex,
+            endpoint=endpoint,
+            lane=lane,
+            payload=payload,
+            received_at=datetime.now()
+        )
+        self.alerts[record.alert_id] = record
+        while len(self.alerts) > self.history_size:
+            self.alerts.popitem(last=False)
+
+        self._jobs[record.alert_id] = (handler, time.perf_counter())
+        self.lanes[lane].append(record.alert_id)
+        self._wakeup.set()
+        logger.info(f"Alert {record.alert_id} queued for {endpoint} on {lane} lane (depth {len(self.lanes[lane])})")
+        return record
+
+    def hold(self):
+        """Keep accepting alerts but stop dispatching them"""
+        self.held = True
+
+    def release(self):
+        """Resume dispatching held alerts"""
+        if self.held:
+            self.held = False
+            self._wakeup.set()
+            logger.info(f"Alert queue released with {sum(len(q) for q in self.lanes.values())} alerts waiting")
+
+    def expire(self, max_age: float) -> int:
+        """Drop queued alerts that have waited longer than max_age seconds"""
+        now = time.perf_counter()
+        expired = 0
+        for lane, queue in self.lanes.items():
+            for alert_id in [a for a in queue if now - self._jobs[a][1] > max_age]:
+                queue.remove(alert_id)
+                self._jobs.pop(alert_id)
+                record = self.alerts.get(alert_id)
+                if record:
+                    record.status = "expired"
+                    record.error = f"Not run: queued for more than {max_age}s while IBKR was unavailable"
+                    record.completed_at = datetime.now()
+                if self.journal:
+                    self.journal.record("alert_expired", alert_id, lane=lane, max_age=max_age)
+                expired += 1
+        if expired:
+            self.expired += expired
+            logger.warning(f"Expired {expired} queued alerts older than {max_age}s")
+        return expired
+
+    def get(self, alert_id: str) -> Optional[AlertRecord]:
+        """Look up an alert record"""
+        return self.alerts.get(alert_id)
+
+    def _oldest_wait(self, lane: str) -> float:
+        """Seconds the head of a lane has been queued"""
+        if not self.lanes[lane]:
+            return 0.0
+        _, enqueued = self._jobs[self.lanes[lane][0]]
+        return time.perf_counter() - enqueued
+
+    def _next_lane(self) -> Optional[str]:
+        """Pick the lane to dispatch from, or None if nothing can run now"""
+        if self.held or sum(self.running.values()) >= self.workers:
+            return None
+
+        entry_ready = bool(self.lanes[ENTRY_LANE]) and self.running[ENTRY_LANE] < self.limits[ENTRY_LANE]
+
+        # Starvation protection: an entry queued too long goes ahead of exits
+        # (still within the entry limit, so reserved exit slots stay free)
+        if entry_ready and self.lanes[EXIT_LANE] and self._oldest_wait(ENTRY_LANE) > self.entry_max_wait:
+            self.promoted += 1
+            return ENTRY_LANE
+        if self.lanes[EXIT_LANE] and self.running[EXIT_LANE] < self.limits[EXIT_LANE]:
+            return EXIT_LANE
+        if entry_ready:
+            return ENTRY_LANE
+        return None
+
+    async def _dispatch(self):
+        while True:
+            lane = self._next_lane()
+            if lane is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            alert_id = self.lanes[lane].popleft()
+            self.running[lane] += 1
+            task = asyncio.create_task(self._run(alert_id, lane))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, alert_id: str, lane: str):
+        try:
+            await self._process(alert_id, lane)
+        finally:
+            self.running[lane] -= 1
+            self._wakeup.set()
+
+    async def _process(self, alert_id: str, lane: str):
+        handler, enqueued = self._jobs.pop(alert_id)
+        record = self.alerts.get(alert_id)
+
+        started = time.perf_counter()
+        wait_time = started - enqueued
+        self.total_wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+        lane_wait = self.lane_wait[lane]
+        lane_wait["total"] += wait_time
+        lane_wait["max"] = max(lane_wait["max"], wait_time)
+        lane_wait["count"] += 1
+
+        if record:
+            record.status = "processing"
+            record.started_at = datetime.now()
+            record.wait_time = round(wait_time, 6)
+        if self.journal:
+            self.journal.record("alert_started", alert_id, lane=lane, wait_time=round(wait_time, 6))
+
+        self.in_flight += 1
+        token = current_alert_id.set(alert_id)
+        origin_token = current_alert_origin.set((record.endpoint if record else "unknown", enqueued))
+        try:
+            result = await handler()
+            status, error = "completed", None
+        except HTTPException as e:
+            result, status, error = None, "failed", str(e.detail)
+        except Exception as e:
+            result, status, error = None, "failed", str(e)
+        finally:
+            current_alert_id.reset(token)
+            current_alert_origin.reset(origin_token)
+            self.in_flight -= 1
+
+        processing_time = time.perf_counter() - started
+        self.processed += 1
+        self.total_processing_time += processing_time
+        self.max_processing_time = max(self.max_processing_time, processing_time)
+        if status == "failed":
+            self.failed += 1
+            logger.error(f"Alert {alert_id} failed: {error}")
+        if self.journal:
+            self.journal.record(f"alert_{status}", alert_id, processing_time=round(processing_time, 6), error=error)
+
+        if record:
+            record.status = status
+            record.result = result
+            record.error = error
+            record.completed_at = datetime.now()
+            record.processing_time = round(processing_time, 6)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, wait time and processing time metrics"""
+        processed = self.processed or 1
+        return {
+            "queue_depth": sum(len(queue) for queue in self.lanes.values()),
+            "in_flight": self.in_flight,
+            "workers": self.workers,
+            "held": self.held,
+            "processed": self.processed,
+            "failed": self.failed,
+            "expired": self.expired,
+            "promoted_entries": self.promoted,
+            "lanes": {
+                lane: {
+                    "queue_depth": len(self.lanes[lane]),
+                    "running": self.running[lane],
+                    "limit": self.limits[lane],
+                    "wait_time": {
+                        "avg": round(self.lane_wait[lane]["total"] / (self.lane_wait[lane]["count"] or 1), 6),
+                        "max": round(self.lane_wait[lane]["max"], 6)
+                    }
+                }
+                for lane in LANES
+            },
+            "wait_time": {
+                "avg": round(self.total_wait_time / processed, 6),
+                "max": round(self.max_wait_time, 6)
+            },
+            "processing_time": {
+                "avg": round(self.total_processing_time / processed, 6),
+                "max": round(self.max_processing_time, 6)
+            }
+        }
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Bars Module
+Builds OHLCV bars incrementally from the streaming market data and keeps a
+bounded history per contract and interval, optionally appending finished
+bars to columnar files
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import numpy as np
+from ib_insync import Contract, Ticker
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Columns of a finished bar, each stored as float64
+BAR_COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume', 'ticks')
+
+class _BarBuilder:
+    """Bar in progress, updated in place"""
+    __slots__ = ('start', 'open', 'high', 'low', 'close', 'volume', 'ticks', 'volume_start')
+
+    def __init__(self, start: float, price: float, volume: float):
+        self.start = start
+        self.open = self.high = self.low = self.close = price
+        self.volume = 0.0
+        self.ticks = 1
+        self.volume_start = volume
+
+    def update(self, price: float, volume: float):
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.ticks += 1
+        # IB reports cumulative day volume, the bar gets the increase
+        if volume == volume and self.volume_start == self.volume_start:
+            self.volume = volume - self.volume_start
+        elif volume == volume:
+            self.volume_start = volume
+
+    def finish(self) -> Dict[str, Any]:
+        return {
+            "time": self.start,
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+            "ticks": self.ticks
+        }
+
+def _price(ticker: Ticker) -> float:
+    """Last trade price, or the midpoint for contracts without trades yet"""
+    last = ticker.last
+    if last == last and last > 0:
+        return last
+    if ticker.bid > 0 and ticker.ask > 0:
+        return (ticker.bid + ticker.ask) / 2
+    return math.nan
+
+def bar_symbol(contract: Contract) -> str:
+    """Name bars are kept under: ES, SPXW, SPY"""
+    return contract.tradingClass or contract.symbol
+
+class BarWriter:
+    """
+    Appends finished bars to one float64 file per column from a background thread
+
+    Layout: {directory}/{YYYYMMDD}/{symbol}_{interval}s/{column}.f8, readable
+    with read_bars() or numpy.fromfile.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0
+
+    def start(self):
+        if not self._thread or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._write_loop, name="bar-writer", daemon=True)
+            self._thread.start()
+
+    def write(self, symbol: str, interval: int, bar: Dict[str, Any]):
+        self._queue.put((symbol, interval, bar))
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            # Group everything queued by output directory, one append per column
+            batches: Dict[str, List[Dict[str, Any]]] = {}
+            while item is not None:
+                symbol, interval, bar = item
+                day = datetime.fromtimestamp(bar["time"]).strftime('%Y%m%d')
+                batches.setdefault(os.path.join(self.directory, day, f"{symbol}_{interval}s"), []).append(bar)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            for path, bars in batches.items():
+                try:
+                    os.makedirs(path, exist_ok=True)
+                    for column in BAR_COLUMNS:
+                        with open(os.path.join(path, f"{column}.f8"), 'ab') as f:
+                            np.array([bar[column] for bar in bars], dtype='f8').tofile(f)
+                    self.written += len(bars)
+                except OSError as e:
+                    logger.error(f"Could not write {len(bars)} bars to {path}: {e}")
+            if item is None:
+                return
+
+    def close(self):
+        """Write out everything queued and stop the writer thread"""
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+def read_bars(path: str) -> Dict[str, np.ndarray]:
+    """Columns of a bar directory written by BarWriter"""
+    columns = {column: np.fromfile(os.path.join(path, f"{column}.f8"), dtype='f8') for column in BAR_COLUMNS}
+    size = min(len(values) for values in columns.values())
+    return {column: values[:size] for column, values in columns.items()}
+
+class BarAggregator:
+    """
+    OHLCV bars at several intervals for every streamed contract
+
+    on_tick() is O(1) per interval: it either updates the bar in progress
+    or finishes it and starts the next. A timer also finishes bars when
+    their interval ends without a following tick.
+
+    Args:
+        intervals: Bar lengths in seconds, defaults to Config.BAR_INTERVALS
+        history_size: Finished bars kept per contract and interval, defaults to Config.BAR_HISTORY_SIZE
+        directory: Directory for columnar bar files, defaults to Config.BAR_DIR (empty disables)
+    """
+
+    def __init__(self, intervals: List[int] = None, history_size: int = None, directory: str = None):
+        self.intervals = sorted(intervals or Config.BAR_INTERVALS)
+        self.history_size = history_size or Config.BAR_HISTORY_SIZE
+        directory = Config.BAR_DIR if directory is None else directory
+        self.writer = BarWriter(directory) if directory else None
+
+        # (symbol, interval) -> bar in progress
+        self._building: Dict[Tuple[str, int], _BarBuilder] = {}
+
+        # (symbol, interval) -> finished bars, oldest first
+        self.history: Dict[Tuple[str, int], Deque[Dict[str, Any]]] = {}
+
+        # Called with (symbol, interval, bar) for every finished bar
+        self.handlers: List[Callable[[str, int, Dict[str, Any]], None]] = []
+
+        self._task: Optional[asyncio.Task] = None
+        self.bars_finished = 0
+
+    def on_tick(self, contract: Contract, ticker: Ticker):
+        """Feed one ticker update"""
+        price = _price(ticker)
+        if price != price:
+            return
+        now = time.time()
+        symbol = bar_symbol(contract)
+        for interval in self.intervals:
+            key = (symbol, interval)
+            start = now - now % interval
+            bar = self._building.get(key)
+            if bar is not None and bar.start == start:
+                bar.update(price, ticker.volume)
+                continue
+            if bar is not None:
+                self._finish(key, bar)
+            self._building[key] = _BarBuilder(start, price, ticker.volume)
+
+    def _finish(self, key: Tuple[str, int], bar: _BarBuilder):
+        finished = bar.finish()
+        history = self.history.get(key)
+        if history is None:
+            history = self.history[key] = deque(maxlen=self.history_size)
+        history.append(finished)
+        self.bars_finished += 1
+        if self.writer:
+            self.writer.write(key[0], key[1], finished)
+        for handler in self.handlers:
+            try:
+                handler(key[0], key[1], finished)
+            except Exception as e:
+                logger.error(f"Bar handler error: {e}")
+
+    def flush(self, now: float = None):
+        """Finish every bar whose interval has ended"""
+        now = now if now is not None else time.time()
+        for key, bar in list(self._building.items()):
+            if bar.start + key[1] <= now:
+                del self._building[key]
+                self._finish(key, bar)
+
+    def start(self):
+        """Finish bars on time even when no tick follows them"""
+        if self.writer:
+            self.writer.start()
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        step = self.intervals[0]
+        while True:
+            now = time.time()
+            await asyncio.sleep(step - now % step + 0.001)
+            self.flush()
+
+    def stop(self):
+        """Stop the timer, finish bars in progress and close the writer"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for key, bar in list(self._building.items()):
+            self._finish(key, bar)
+        self._building.clear()
+        if self.writer:
+            self.writer.close()
+
+    def bars(self, symbol: str, interval: int, count: int = None) -> List[Dict[str, Any]]:
+        """Most recent finished bars, oldest first"""
+        history = self.history.get((symbol, interval))
+        if not history:
+            return []
+        bars = list(history)
+        return bars[-count:] if count else bars
+
+    def current(self, symbol: str, interval: int) -> Optional[Dict[str, Any]]:
+        """Bar in progress"""
+        bar = self._building.get((symbol, interval))
+        return bar.finish() if bar else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Print bars written by the bar aggregator")
+    parser.add_argument("path", help="Bar directory, e.g. bars/20250115/ES_60s")
+    parser.add_argument("--count", type=int, default=20, help="Number of most recent bars to print")
+    args = parser.parse_args()
+
+    columns = read_bars(args.path)
+    size = len(columns["time"])
+    for i in range(max(0, size - args.count), size):
+        print(json.dumps({
+            column: (datetime.fromtimestamp(columns[column][i]).isoformat() if column == "time"
+                     else float(columns[column][i]))
+            for column in BAR_COLUMNS
+        }))
+    print(f"\n{size} bars")
+
+if __name__ == "__main__":
+    main()
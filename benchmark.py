@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Benchmark Script
+Measures webhook-to-order latency of the FastAPI app against the in-process
+fake IB gateway
+
+For every endpoint and alert rate it reports p50/p95/p99 latency from the
+HTTP request to:
+  - ack:      the 202 acknowledgement
+  - submit:   the first placeOrder call for the alert
+  - fill:     the last fill for the alert
+  - complete: the alert record reaching completed/failed
+
+Results are written as JSON; pass --baseline with an earlier results file
+to print the change per scenario.
+
+Usage:
+    python benchmark.py --rates 5,20,100 --count 20 --fill-delay 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Keep the benchmark away from the real log, contract cache and IB settings
+_workdir = tempfile.mkdtemp(prefix='vladgrid-bench-')
+os.environ.setdefault('LOG_FILE', os.path.join(_workdir, 'benchmark.log'))
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('CONTRACT_CACHE_FILE', os.path.join(_workdir, 'contract_cache.json'))
+os.environ.setdefault('JOURNAL_FILE', os.path.join(_workdir, 'execution_journal.db'))
+os.environ.setdefault('SNAPSHOT_FILE', os.path.join(_workdir, 'state_snapshot.json'))
+
+import httpx
+import main
+from alert_queue import current_alert_id
+from connection_hub import ConnectionHub
+from fake_ib import FakeIB
+
+DEFAULT_ENDPOINTS = [
+    '/ML-3-4/buy',
+    '/ML-2-3-4/sell',
+    '/ML-3-4/buy-limit',
+    '/ML-2-3-4/sell-limit',
+    '/option-buy',
+    '/option-sell',
+    '/stock-buy',
+    '/stock-sell'
+]
+
+# Positions seeded so sell alerts always have something to close
+SEED_POSITIONS = {'es': 3, 'option': 1, 'stock': 5}
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered) + 0.5 - 1e-9)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def summarize(values: List[float]) -> Dict[str, Any]:
+    """Latency summary in milliseconds"""
+    if not values:
+        return {"count": 0}
+    ms = [v * 1000 for v in values]
+    return {
+        "count": len(ms),
+        "mean": round(sum(ms) / len(ms), 3),
+        "p50": round(percentile(ms, 50), 3),
+        "p95": round(percentile(ms, 95), 3),
+        "p99": round(percentile(ms, 99), 3),
+        "max": round(max(ms), 3)
+    }
+
+async def start_app(fake: FakeIB):
+    """Run the app startup against the fake gateway and seed positions"""
+    main.hub = ConnectionHub(ib=fake)
+    await main.startup_event()
+    await main.startup_task
+
+    fake.set_position(main.trading_bot.get_primary_contract(), SEED_POSITIONS['es'])
+    fake.set_position(main.spx_option_trader.option_contract, SEED_POSITIONS['option'])
+    fake.set_position(main.spy_stock_trader.stock_contract, SEED_POSITIONS['stock'])
+
+async def wait_for_alerts(alert_ids: List[str], timeout: float):
+    """Wait until every alert has finished"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        records = [main.alert_queue.get(alert_id) for alert_id in alert_ids]
+        if all(record and record.status in ("completed", "failed") for record in records):
+            return
+        await asyncio.sleep(0.005)
+
+async def run_scenario(client: httpx.AsyncClient, fake: FakeIB, endpoint: str,
+                       rate: float, count: int, timeout: float) -> Dict[str, Any]:
+    """Send `count` alerts to an endpoint at `rate` alerts per second"""
+    sent: Dict[str, Dict[str, Any]] = {}
+    errors = []
+
+    async def send(i: int):
+        alert_id = uuid.uuid4().hex
+        payload = {
+            "symbol": "ES",
+            "action": endpoint.rsplit('/', 1)[-1],
+            "price": 6700.0,
+            "timestamp": datetime.now().isoformat(),
+            "message": f"benchmark {i}",
+            "alert_id": alert_id
+        }
+        started_wall = datetime.now()
+        started = time.perf_counter()
+        try:
+            response = await client.post(endpoint, json=payload)
+        except Exception as e:
+            errors.append(str(e))
+            return
+        acked = time.perf_counter()
+        if response.status_code != 202:
+            errors.append(f"HTTP {response.status_code}: {response.text[:200]}")
+            return
+        sent[response.json()["alert_id"]] = {
+            "started": started,
+            "started_wall": started_wall,
+            "ack": acked - started
+        }
+
+    first_order = len(fake.orders)
+    interval = 1.0 / rate if rate > 0 else 0.0
+    begin = time.perf_counter()
+    tasks = []
+    for i in range(count):
+        delay = begin + i * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(i)))
+    await asyncio.gather(*tasks)
+    await wait_for_alerts(list(sent), timeout)
+
+    # Orders tagged with the alert that placed them
+    orders_by_alert: Dict[str, List[Dict[str, Any]]] = {}
+    for order in fake.orders[first_order:]:
+        orders_by_alert.setdefault(order['tag'], []).append(order)
+
+    ack, submit, fill, complete = [], [], [], []
+    failed = 0
+    for alert_id, info in sent.items():
+        ack.append(info["ack"])
+
+        orders = orders_by_alert.get(alert_id, [])
+        if orders:
+            submit.append(min(o['submitted'] for o in orders) - info["started"])
+            if all(o['filled'] for o in orders):
+                fill.append(max(o['filled'] for o in orders) - info["started"])
+
+        record = main.alert_queue.get(alert_id)
+        if record and record.completed_at:
+            complete.append((record.completed_at - info["started_wall"]).total_seconds())
+            if record.status == "failed":
+                failed += 1
+                errors.append(record.error)
+
+    return {
+        "endpoint": endpoint,
+        "rate": rate,
+        "alerts": count,
+        "accepted": len(sent),
+        "orders": sum(len(orders) for orders in orders_by_alert.values()),
+        "failed": failed,
+        "errors": errors[:10],
+        "duration": round(time.perf_counter() - begin, 3),
+        "latency_ms": {
+            "ack": summarize(ack),
+            "submit": summarize(submit),
+            "fill": summarize(fill),
+            "complete": summarize(complete)
+        }
+    }
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]):
+    """Print p50/p99 changes against a baseline results file"""
+    previous = {(s["endpoint"], s["rate"]): s for s in baseline.get("scenarios", [])}
+    print("\n📊 Change vs baseline (ms, negative is faster)")
+    for scenario in results["scenarios"]:
+        before = previous.get((scenario["endpoint"], scenario["rate"]))
+        if not before:
+            continue
+        parts = []
+        for stage in ("submit", "fill", "complete"):
+            now, then = scenario["latency_ms"][stage], before["latency_ms"].get(stage, {})
+            for pct in ("p50", "p99"):
+                if now.get(pct) is not None and then.get(pct) is not None:
+                    parts.append(f"{stage}.{pct} {now[pct] - then[pct]:+.2f}")
+        print(f"  {scenario['endpoint']:<22} @ {scenario['rate']:>6}/s  " + "  ".join(parts))
+
+def print_table(results: Dict[str, Any]):
+    print(f"\n{'endpoint':<22} {'rate':>7} {'stage':<9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    print("-" * 80)
+    for scenario in results["scenarios"]:
+        for stage, stats in scenario["latency_ms"].items():
+            if not stats.get("count"):
+                continue
+            print(f"{scenario['endpoint']:<22} {scenario['rate']:>7} {stage:<9} "
+                  f"{stats['p50']:>9.3f} {stats['p95']:>9.3f} {stats['p99']:>9.3f} {stats['max']:>9.3f}")
+        if scenario["failed"] or scenario["accepted"] != scenario["alerts"]:
+            print(f"  ⚠️  {scenario['failed']} failed, {scenario['accepted']}/{scenario['alerts']} accepted: {scenario['errors'][:3]}")
+
+async def run(args) -> Dict[str, Any]:
+    fake = FakeIB(
+        qualify_delay=args.qualify_delay,
+        ack_delay=args.ack_delay,
+        fill_delay=args.fill_delay,
+        fill_jitter=args.fill_jitter,
+        tick_interval=args.tick_interval,
+        static_positions=True,
+        tag=current_alert_id.get
+    )
+    await start_app(fake)
+
+    scenarios = []
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for endpoint in args.endpoints:
+                for rate in args.rates:
+                    scenario = await run_scenario(client, fake, endpoint, rate, args.count, args.timeout)
+                    scenarios.append(scenario)
+                    stats = scenario["latency_ms"]["submit"]
+                    print(f"✅ {endpoint} @ {rate}/s: submit p50 {stats.get('p50')} ms, p99 {stats.get('p99')} ms")
+    finally:
+        await main.shutdown_event()
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "config": {
+            "count": args.count,
+            "rates": args.rates,
+            "qualify_delay": args.qualify_delay,
+            "ack_delay": args.ack_delay,
+            "fill_delay": args.fill_delay,
+            "fill_jitter": args.fill_jitter,
+            "tick_interval": args.tick_interval,
+            "alert_workers": main.alert_queue.workers
+        },
+        "scenarios": scenarios
+    }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Webhook-to-order latency benchmark against a fake IB gateway")
+    parser.add_argument("--endpoints", type=lambda s: [e.strip() for e in s.split(',') if e.strip()],
+                        default=DEFAULT_ENDPOINTS, help="Comma separated endpoints (default: all trading endpoints)")
+    parser.add_argument("--rates", type=lambda s: [float(r) for r in s.split(',')], default=[5.0, 20.0, 100.0],
+                        help="Comma separated alert rates per second")
+    parser.add_argument("--count", type=int, default=20, help="Alerts per endpoint and rate")
+    parser.add_argument("--qualify-delay", type=float, default=0.01, help="Simulated qualification round trip (s)")
+    parser.add_argument("--ack-delay", type=float, default=0.002, help="Simulated order acknowledgement delay (s)")
+    parser.add_argument("--fill-delay", type=float, default=0.05, help="Simulated fill delay (s)")
+    parser.add_argument("--fill-jitter", type=float, default=0.0, help="Random extra fill delay (s)")
+    parser.add_argument("--tick-interval", type=float, default=0.25, help="Simulated quote update interval (s)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Max seconds to wait for a scenario's alerts")
+    parser.add_argument("--output", default="benchmark_results.json", help="Results file")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    print("🚀 Webhook-to-order latency benchmark")
+    print("=" * 50)
+
+    results = asyncio.run(run(args))
+    print_table(results)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            compare(results, json.load(f))
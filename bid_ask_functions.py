@@ -4,14 +4,47 @@ Bid/Ask price functions for your trading bot
 """
 
 import asyncio
-from ib_insync import IB, Contract
-from datetime import datetime
+from typing import Optional
+from ib_insync import IB
+from get_bid_ask_direct import BidAskPriceGetter
 
 class BidAskFunctions:
     """Functions to get bid/ask prices directly from IBKR"""
     
+    # Connection reused by every call that is not given one, and the event loop it runs on
+    _shared_ib: Optional[IB] = None
+    _shared_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    @staticmethod
+    async def shared_connection(host='127.0.0.1', port=7497, client_id=1) -> IB:
+        """Connect once per event loop and hand the same connection to later calls"""
+        ib = BidAskFunctions._shared_ib
+        loop = asyncio.get_running_loop()
+        if ib is not None and BidAskFunctions._shared_loop is not loop:
+            # Left over from an earlier asyncio.run(), its socket belongs to a closed loop
+            BidAskFunctions.close()
+            ib = None
+        if ib is None or not ib.isConnected():
+            ib = BidAskFunctions._shared_ib = IB()
+            BidAskFunctions._shared_loop = loop
+            await ib.connectAsync(host, port, clientId=client_id)
+        return ib
+    
+    @staticmethod
+    def close():
+        """Disconnect the shared connection"""
+        if BidAskFunctions._shared_ib:
+            try:
+                BidAskFunctions._shared_ib.disconnect()
+            except RuntimeError:
+                # Its event loop is already closed
+                pass
+            BidAskFunctions._shared_ib = None
+            BidAskFunctions._shared_loop = None
+    
     @staticmethod
-    async def get_es_bid_ask(month='20251219', host='127.0.0.1', port=7497, client_id=1):
+    async def get_es_bid_ask(month='20251219', host='127.0.0.1', port=7497, client_id=1, ib: IB = None,
+                             timeout=None):
         """
         Get bid/ask prices for ES contract
         
@@ -20,57 +53,44 @@ class BidAskFunctions:
             host: IBKR host
             port: IBKR port
             client_id: Client ID
+            ib: Connected IB to use (e.g. the connection hub's), defaults to the shared connection
+            timeout: Seconds to wait for both bid and ask, defaults to Config.QUOTE_READY_TIMEOUT
         
         Returns:
             dict: {'bid': float, 'ask': float, 'last': float, 'spread': float}
         """
-        ib = IB()
+        curve = await BidAskFunctions.get_es_curve([month], host, port, client_id, ib, timeout)
+        return curve[0] if curve else None
+    
+    @staticmethod
+    async def get_es_curve(months, host='127.0.0.1', port=7497, client_id=1, ib: IB = None, timeout=None):
+        """
+        Get bid/ask prices for several ES months in one snapshot
         
+        Returns:
+            list: One dict per month, {'month': str, 'bid': float, 'ask': float, 'last': float, 'spread': float}
+        """
         try:
-            # Connect to IBKR
-            await ib.connectAsync(host, port, clientId=client_id)
-            
-            # Create ES contract
-            contract = Contract(
-                secType='FUT',
-                symbol='ES',
-                lastTradeDateOrContractMonth=month,
-                exchange='CME',
-                currency='USD'
-            )
-            
-            # Request market data
-            ticker = ib.reqMktData(contract, '', False, False)
-            
-            # Wait for data
-            await asyncio.sleep(1.5)
+            # Connect to IBKR, or reuse the connection
+            ib = ib or await BidAskFunctions.shared_connection(host, port, client_id)
             
-            # Get prices
-            bid = ticker.bid if ticker.bid > 0 else None
-            ask = ticker.ask if ticker.ask > 0 else None
-            last = ticker.last if ticker.last > 0 else None
-            
-            # Calculate spread
-            spread = None
-            if ask and bid:
-                spread = ask - bid
-            
-            # Cancel market data
-            ib.cancelMktData(contract)
-            
-            return {
-                'bid': bid,
-                'ask': ask,
-                'last': last,
-                'spread': spread,
-                'timestamp': datetime.now().isoformat()
-            }
+            snapshot = await BidAskPriceGetter(ib).get_snapshot(months, timeout)
             
+            return [
+                {
+                    'month': prices['month'],
+                    'bid': prices['bid'],
+                    'ask': prices['ask'],
+                    'last': prices['last'],
+                    'spread': prices.get('spread'),
+                    'timestamp': prices['timestamp']
+                }
+                for prices in snapshot
+            ]
+        
         except Exception as e:
             print(f"Error getting bid/ask: {e}")
             return None
-        finally:
-            ib.disconnect()
     
     @staticmethod
     async def get_current_es_prices():
@@ -111,6 +131,8 @@ async def example_usage():
         print(f"   • Spread cost: ${prices['spread']:.2f}")
     else:
         print("❌ Could not get prices")
+    
+    BidAskFunctions.close()
 
 if __name__ == "__main__":
     asyncio.run(example_usage())
@@ -12,6 +12,12 @@ class Config:
     IBKR_HOST = os.getenv('IBKR_HOST', '127.0.0.1')
     IBKR_PORT = int(os.getenv('IBKR_PORT', '7497'))
     IBKR_CLIENT_ID = int(os.getenv('IBKR_CLIENT_ID', '1'))
+    IBKR_CONNECT_TIMEOUT = float(os.getenv('IBKR_CONNECT_TIMEOUT', '4'))  # Seconds to wait for the API handshake
+    
+    # Reconnect Configuration
+    RECONNECT_BASE_DELAY = float(os.getenv('RECONNECT_BASE_DELAY', '1'))  # First retry delay in seconds, doubled per attempt
+    RECONNECT_MAX_DELAY = float(os.getenv('RECONNECT_MAX_DELAY', '60'))  # Retry delay cap in seconds
+    RECONNECT_ALERT_MAX_AGE = float(os.getenv('RECONNECT_ALERT_MAX_AGE', '30'))  # Alerts held longer than this while reconnecting are expired
     
     # Trading Configuration
     CONTRACT_SYMBOL = os.getenv('CONTRACT_SYMBOL', 'ES')
@@ -22,6 +28,9 @@ class Config:
     # Logging Configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FILE = os.getenv('LOG_FILE', 'trading_bot.log')
+    LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))  # Rotate the log file at this size
+    LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))  # Rotated log files kept
+    LOG_BATCH_SIZE = int(os.getenv('LOG_BATCH_SIZE', '100'))  # Max records written per flush by the log writer thread
     
     # Webhook Configuration
     SELL_WEBHOOK_PATH = "/ML-2-3-4/sell"
@@ -30,3 +39,58 @@ class Config:
     # Order Configuration
     USE_LIMIT_ORDERS = os.getenv('USE_LIMIT_ORDERS', 'false').lower() == 'true'
     BID_ASK_OFFSET = float(os.getenv('BID_ASK_OFFSET', '0.0'))  # Offset from bid/ask in points
+    ORDER_FILL_TIMEOUT = float(os.getenv('ORDER_FILL_TIMEOUT', '30'))  # Seconds to wait for a fill, 0 = no timeout
+    
+    # Market Data Configuration
+    MARKET_DATA_MAX_AGE = float(os.getenv('MARKET_DATA_MAX_AGE', '5'))  # Seconds before a cached quote is refreshed
+    TICK_BUFFER_SIZE = int(os.getenv('TICK_BUFFER_SIZE', '100000'))  # Ticks kept in memory per subscribed contract
+    QUOTE_READY_FIELDS = [f.strip() for f in os.getenv('QUOTE_READY_FIELDS', 'bid,ask').split(',') if f.strip()]  # Ticker fields a quote needs before it is used
+    QUOTE_READY_TIMEOUT = float(os.getenv('QUOTE_READY_TIMEOUT', '2'))  # Max seconds to wait for a new subscription's quote
+    
+    # Bar Configuration
+    BAR_INTERVALS = [int(i) for i in os.getenv('BAR_INTERVALS', '1,5,60').split(',') if i.strip()]  # Bar lengths in seconds
+    BAR_HISTORY_SIZE = int(os.getenv('BAR_HISTORY_SIZE', '1000'))  # Finished bars kept in memory per contract and interval
+    BAR_DIR = os.getenv('BAR_DIR', '')  # Directory finished bars are appended to as columns, empty disables
+    
+    # Tick Journal Configuration
+    TICK_JOURNAL_DIR = os.getenv('TICK_JOURNAL_DIR', 'tick_journal')  # Directory every tick is persisted to, empty disables
+    TICK_JOURNAL_FLUSH_INTERVAL = float(os.getenv('TICK_JOURNAL_FLUSH_INTERVAL', '1'))  # Seconds between writes of new ticks
+    
+    # Account Configuration
+    ACCOUNT_CURRENCY = os.getenv('ACCOUNT_CURRENCY', 'USD')  # Currency of the account values served by /status
+    ACCOUNT_EXTRA_TAGS = [tag.strip() for tag in os.getenv('ACCOUNT_EXTRA_TAGS', '').split(',') if tag.strip()]  # Extra account tags to track
+    
+    # PnL Streaming Configuration
+    PNL_QUEUE_SIZE = int(os.getenv('PNL_QUEUE_SIZE', '100'))  # Updates buffered per WebSocket client before the oldest is dropped
+    
+    # Execution Journal Configuration
+    JOURNAL_FILE = os.getenv('JOURNAL_FILE', 'execution_journal.db')  # SQLite file of alert, order and fill events
+    JOURNAL_BATCH_SIZE = int(os.getenv('JOURNAL_BATCH_SIZE', '500'))  # Max events inserted per transaction
+    
+    # State Snapshot Configuration
+    SNAPSHOT_FILE = os.getenv('SNAPSHOT_FILE', 'state_snapshot.json')
+    SNAPSHOT_INTERVAL = float(os.getenv('SNAPSHOT_INTERVAL', '5'))  # Seconds between checkpoints, 0 disables
+    SNAPSHOT_MAX_AGE = float(os.getenv('SNAPSHOT_MAX_AGE', '3600'))  # Older snapshots are ignored on start
+    
+    # Supervisor Configuration
+    SUPERVISOR_RELAY_PORT = int(os.getenv('SUPERVISOR_RELAY_PORT', '7600'))  # Loopback port workers use to reach the relayed IB session
+    SUPERVISOR_RELOAD_TIMEOUT = float(os.getenv('SUPERVISOR_RELOAD_TIMEOUT', '30'))  # Seconds a new worker gets to start before the reload is abandoned
+    SUPERVISOR_RECONNECT_DELAY = float(os.getenv('SUPERVISOR_RECONNECT_DELAY', '2'))  # Seconds between upstream reconnect attempts
+    ALERT_DRAIN_TIMEOUT = float(os.getenv('ALERT_DRAIN_TIMEOUT', '10'))  # Seconds a stopping worker waits for queued alerts
+    
+    # Metrics Configuration
+    METRICS_LOOP_LAG_INTERVAL = float(os.getenv('METRICS_LOOP_LAG_INTERVAL', '0.5'))  # Seconds between event loop lag samples, 0 disables
+    METRICS_PROBE_INTERVAL = float(os.getenv('METRICS_PROBE_INTERVAL', '10'))  # Seconds between IB round-trip probes, 0 disables
+    
+    # Contract Cache Configuration
+    CONTRACT_CACHE_FILE = os.getenv('CONTRACT_CACHE_FILE', 'contract_cache.json')
+    CONTRACT_CACHE_MAX_AGE_DAYS = int(os.getenv('CONTRACT_CACHE_MAX_AGE_DAYS', '7'))  # Re-qualify after this many days
+    
+    # Alert Queue Configuration
+    ALERT_WORKERS = int(os.getenv('ALERT_WORKERS', '4'))  # Concurrent alert worker tasks
+    ALERT_HISTORY_SIZE = int(os.getenv('ALERT_HISTORY_SIZE', '1000'))  # Alert records kept for /alerts/{id}
+    ALERT_ENTRY_CONCURRENCY = int(os.getenv('ALERT_ENTRY_CONCURRENCY', '2'))  # Max buy alerts running at once
+    ALERT_ENTRY_MAX_WAIT = float(os.getenv('ALERT_ENTRY_MAX_WAIT', '5'))  # Seconds before a queued buy goes ahead of exits
+    ALERT_DEDUP_TTL = float(os.getenv('ALERT_DEDUP_TTL', '30'))  # Seconds an alert identity is remembered (0 disables)
+    ALERT_DEDUP_SIZE = int(os.getenv('ALERT_DEDUP_SIZE', '10000'))  # Max alert identities remembered
+    ALERT_COALESCE_MS = int(os.getenv('ALERT_COALESCE_MS', '0'))  # Merge same-endpoint alerts within this window (0 disables)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Connection Hub Module
+Owns a single IBKR connection shared by the ES, SPX and SPY traders
+"""
+
+import asyncio
+import logging
+from typing import List
+from ib_insync import IB
+from market_data import MarketDataCache
+from position_book import PositionBook
+from account_store import AccountStore
+from pnl_service import PnLService
+from execution_journal import get_journal
+from metrics import order_tracker
+from bars import BarAggregator
+from tick_journal import TickJournal
+from contract_cache import qualify_contracts
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class ConnectionHub:
+    """Single multiplexed IB connection handed to every trader"""
+
+    def __init__(self, ib: IB = None):
+        self.ib = ib or IB()
+        self.connected = False
+
+        # Shared streaming market data for all traders
+        self.market_data = MarketDataCache(self.ib)
+
+        # OHLCV bars built from the market data stream
+        self.bars = BarAggregator()
+        self.market_data.tick_handlers.append(self.bars.on_tick)
+
+        # Every tick persisted to memory-mappable daily files
+        self.tick_journal = TickJournal(self.market_data) if Config.TICK_JOURNAL_DIR else None
+        self.market_data.journal = self.tick_journal
+
+        # Shared event-driven position book
+        self.position_book = PositionBook(self.ib)
+
+        # Shared account values
+        self.account_store = AccountStore(self.ib)
+
+        # Streaming account and position PnL
+        self.pnl_service = PnLService(self.ib)
+
+        # Orders, status changes and fills of every trader
+        self.journal = get_journal().attach(self.ib)
+
+        # Order latency histograms for /metrics
+        order_tracker.attach(self.ib)
+
+        # Traders using this connection
+        self.traders: List = []
+
+        self._lock = asyncio.Lock()
+
+    def register(self, trader):
+        """Register a trader whose contracts are qualified on connect"""
+        if trader not in self.traders:
+            self.traders.append(trader)
+
+    async def connect(self, host: str = None, port: int = None, client_id: int = None):
+        """Connect once and qualify every registered contract in one batch"""
+        async with self._lock:
+            if self.is_connected():
+                return
+
+            try:
+                # Use config values if not provided
+                host = host or Config.IBKR_HOST
+                port = port or Config.IBKR_PORT
+                client_id = client_id or Config.IBKR_CLIENT_ID
+
+                await self.ib.connectAsync(host, port, clientId=client_id, timeout=Config.IBKR_CONNECT_TIMEOUT)
+                self.connected = True
+                logger.info(f"Connection hub connected to IBKR at {host}:{port} (client ID {client_id})")
+
+                self.position_book.load()
+                self.account_store.load()
+                self.pnl_service.start()
+                self.bars.start()
+                if self.tick_journal:
+                    self.tick_journal.start()
+
+                await self.qualify_all()
+
+            except Exception as e:
+                logger.error(f"Connection hub failed to connect to IBKR: {e}")
+                self.connected = False
+                raise
+
+    async def qualify_all(self):
+        """Qualify the contracts of all registered traders in a single request batch"""
+        specs = [
+            contract
+            for trader in self.traders
+            for contract in trader.contract_specs()
+            if not contract.conId
+        ]
+        if not specs:
+            return
+
+        try:
+            # Contracts are qualified in place, traders see the result directly.
+            # Known contracts come from the on-disk cache without a round trip.
+            qualified = await qualify_contracts(self.ib, *specs)
+            logger.info(f"Qualified {len(qualified)}/{len(specs)} contracts in one batch")
+        except Exception as e:
+            logger.error(f"Batch contract qualification error: {e}")
+
+    async def disconnect(self):
+        """Disconnect the shared connection"""
+        try:
+            if self.connected:
+                self.market_data.close()
+                self.pnl_service.stop()
+                self.bars.stop()
+                if self.tick_journal:
+                    self.tick_journal.stop()
+                # Cleared first so the disconnect is not taken for a dropped connection
+                self.connected = False
+                self.ib.disconnect()
+                logger.info("Connection hub disconnected from IBKR")
+        except Exception as e:
+            logger.error(f"Error disconnecting connection hub: {e}")
+
+    def is_connected(self) -> bool:
+        """Check if the shared connection is up"""
+        return self.connected and self.ib.isConnected()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Contract Cache Module
+Persists fully qualified contracts on disk so restarts and the sell path
+skip repeat qualification round trips
+"""
+
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any
+from ib_insync import IB, Contract
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored layout changes; older files are discarded
+CACHE_VERSION = 1
+
+# Contract fields stored for each qualified contract
+CACHED_FIELDS = (
+    'conId', 'secType', 'symbol', 'lastTradeDateOrContractMonth', 'strike',
+    'right', 'multiplier', 'exchange', 'primaryExchange', 'currency',
+    'localSymbol', 'tradingClass'
+)
+
+class ContractCache:
+    """Versioned on-disk cache of qualified contracts keyed by contract spec"""
+
+    def __init__(self, path: str = None, max_age_days: int = None):
+        self.path = path or Config.CONTRACT_CACHE_FILE
+        self.max_age_days = max_age_days if max_age_days is not None else Config.CONTRACT_CACHE_MAX_AGE_DAYS
+
+        # spec key -> cached contract fields
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+
+        self.load()
+
+    @staticmethod
+    def spec_key(contract: Contract) -> str:
+        """Key built from the fields used to request a contract"""
+        return '|'.join(str(value) for value in (
+            contract.secType,
+            contract.symbol,
+            contract.lastTradeDateOrContractMonth,
+            float(contract.strike or 0.0),
+            contract.right,
+            contract.exchange,
+            contract.currency,
+            contract.tradingClass
+        ))
+
+    def _is_expired(self, entry: Dict[str, Any]) -> bool:
+        """Check contract expiry and cache entry age"""
+        today = datetime.now()
+
+        expiry = entry.get('lastTradeDateOrContractMonth') or ''
+        if len(expiry) >= 8 and expiry[:8] < today.strftime('%Y%m%d'):
+            return True
+        if len(expiry) == 6 and expiry < today.strftime('%Y%m'):
+            return True
+
+        try:
+            cached_at = datetime.fromisoformat(entry['cached_at'])
+        except (KeyError, ValueError):
+            return True
+        return today - cached_at > timedelta(days=self.max_age_days)
+
+    def load(self):
+        """Load the cache file, dropping it on version mismatch and pruning expired entries"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Could not read contract cache {self.path}: {e}")
+            return
+
+        if data.get('version') != CACHE_VERSION:
+            logger.info(f"Contract cache version {data.get('version')} is outdated, ignoring it")
+            self._dirty = True
+            return
+
+        contracts = data.get('contracts', {})
+        self.entries = {key: entry for key, entry in contracts.items() if not self._is_expired(entry)}
+        if len(self.entries) != len(contracts):
+            self._dirty = True
+        logger.info(f"Loaded {len(self.entries)} cached contracts from {self.path}")
+
+    def save(self):
+        """Write the cache file atomically if it changed"""
+        if not self._dirty:
+            return
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'version': CACHE_VERSION, 'contracts': self.entries}, f, indent=2)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except Exception as e:
+            logger.warning(f"Could not write contract cache {self.path}: {e}")
+
+    def apply(self, contract: Contract) -> bool:
+        """Fill a contract in place from the cache, returns True on a hit"""
+        key = self.spec_key(contract)
+        entry = self.entries.get(key)
+        if not entry:
+            return False
+        if self._is_expired(entry):
+            del self.entries[key]
+            self._dirty = True
+            return False
+
+        for field in CACHED_FIELDS:
+            if field in entry:
+                setattr(contract, field, entry[field])
+        return True
+
+    def get(self, contract: Contract) -> Optional[Contract]:
+        """Get a qualified copy of a contract from the cache"""
+        cached = Contract(**{field: getattr(contract, field) for field in CACHED_FIELDS})
+        return cached if self.apply(cached) else None
+
+    def put(self, key: str, contract: Contract):
+        """Store a qualified contract under the spec key it was requested with"""
+        if not contract.conId:
+            return
+        entry = {field: getattr(contract, field) for field in CACHED_FIELDS}
+        entry['cached_at'] = datetime.now().isoformat()
+        self.entries[key] = entry
+        self._dirty = True
+
+    def invalidate(self, contract: Contract):
+        """Drop a contract from the cache"""
+        if self.entries.pop(self.spec_key(contract), None):
+            self._dirty = True
+
+_contract_cache: Optional[ContractCache] = None
+
+def get_contract_cache() -> ContractCache:
+    """Get the process-wide contract cache"""
+    global _contract_cache
+    if _contract_cache is None:
+        _contract_cache = ContractCache()
+    return _contract_cache
+
+async def qualify_contracts(ib: IB, *contracts: Contract, cache: ContractCache = None) -> List[Contract]:
+    """
+    Qualify contracts in place, serving known contracts from the cache
+
+    Only cache misses are sent to IBKR, in a single batch.
+
+    Returns:
+        list: The contracts that are qualified, in the order given
+    """
+    cache = cache or get_contract_cache()
+
+    misses = []
+    for contract in contracts:
+        if not contract.conId and not cache.apply(contract):
+            misses.append((cache.spec_key(contract), contract))
+
+    if misses:
+        await ib.qualifyContractsAsync(*(contract for _, contract in misses))
+        for key, contract in misses:
+            cache.put(key, contract)
+        cache.save()
+
+    return [contract for contract in contracts if contract.conId]
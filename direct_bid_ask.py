@@ -6,6 +6,7 @@ Example: Get bid/ask prices directly from IBKR
 import asyncio
 import logging
 from ib_insync import IB, Contract
+from quote_waiter import wait_for_quote
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -41,7 +42,7 @@ async def get_direct_bid_ask():
         
         # Wait for data
         print("4. Waiting for market data...")
-        await asyncio.sleep(2)
+        await wait_for_quote(ticker)
         
         # Get prices
         print(f"✅ Market Data:")
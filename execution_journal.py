@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Execution Journal Module
+Append-only SQLite (WAL) journal of alerts, order submissions, status
+changes and fills, written in batches from a background thread, with a
+reader for replay and post-trade aggregation
+"""
+
+import argparse
+import atexit
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from ib_insync import IB, Fill, Trade
+from alert_queue import current_alert_id
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    mono_ns INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    alert_id TEXT,
+    order_id INTEGER,
+    symbol TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS events_alert ON events (alert_id);
+"""
+
+COLUMNS = ('session', 'mono_ns', 'ts', 'kind', 'alert_id', 'order_id', 'symbol', 'data')
+
+# Orders remembered to attribute later status changes and fills to an alert
+ORDER_HISTORY_SIZE = 10000
+
+# Journal shared by every connection in the process, see get_journal()
+journal: Optional['ExecutionJournal'] = None
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+class ExecutionJournal:
+    """
+    Batched append-only event journal
+
+    record() only builds a row and puts it on a queue; a writer thread
+    inserts everything queued in one transaction. Each row carries the
+    process session id and a monotonic timestamp, so latencies within a
+    session are exact even if the wall clock moves.
+    """
+
+    def __init__(self, path: str = None, batch_size: int = None):
+        self.path = path or Config.JOURNAL_FILE
+        self.batch_size = max(1, batch_size or Config.JOURNAL_BATCH_SIZE)
+        self.session = uuid.uuid4().hex[:12]
+
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._conn = _connect(self.path)
+        self._thread = threading.Thread(target=self._write_loop, name="execution-journal", daemon=True)
+        self._thread.start()
+
+        # order id -> alert id, bounded to ORDER_HISTORY_SIZE
+        self._order_alerts: "OrderedDict[int, Optional[str]]" = OrderedDict()
+
+        # order id -> (status, filled) last journaled, to skip repeated status events
+        self._order_states: "OrderedDict[int, tuple]" = OrderedDict()
+
+        # ids of IB instances already attached
+        self._attached = set()
+
+        self.written = 0
+        self.batches = 0
+
+    def record(self, kind: str, alert_id: str = None, order_id: int = None, symbol: str = None, **data):
+        """Queue one event for the writer thread"""
+        self._queue.put((
+            self.session, time.monotonic_ns(), time.time(), kind, alert_id, order_id, symbol,
+            json.dumps(data, default=str) if data else None
+        ))
+
+    def _write_loop(self):
+        stopping = False
+        while not stopping:
+            row = self._queue.get()
+            if row is None:
+                break
+            batch = [row]
+            while len(batch) < self.batch_size:
+                try:
+                    row = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        f"INSERT INTO events ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                        batch
+                    )
+                self.written += len(batch)
+                self.batches += 1
+            except sqlite3.Error as e:
+                logger.error(f"Execution journal write failed, {len(batch)} events lost: {e}")
+
+    def close(self):
+        """Write out everything queued and close the database"""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._conn.close()
+
+    # IB events
+
+    def attach(self, ib: IB) -> 'ExecutionJournal':
+        """
+        Journal order submissions, status changes and fills of an IB connection
+
+        Orders are linked to the alert being processed when they are placed.
+        Attaching the same connection twice is a no-op.
+        """
+        if id(ib) in self._attached:
+            return self
+        self._attached.add(id(ib))
+        ib.newOrderEvent += self._on_new_order
+        ib.orderStatusEvent += self._on_order_status
+        ib.execDetailsEvent += self._on_exec_details
+        return self
+
+    def link_order(self, order_id: int, alert_id: Optional[str]):
+        """Attribute an order's later events to an alert"""
+        self._order_alerts[order_id] = alert_id
+        while len(self._order_alerts) > ORDER_HISTORY_SIZE:
+            self._order_alerts.popitem(last=False)
+
+    def order_alerts(self) -> Dict[int, Optional[str]]:
+        """Known order id to alert id links"""
+        return dict(self._order_alerts)
+
+    def _on_new_order(self, trade: Trade):
+        order, contract = trade.order, trade.contract
+        alert_id = current_alert_id.get()
+        self.link_order(order.orderId, alert_id)
+        self.record(
+            "order_submitted", alert_id, order.orderId, contract.symbol,
+            sec_type=contract.secType, local_symbol=contract.localSymbol, con_id=contract.conId,
+            action=order.action, order_type=order.orderType, quantity=order.totalQuantity,
+            limit_price=order.lmtPrice if order.orderType == 'LMT' else None
+        )
+
+    def _on_order_status(self, trade: Trade):
+        status = trade.orderStatus
+        order_id = trade.order.orderId
+        state = (status.status, status.filled)
+        if self._order_states.get(order_id) == state:
+            return
+        self._order_states[order_id] = state
+        while len(self._order_states) > ORDER_HISTORY_SIZE:
+            self._order_states.popitem(last=False)
+        self.record(
+            "order_status", self._order_alerts.get(order_id), order_id, trade.contract.symbol,
+            status=status.status, filled=status.filled, remaining=status.remaining,
+            avg_fill_price=status.avgFillPrice
+        )
+
+    def _on_exec_details(self, trade: Trade, fill: Fill):
+        execution = fill.execution
+        self.record(
+            "fill", self._order_alerts.get(execution.orderId), execution.orderId, fill.contract.symbol,
+            exec_id=execution.execId, side=execution.side, shares=execution.shares,
+            price=execution.price, exchange=execution.exchange, time=execution.time
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        """Write counts for monitoring"""
+        return {
+            "path": self.path,
+            "session": self.session,
+            "written": self.written,
+            "batches": self.batches,
+            "queued": self._queue.qsize()
+        }
+
+def get_journal() -> ExecutionJournal:
+    """Process-wide journal, created on first use and closed at exit"""
+    global journal
+    if journal is None:
+        journal = ExecutionJournal()
+        atexit.register(journal.close)
+    return journal
+
+class JournalReader:
+    """Read-only access to a journal file for replay and aggregation"""
+
+    def __init__(self, path: str = None):
+        self.path = path or Config.JOURNAL_FILE
+        self.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+
+    @staticmethod
+    def day_range(day: str) -> tuple:
+        """(start, end) epoch seconds for a YYYY-MM-DD local day"""
+        start = datetime.strptime(day, '%Y-%m-%d')
+        return start.timestamp(), (start + timedelta(days=1)).timestamp()
+
+    def _where(self, start: float, end: float, kinds: List[str], alert_id: str, alias: str = '') -> tuple:
+        clauses, params = [], []
+        if start is not None:
+            clauses.append(f"{alias}ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append(f"{alias}ts < ?")
+            params.append(end)
+        if kinds:
+            clauses.append(f"{alias}kind IN ({', '.join('?' * len(kinds))})")
+            params.extend(kinds)
+        if alert_id:
+            clauses.append(f"{alias}alert_id = ?")
+            params.append(alert_id)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def events(self, start: float = None, end: float = None, kinds: List[str] = None,
+               alert_id: str = None) -> Iterator[Dict[str, Any]]:
+        """Events in journal order, optionally filtered"""
+        where, params = self._where(start, end, kinds, alert_id)
+        cursor = self.conn.execute(f"SELECT * FROM events{where} ORDER BY id", params)
+        columns = [column[0] for column in cursor.description]
+        for row in cursor:
+            event = dict(zip(columns, row))
+            event["data"] = json.loads(event["data"]) if event["data"] else {}
+            yield event
+
+    def replay(self, handler: Callable[[Dict[str, Any]], Any], **filters) -> int:
+        """Feed every matching event to handler in order, returning the count"""
+        count = 0
+        for event in self.events(**filters):
+            handler(event)
+            count += 1
+        return count
+
+    def summary(self, start: float = None, end: float = None) -> Dict[str, Any]:
+        """Event counts, fills per symbol and alert-to-fill latency"""
+        where, params = self._where(start, end, None, None)
+        counts = dict(self.conn.execute(f"SELECT kind, COUNT(*) FROM events{where} GROUP BY kind", params))
+
+        fill_where, fill_params = self._where(start, end, ["fill"], None)
+        fills = {}
+        for symbol, side, shares, notional in self.conn.execute(
+            f"SELECT symbol, json_extract(data, '$.side') AS side, SUM(json_extract(data, '$.shares')), "
+            f"SUM(json_extract(data, '$.shares') * json_extract(data, '$.price')) "
+            f"FROM events{fill_where} GROUP BY symbol, side", fill_params
+        ):
+            fills.setdefault(symbol, {})[side] = {
+                "shares": shares,
+                "avg_price": round(notional / shares, 4) if shares else None
+            }
+
+        # First fill of each alert relative to its receipt, same session only
+        latency_where, latency_params = self._where(start, end, ["alert_received"], None, alias='a.')
+        latencies = [
+            latency / 1e6 for (latency,) in self.conn.execute(
+                f"SELECT (SELECT MIN(f.mono_ns) FROM events f WHERE f.kind = 'fill' "
+                f"AND f.alert_id = a.alert_id AND f.session = a.session) - a.mono_ns AS latency "
+                f"FROM events a{latency_where}",
+                latency_params
+            ) if latency is not None
+        ]
+        latencies.sort()
+        alert_to_fill = None
+        if latencies:
+            alert_to_fill = {
+                "count": len(latencies),
+                "p50_ms": round(latencies[len(latencies) // 2], 3),
+                "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3),
+                "max_ms": round(latencies[-1], 3)
+            }
+
+        return {"events": counts, "fills": fills, "alert_to_fill": alert_to_fill}
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay or summarize the execution journal")
+    parser.add_argument("--file", default=Config.JOURNAL_FILE, help="Journal file")
+    parser.add_argument("--day", help="Local day to read (YYYY-MM-DD), default all")
+    parser.add_argument("--alert", help="Only events of this alert id")
+    parser.add_argument("--kind", action="append", help="Only events of this kind (repeatable)")
+    parser.add_argument("--replay", action="store_true", help="Print every event instead of the summary")
+    args = parser.parse_args()
+
+    reader = JournalReader(args.file)
+    start, end = reader.day_range(args.day) if args.day else (None, None)
+    started = time.perf_counter()
+    if args.replay:
+        count = reader.replay(
+            lambda e: print(f"{datetime.fromtimestamp(e['ts']).isoformat()} {e['kind']:<16} "
+                            f"alert={e['alert_id']} order={e['order_id']} {e['symbol'] or ''} {e['data']}"),
+            start=start, end=end, kinds=args.kind, alert_id=args.alert
+        )
+        print(f"\n{count} events in {(time.perf_counter() - started) * 1000:.1f} ms")
+    else:
+        print(json.dumps(reader.summary(start, end), indent=2))
+        print(f"\nSummarized in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
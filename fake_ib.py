@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Fake IB Module
+In-process stand-in for ib_insync.IB used by the benchmarks
+
+Implements the subset of the IB API the traders use (connect, contract
+qualification, market data, orders, positions, portfolio, account
+summary and PnL subscriptions) with configurable latencies, returning real ib_insync objects
+and emitting the same events so the bot code runs unmodified.
+"""
+
+import asyncio
+import logging
+import random
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from eventkit import Event
+from ib_insync import (
+    AccountValue, CommissionReport, Contract, Execution, Fill, Order, OrderStatus,
+    PnL, PnLSingle, PortfolioItem, Position, Ticker, Trade, TradeLogEntry
+)
+
+logger = logging.getLogger(__name__)
+
+# Starting prices and tick sizes per security type
+BASE_PRICES = {'FUT': 6700.0, 'OPT': 25.0, 'STK': 670.0}
+TICK_SIZES = {'FUT': 0.25, 'OPT': 0.05, 'STK': 0.01}
+
+# Contract multipliers used for portfolio values
+MULTIPLIERS = {'FUT': 50, 'OPT': 100, 'STK': 1}
+
+def fake_con_id(contract: Contract) -> int:
+    """Deterministic conId derived from the contract spec"""
+    spec = '|'.join(str(value) for value in (
+        contract.secType, contract.symbol, contract.lastTradeDateOrContractMonth,
+        float(contract.strike or 0.0), contract.right, contract.currency or 'USD'
+    ))
+    return zlib.crc32(spec.encode()) & 0x7fffffff or 1
+
+def apply_fill(held: float, avg_cost: float, quantity: float, cost: float) -> tuple:
+    """
+    Update a position with a signed fill
+
+    Args:
+        held: Current signed position
+        avg_cost: Current average cost per unit (price * multiplier)
+        quantity: Signed fill quantity
+        cost: Fill cost per unit (price * multiplier)
+
+    Returns:
+        tuple: (new position, new average cost, realized PnL)
+    """
+    total = held + quantity
+    realized = 0.0
+    if held and (held > 0) != (quantity > 0):
+        closed = min(abs(quantity), abs(held))
+        realized = (cost - avg_cost) * closed * (1 if held > 0 else -1)
+
+    if total == 0:
+        avg_cost = 0.0
+    elif held == 0 or (held > 0) != (total > 0):
+        avg_cost = cost
+    elif abs(total) > abs(held):
+        avg_cost = (avg_cost * held + cost * quantity) / total
+    return total, avg_cost, realized
+
+class FakeIB:
+    """
+    Simulated IB connection with configurable delays
+
+    Args:
+        account: Account id reported in positions and account values
+        qualify_delay: Seconds per qualifyContractsAsync round trip
+        ack_delay: Seconds from placeOrder to the Submitted status
+        fill_delay: Seconds from placeOrder to the fill
+        fill_jitter: Random extra seconds (0..fill_jitter) added to each fill
+        tick_interval: Seconds between streaming quote updates
+        static_positions: Keep positions unchanged on fills so repeated
+            sell alerts always find something to close
+        tag: Callable evaluated in placeOrder whose result is stored with
+            the order, e.g. to correlate orders with the alert that sent them
+    """
+
+    def __init__(self, account: str = 'DU0000000', qualify_delay: float = 0.01,
+                 ack_delay: float = 0.002, fill_delay: float = 0.05, fill_jitter: float = 0.0,
+                 tick_interval: float = 0.25, static_positions: bool = False,
+                 tag: Callable[[], Any] = None):
+        self.account = account
+        self.qualify_delay = qualify_delay
+        self.ack_delay = ack_delay
+        self.fill_delay = fill_delay
+        self.fill_jitter = fill_jitter
+        self.tick_interval = tick_interval
+        self.static_positions = static_positions
+        self.tag = tag
+
+        self.connected = False
+        self.client_id = None
+        self._next_order_id = 1
+        self._next_exec_id = 1
+        self._tick_task: Optional[asyncio.Task] = None
+
+        # conId -> ticker, conId -> mid price
+        self._tickers: Dict[int, Ticker] = {}
+        self._prices: Dict[int, float] = {}
+
+        # conId -> (contract, quantity, average cost)
+        self._positions: Dict[int, tuple] = {}
+
+        # conId -> realized PnL
+        self._realized: Dict[int, float] = {}
+
+        # Live PnL subscriptions
+        self._pnl: Dict[str, PnL] = {}
+        self._pnl_single: Dict[int, PnLSingle] = {}
+
+        self._trades: List[Trade] = []
+
+        # One record per placed order, with monotonic timestamps
+        self.orders: List[Dict[str, Any]] = []
+
+        self.account_values = {
+            'NetLiquidation': 1000000.0,
+            'TotalCashValue': 1000000.0,
+            'BuyingPower': 4000000.0,
+            'GrossPositionValue': 0.0
+        }
+
+        # Same event names as ib_insync.IB
+        self.connectedEvent = Event('connectedEvent')
+        self.disconnectedEvent = Event('disconnectedEvent')
+        self.errorEvent = Event('errorEvent')
+        self.newOrderEvent = Event('newOrderEvent')
+        self.orderStatusEvent = Event('orderStatusEvent')
+        self.execDetailsEvent = Event('execDetailsEvent')
+        self.commissionReportEvent = Event('commissionReportEvent')
+        self.positionEvent = Event('positionEvent')
+        self.updatePortfolioEvent = Event('updatePortfolioEvent')
+        self.accountValueEvent = Event('accountValueEvent')
+        self.accountSummaryEvent = Event('accountSummaryEvent')
+        self.pendingTickersEvent = Event('pendingTickersEvent')
+        self.pnlEvent = Event('pnlEvent')
+        self.pnlSingleEvent = Event('pnlSingleEvent')
+
+    # Connection
+
+    async def connectAsync(self, host: str = '127.0.0.1', port: int = 7497, clientId: int = 1,
+                           timeout: float = 4, readonly: bool = False, account: str = ''):
+        await asyncio.sleep(0)
+        self.connected = True
+        self.client_id = clientId
+        if self.tick_interval and not self._tick_task:
+            self._tick_task = asyncio.create_task(self._tick_loop())
+        logger.info(f"Fake IB connected (client ID {clientId})")
+        self.connectedEvent.emit()
+        return self
+
+    def disconnect(self):
+        if not self.connected:
+            return
+        self.connected = False
+        if self._tick_task:
+            self._tick_task.cancel()
+            self._tick_task = None
+        self.disconnectedEvent.emit()
+
+    def isConnected(self) -> bool:
+        return self.connected
+
+    def managedAccounts(self) -> List[str]:
+        return [self.account]
+
+    async def reqCurrentTimeAsync(self) -> datetime:
+        await asyncio.sleep(self.qualify_delay)
+        return datetime.now(timezone.utc)
+
+    # Contracts
+
+    @staticmethod
+    def _con_id(contract: Contract) -> int:
+        return fake_con_id(contract)
+
+    async def qualifyContractsAsync(self, *contracts: Contract) -> List[Contract]:
+        await asyncio.sleep(self.qualify_delay)
+        qualified = []
+        for contract in contracts:
+            if not contract.secType or not contract.symbol:
+                continue
+            if contract.secType in ('FUT', 'OPT') and not contract.lastTradeDateOrContractMonth:
+                continue
+            contract.conId = contract.conId or self._con_id(contract)
+            contract.currency = contract.currency or 'USD'
+            contract.multiplier = contract.multiplier or (
+                str(MULTIPLIERS[contract.secType]) if contract.secType != 'STK' else '')
+            contract.localSymbol = contract.localSymbol or contract.symbol
+            contract.tradingClass = contract.tradingClass or contract.symbol
+            qualified.append(contract)
+        return qualified
+
+    # Market data
+
+    def _price(self, contract: Contract) -> float:
+        con_id = contract.conId or self._con_id(contract)
+        if con_id not in self._prices:
+            self._prices[con_id] = BASE_PRICES.get(contract.secType, 100.0)
+        return self._prices[con_id]
+
+    def _quote(self, ticker: Ticker):
+        contract = ticker.contract
+        tick = TICK_SIZES.get(contract.secType, 0.01)
+        mid = self._price(contract)
+        ticker.time = datetime.now(timezone.utc)
+        ticker.bid = round(mid - tick / 2, 2)
+        ticker.ask = round(mid + tick / 2, 2)
+        ticker.last = round(mid, 2)
+        ticker.bidSize = ticker.askSize = 10
+        ticker.updateEvent.emit(ticker)
+        self.pendingTickersEvent.emit({ticker})
+
+    def reqMktData(self, contract: Contract, genericTickList: str = '', snapshot: bool = False,
+                   regulatorySnapshot: bool = False, mktDataOptions: list = None) -> Ticker:
+        con_id = contract.conId or self._con_id(contract)
+        ticker = self._tickers.get(con_id)
+        if not ticker:
+            ticker = Ticker(contract=contract)
+            self._tickers[con_id] = ticker
+        # First quote arrives on the next loop iteration, like a real subscription
+        asyncio.get_running_loop().call_soon(self._quote, ticker)
+        return ticker
+
+    def cancelMktData(self, contract: Contract):
+        self._tickers.pop(contract.conId or self._con_id(contract), None)
+
+    def ticker(self, contract: Contract) -> Optional[Ticker]:
+        return self._tickers.get(contract.conId or self._con_id(contract))
+
+    async def _tick_loop(self):
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            for ticker in list(self._tickers.values()):
+                contract = ticker.contract
+                con_id = contract.conId or self._con_id(contract)
+                tick = TICK_SIZES.get(contract.secType, 0.01)
+                self._prices[con_id] = max(tick, self._price(contract) + random.choice((-tick, 0, tick)))
+                self._quote(ticker)
+            self._emit_pnl()
+
+    # Orders
+
+    def placeOrder(self, contract: Contract, order: Order) -> Trade:
+        submitted = time.perf_counter()
+        if not order.orderId:
+            order.orderId = self._next_order_id
+            self._next_order_id += 1
+
+        status = OrderStatus(
+            orderId=order.orderId,
+            status='PendingSubmit',
+            remaining=order.totalQuantity,
+            clientId=self.client_id or 0
+        )
+        trade = Trade(contract, order, status, [], [TradeLogEntry(datetime.now(timezone.utc), 'PendingSubmit')])
+        self._trades.append(trade)
+
+        record = {
+            'order_id': order.orderId,
+            'symbol': contract.symbol,
+            'sec_type': contract.secType,
+            'action': order.action,
+            'order_type': order.orderType,
+            'quantity': order.totalQuantity,
+            'tag': self.tag() if self.tag else None,
+            'submitted': submitted,
+            'filled': None
+        }
+        self.orders.append(record)
+        self.newOrderEvent.emit(trade)
+
+        loop = asyncio.get_running_loop()
+        loop.call_later(self.ack_delay, self._set_status, trade, 'Submitted')
+        loop.call_later(self.fill_delay + random.uniform(0, self.fill_jitter), self._fill, trade, record)
+        return trade
+
+    def cancelOrder(self, order: Order):
+        for trade in self._trades:
+            if trade.order.orderId == order.orderId and not trade.isDone():
+                self._set_status(trade, 'Cancelled')
+                trade.cancelledEvent.emit(trade)
+
+    def _set_status(self, trade: Trade, status: str):
+        if trade.isDone():
+            return
+        trade.orderStatus.status = status
+        trade.log.append(TradeLogEntry(datetime.now(timezone.utc), status))
+        trade.statusEvent.emit(trade)
+        self.orderStatusEvent.emit(trade)
+
+    def _fill(self, trade: Trade, record: Dict[str, Any]):
+        if trade.isDone():
+            return
+        contract, order = trade.contract, trade.order
+        tick = TICK_SIZES.get(contract.secType, 0.01)
+        if order.orderType == 'LMT' and order.lmtPrice:
+            price = order.lmtPrice
+        else:
+            mid = self._price(contract)
+            price = round(mid + tick / 2 if order.action == 'BUY' else mid - tick / 2, 2)
+        quantity = order.totalQuantity
+
+        execution = Execution(
+            execId=f"fake.{self._next_exec_id}",
+            time=datetime.now(timezone.utc),
+            acctNumber=self.account,
+            exchange=contract.exchange,
+            side='BOT' if order.action == 'BUY' else 'SLD',
+            shares=quantity,
+            price=price,
+            clientId=self.client_id or 0,
+            orderId=order.orderId,
+            cumQty=quantity,
+            avgPrice=price
+        )
+        self._next_exec_id += 1
+        fill = Fill(contract, execution, CommissionReport(execId=execution.execId, commission=0.0), execution.time)
+        trade.fills.append(fill)
+
+        status = trade.orderStatus
+        status.status = 'Filled'
+        status.filled = quantity
+        status.remaining = 0
+        status.avgFillPrice = price
+        status.lastFillPrice = price
+        trade.log.append(TradeLogEntry(execution.time, 'Filled'))
+        record['filled'] = time.perf_counter()
+
+        if not self.static_positions:
+            signed = quantity if order.action == 'BUY' else -quantity
+            self._apply_fill(contract, signed, price)
+
+        self.execDetailsEvent.emit(trade, fill)
+        trade.fillEvent.emit(trade, fill)
+        trade.statusEvent.emit(trade)
+        self.orderStatusEvent.emit(trade)
+        trade.filledEvent.emit(trade)
+
+    # Positions and account
+
+    def set_position(self, contract: Contract, quantity: float, avg_cost: float = None):
+        """Seed or overwrite a position"""
+        if avg_cost is None:
+            avg_cost = self._price(contract) * MULTIPLIERS.get(contract.secType, 1)
+        self._positions[contract.conId or self._con_id(contract)] = (contract, quantity, avg_cost)
+        self._emit_position(contract)
+
+    def _apply_fill(self, contract: Contract, quantity: float, price: float):
+        con_id = contract.conId or self._con_id(contract)
+        _, held, avg_cost = self._positions.get(con_id, (contract, 0, 0.0))
+        total, avg_cost, realized = apply_fill(held, avg_cost, quantity, price * MULTIPLIERS.get(contract.secType, 1))
+        self._positions[con_id] = (contract, total, avg_cost)
+        self._realized[con_id] = self._realized.get(con_id, 0.0) + realized
+        self._emit_position(contract)
+
+    def _emit_position(self, contract: Contract):
+        con_id = contract.conId or self._con_id(contract)
+        position = next((p for p in self.positions() if p.contract.conId == con_id), None)
+        if position is None:
+            position = Position(self.account, contract, 0, 0.0)
+        self.positionEvent.emit(position)
+        item = next((p for p in self.portfolio() if p.contract.conId == con_id), None)
+        if item is None:
+            item = PortfolioItem(contract, 0, self._price(contract), 0.0, 0.0, 0.0, 0.0, self.account)
+        self.updatePortfolioEvent.emit(item)
+        for value in self.accountSummary():
+            self.accountValueEvent.emit(value)
+        self._emit_pnl()
+
+    def positions(self, account: str = '') -> List[Position]:
+        return [
+            Position(self.account, contract, quantity, avg_cost)
+            for contract, quantity, avg_cost in self._positions.values()
+            if quantity
+        ]
+
+    def portfolio(self, account: str = '') -> List[PortfolioItem]:
+        items = []
+        for contract, quantity, avg_cost in self._positions.values():
+            if not quantity:
+                continue
+            multiplier = MULTIPLIERS.get(contract.secType, 1)
+            price = self._price(contract)
+            market_value = price * multiplier * quantity
+            items.append(PortfolioItem(
+                contract, quantity, price, market_value, avg_cost,
+                market_value - avg_cost * quantity, 0.0, self.account
+            ))
+        return items
+
+    def accountSummary(self, account: str = '') -> List[AccountValue]:
+        gross = sum(abs(item.marketValue) for item in self.portfolio())
+        values = dict(self.account_values, GrossPositionValue=gross)
+        return [AccountValue(self.account, tag, str(value), 'USD', '') for tag, value in values.items()]
+
+    def accountValues(self, account: str = '') -> List[AccountValue]:
+        return self.accountSummary(account)
+
+    # PnL
+
+    def reqPnL(self, account: str, modelCode: str = '') -> PnL:
+        pnl = self._pnl.setdefault(account, PnL(account, modelCode))
+        asyncio.get_running_loop().call_soon(self._emit_pnl)
+        return pnl
+
+    def cancelPnL(self, account: str, modelCode: str = ''):
+        self._pnl.pop(account, None)
+
+    def reqPnLSingle(self, account: str, modelCode: str, conId: int) -> PnLSingle:
+        pnl = self._pnl_single.setdefault(conId, PnLSingle(account, modelCode, conId))
+        asyncio.get_running_loop().call_soon(self._emit_pnl)
+        return pnl
+
+    def cancelPnLSingle(self, account: str, modelCode: str, conId: int):
+        self._pnl_single.pop(conId, None)
+
+    def _emit_pnl(self):
+        if not self._pnl and not self._pnl_single:
+            return
+        items = {item.contract.conId: item for item in self.portfolio()}
+        realized = sum(self._realized.values())
+        unrealized = sum(item.unrealizedPNL for item in items.values())
+        for pnl in self._pnl.values():
+            pnl.dailyPnL = unrealized + realized
+            pnl.unrealizedPnL = unrealized
+            pnl.realizedPnL = realized
+            self.pnlEvent.emit(pnl)
+        for con_id, pnl in self._pnl_single.items():
+            item = items.get(con_id)
+            pnl.position = item.position if item else 0
+            pnl.unrealizedPnL = item.unrealizedPNL if item else 0.0
+            pnl.realizedPnL = self._realized.get(con_id, 0.0)
+            pnl.dailyPnL = pnl.unrealizedPnL + pnl.realizedPnL
+            pnl.value = item.marketValue if item else 0.0
+            self.pnlSingleEvent.emit(pnl)
+
+    def trades(self) -> List[Trade]:
+        return list(self._trades)
+
+    def openTrades(self) -> List[Trade]:
+        return [trade for trade in self._trades if not trade.isDone()]
@@ -0,0 +1,735 @@
+#!/usr/bin/env python3
+"""
+Fake IB Gateway Module
+Local TCP server speaking the TWS API wire protocol for offline load and
+soak testing
+
+Supports what the traders need from a real gateway: the API handshake,
+contract details, streaming quotes, orders with configurable fill latency
+and rejection rate, positions, portfolio and account updates, account
+summary, executions, PnL subscriptions and connection drops for
+reconnection tests.
+
+Usage:
+    python fake_ib_gateway.py --port 4002 --fill-delay 0.05 --reject-rate 0.01
+    IBKR_PORT=4002 python run_bot.py
+"""
+
+import argparse
+import asyncio
+import csv
+import logging
+import random
+import struct
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from ib_insync import Contract
+from fake_ib import BASE_PRICES, TICK_SIZES, MULTIPLIERS, fake_con_id, apply_fill
+
+logger = logging.getLogger(__name__)
+
+# Server version negotiated with clients (ib_insync supports 157..176)
+SERVER_VERSION = 176
+
+# Incoming message ids
+START_API = 71
+REQ_MKT_DATA = 1
+CANCEL_MKT_DATA = 2
+PLACE_ORDER = 3
+CANCEL_ORDER = 4
+REQ_OPEN_ORDERS = 5
+REQ_ACCOUNT_UPDATES = 6
+REQ_EXECUTIONS = 7
+REQ_IDS = 8
+REQ_CONTRACT_DETAILS = 9
+REQ_ALL_OPEN_ORDERS = 16
+REQ_CURRENT_TIME = 49
+REQ_GLOBAL_CANCEL = 58
+REQ_POSITIONS = 61
+REQ_ACCOUNT_SUMMARY = 62
+CANCEL_ACCOUNT_SUMMARY = 63
+CANCEL_POSITIONS = 64
+REQ_ACCOUNT_UPDATES_MULTI = 76
+REQ_PNL = 92
+CANCEL_PNL = 93
+REQ_PNL_SINGLE = 94
+CANCEL_PNL_SINGLE = 95
+REQ_COMPLETED_ORDERS = 99
+
+# Tick types
+BID, ASK, LAST = 1, 2, 4
+
+# Price path callable: (contract, step, previous price) -> new price
+PricePath = Callable[[Contract, int, float], float]
+
+def random_walk(volatility: float = 1.0) -> PricePath:
+    """Price path moving each contract by up to `volatility` ticks per step"""
+    def path(contract: Contract, step: int, price: float) -> float:
+        tick = TICK_SIZES.get(contract.secType, 0.01)
+        moves = int(volatility) or 1
+        return max(tick, price + random.randint(-moves, moves) * tick)
+    return path
+
+def price_file_path(path: str) -> PricePath:
+    """
+    Price path replayed from a CSV file with `symbol,price` rows
+
+    Each symbol's prices are played in file order, one per step, looping
+    at the end. Symbols not in the file keep a random walk.
+    """
+    prices: Dict[str, List[float]] = {}
+    with open(path, 'r', newline='') as f:
+        for row in csv.reader(f):
+            if len(row) < 2 or row[0].startswith('#'):
+                continue
+            try:
+                prices.setdefault(row[0].strip(), []).append(float(row[1]))
+            except ValueError:
+                continue  # header row
+    fallback = random_walk()
+
+    def path(contract: Contract, step: int, price: float) -> float:
+        series = prices.get(contract.localSymbol) or prices.get(contract.symbol)
+        if not series:
+            return fallback(contract, step, price)
+        return series[step % len(series)]
+    return path
+
+class _Session:
+    """State of one client connection"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.client_id: Optional[int] = None
+        self.peer = writer.get_extra_info('peername')
+
+        # reqId -> conId
+        self.market_data: Dict[int, int] = {}
+        self.pnl: Dict[int, str] = {}
+        self.pnl_single: Dict[int, int] = {}
+
+        self.account_updates = False
+        self.positions = False
+
+    def send(self, *fields):
+        if self.writer.is_closing():
+            return 0
+        payload = ''.join(f"{'' if field is None else field}\0" for field in fields).encode()
+        self.writer.write(struct.pack('>I', len(payload)) + payload)
+        return len(payload) + 4
+
+class FakeIBGateway:
+    """
+    TWS API server backed by a simulated market and account
+
+    Args:
+        host, port: Listen address
+        account: Managed account reported to clients
+        fill_delay: Seconds from order receipt to the fill
+        fill_jitter: Random extra seconds (0..fill_jitter) added to each fill
+        ack_delay: Seconds from order receipt to the Submitted status
+        reject_rate: Probability (0..1) that an order is rejected
+        tick_interval: Seconds between quote updates
+        pnl_interval: Seconds between PnL updates
+        price_path: Callable producing the next price, default random walk
+        commission: Commission per contract or share
+        static_positions: Keep positions unchanged on fills
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 4002, account: str = 'DU0000000',
+                 fill_delay: float = 0.05, fill_jitter: float = 0.0, ack_delay: float = 0.002,
+                 reject_rate: float = 0.0, tick_interval: float = 0.25, pnl_interval: float = 1.0,
+                 price_path: PricePath = None, commission: float = 0.85,
+                 static_positions: bool = False, starting_cash: float = 1000000.0):
+        self.host = host
+        self.port = port
+        self.account = account
+        self.fill_delay = fill_delay
+        self.fill_jitter = fill_jitter
+        self.ack_delay = ack_delay
+        self.reject_rate = reject_rate
+        self.tick_interval = tick_interval
+        self.pnl_interval = pnl_interval
+        self.price_path = price_path or random_walk()
+        self.commission = commission
+        self.static_positions = static_positions
+
+        self.sessions: List[_Session] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._tasks: List[asyncio.Task] = []
+
+        # conId -> contract, conId -> mid price
+        self.contracts: Dict[int, Contract] = {}
+        self.prices: Dict[int, float] = {}
+        self.step = 0
+
+        # conId -> [quantity, average cost, realized PnL]
+        self.positions: Dict[int, list] = {}
+        self.cash = starting_cash
+        self.realized = 0.0
+        self.start_equity = starting_cash
+
+        # (clientId, orderId) -> open order state
+        self.open_orders: Dict[tuple, Dict[str, Any]] = {}
+        self.executions: List[tuple] = []
+        self.next_order_id = 1
+        self.next_perm_id = 1000000
+        self.next_exec_id = 1
+
+        # Counters for soak tests
+        self.stats = {
+            'connections': 0, 'disconnects': 0, 'messages_in': 0, 'messages_out': 0,
+            'bytes_out': 0, 'orders': 0, 'fills': 0, 'rejects': 0, 'cancels': 0
+        }
+
+    # Server lifecycle
+
+    async def start(self):
+        """Start listening and the market simulation"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._tasks = [asyncio.create_task(self._tick_loop())]
+        if self.pnl_interval:
+            self._tasks.append(asyncio.create_task(self._pnl_loop()))
+        logger.info(f"Fake IB gateway listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        """Close all sessions and stop listening"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.drop_connections()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def drop_connections(self):
+        """Close every client connection, as when TWS restarts"""
+        for session in list(self.sessions):
+            session.writer.close()
+
+    # Simulation state
+
+    def seed_position(self, contract: Contract, quantity: float, avg_cost: float = None):
+        """Set a position before or while clients are connected"""
+        con_id = self._register(contract)
+        if avg_cost is None:
+            avg_cost = self._price(con_id) * self._multiplier(con_id)
+        self.positions[con_id] = [quantity, avg_cost, 0.0]
+        self._broadcast_position(con_id)
+
+    def _register(self, contract: Contract) -> int:
+        """Qualify a contract spec into the simulated universe"""
+        if contract.conId and contract.conId in self.contracts:
+            return contract.conId
+        con_id = contract.conId or fake_con_id(contract)
+        if con_id not in self.contracts:
+            sec_type = contract.secType
+            self.contracts[con_id] = Contract(
+                conId=con_id,
+                secType=sec_type,
+                symbol=contract.symbol,
+                lastTradeDateOrContractMonth=contract.lastTradeDateOrContractMonth,
+                strike=float(contract.strike or 0.0),
+                right=contract.right,
+                multiplier=contract.multiplier or (str(MULTIPLIERS[sec_type]) if sec_type in ('FUT', 'OPT') else ''),
+                exchange=contract.exchange or 'SMART',
+                primaryExchange=contract.primaryExchange or ('ARCA' if sec_type == 'STK' else ''),
+                currency=contract.currency or 'USD',
+                localSymbol=contract.localSymbol or contract.symbol,
+                tradingClass=contract.tradingClass or contract.symbol
+            )
+        return con_id
+
+    @staticmethod
+    def _is_valid(contract: Contract) -> bool:
+        if not contract.symbol or contract.secType not in ('FUT', 'OPT', 'STK', 'IND', 'CASH'):
+            return False
+        if contract.secType in ('FUT', 'OPT') and not contract.lastTradeDateOrContractMonth:
+            return False
+        if contract.secType == 'OPT' and (not contract.strike or contract.right not in ('C', 'P', 'CALL', 'PUT')):
+            return False
+        return True
+
+    def _price(self, con_id: int) -> float:
+        if con_id not in self.prices:
+            self.prices[con_id] = BASE_PRICES.get(self.contracts[con_id].secType, 100.0)
+        return self.prices[con_id]
+
+    def _multiplier(self, con_id: int) -> float:
+        multiplier = self.contracts[con_id].multiplier
+        return float(multiplier) if multiplier else 1.0
+
+    def _quote(self, con_id: int) -> tuple:
+        tick = TICK_SIZES.get(self.contracts[con_id].secType, 0.01)
+        mid = self._price(con_id)
+        return round(mid - tick / 2, 4), round(mid + tick / 2, 4), round(mid, 4)
+
+    def _market_value(self, con_id: int) -> float:
+        return self._price(con_id) * self._multiplier(con_id) * self.positions[con_id][0]
+
+    def _unrealized(self, con_id: int) -> float:
+        quantity, avg_cost, _ = self.positions[con_id]
+        return self._market_value(con_id) - avg_cost * quantity
+
+    def account_values(self) -> Dict[str, Any]:
+        """Current account values by tag"""
+        gross = sum(abs(self._market_value(con_id)) for con_id in self.positions)
+        unrealized = sum(self._unrealized(con_id) for con_id in self.positions)
+        net_liquidation = self.cash + unrealized
+        return {
+            'AccountCode': self.account,
+            'AccountType': 'INDIVIDUAL',
+            'NetLiquidation': round(net_liquidation, 2),
+            'TotalCashValue': round(self.cash, 2),
+            'BuyingPower': round(net_liquidation * 4, 2),
+            'GrossPositionValue': round(gross, 2),
+            'AvailableFunds': round(net_liquidation - gross * 0.05, 2),
+            'UnrealizedPnL': round(unrealized, 2),
+            'RealizedPnL': round(self.realized, 2)
+        }
+
+    # Connection handling
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = _Session(reader, writer)
+        try:
+            if not await self._handshake(session):
+                return
+            self.sessions.append(session)
+            self.stats['connections'] += 1
+            while True:
+                header = await reader.readexactly(4)
+                size = struct.unpack('>I', header)[0]
+                fields = (await reader.readexactly(size)).decode(errors='backslashreplace').split('\0')
+                fields.pop()
+                self.stats['messages_in'] += 1
+                try:
+                    self._dispatch(session, fields)
+                except Exception as e:
+                    logger.error(f"Error handling message {fields[:3]} from client {session.client_id}: {e}")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if session in self.sessions:
+                self.sessions.remove(session)
+                self.stats['disconnects'] += 1
+                logger.info(f"Client {session.client_id} disconnected")
+            writer.close()
+
+    async def _handshake(self, session: _Session) -> bool:
+        prefix = await session.reader.readexactly(4)
+        if prefix != b'API\0':
+            return False
+        size = struct.unpack('>I', await session.reader.readexactly(4))[0]
+        await session.reader.readexactly(size)  # "v157..176"
+        self._send(session, SERVER_VERSION, datetime.now().strftime('%Y%m%d %H:%M:%S UTC'))
+        return True
+
+    def _send(self, session: _Session, *fields):
+        sent = session.send(*fields)
+        if sent:
+            self.stats['messages_out'] += 1
+            self.stats['bytes_out'] += sent
+
+    def _error(self, session: _Session, req_id: int, code: int, message: str):
+        self._send(session, 4, 2, req_id, code, message, '')
+
+    def _dispatch(self, session: _Session, fields: List[str]):
+        msg_id = int(fields[0])
+        handler = self._handlers.get(msg_id)
+        if handler:
+            handler(self, session, fields)
+        else:
+            logger.debug(f"Ignoring message {msg_id} from client {session.client_id}")
+
+    @staticmethod
+    def _parse_contract(fields: List[str]) -> Contract:
+        """Decode the 12 contract fields ib_insync sends"""
+        (con_id, symbol, sec_type, expiry, strike, right, multiplier,
+         exchange, primary_exchange, currency, local_symbol, trading_class) = fields[:12]
+        return Contract(
+            conId=int(con_id or 0),
+            symbol=symbol,
+            secType=sec_type,
+            lastTradeDateOrContractMonth=expiry,
+            strike=float(strike or 0.0),
+            right=right,
+            multiplier=multiplier,
+            exchange=exchange,
+            primaryExchange=primary_exchange,
+            currency=currency,
+            localSymbol=local_symbol,
+            tradingClass=trading_class
+        )
+
+    # Request handlers
+
+    def _start_api(self, session: _Session, fields: List[str]):
+        client_id = int(fields[2])
+        if any(other.client_id == client_id for other in self.sessions if other is not session):
+            self._error(session, -1, 326, f"Unable to connect as the client id {client_id} is already in use.")
+            session.writer.close()
+            return
+        session.client_id = client_id
+        self._send(session, 9, 1, self.next_order_id)
+        self._send(session, 15, 1, self.account)
+        logger.info(f"Client {client_id} connected from {session.peer}")
+
+    def _req_ids(self, session: _Session, fields: List[str]):
+        self._send(session, 9, 1, self.next_order_id)
+
+    def _req_current_time(self, session: _Session, fields: List[str]):
+        self._send(session, 49, 1, int(time.time()))
+
+    def _req_contract_details(self, session: _Session, fields: List[str]):
+        req_id = int(fields[2])
+        contract = self._parse_contract(fields[3:15])
+        if not contract.conId and not self._is_valid(contract):
+            self._error(session, req_id, 200, "No security definition has been found for the request")
+            return
+        if contract.conId and contract.conId not in self.contracts:
+            self._error(session, req_id, 200, "No security definition has been found for the request")
+            return
+
+        c = self.contracts[self._register(contract)]
+        tick = TICK_SIZES.get(c.secType, 0.01)
+        self._send(
+            session, 10, req_id, c.symbol, c.secType, c.lastTradeDateOrContractMonth,
+            c.strike, c.right, c.exchange, c.currency, c.localSymbol, c.symbol,
+            c.tradingClass, c.conId, tick, c.multiplier,
+            'ACTIVETIM,LMT,MKT,STP', c.exchange, 1, 0, c.symbol, c.primaryExchange,
+            c.lastTradeDateOrContractMonth[:6], '', '', '', 'US/Eastern', '', '', '', '', 0,
+            1, '', '', '', c.lastTradeDateOrContractMonth, '', 1, 1, 1
+        )
+        self._send(session, 52, 1, req_id)
+
+    def _req_mkt_data(self, session: _Session, fields: List[str]):
+        req_id = int(fields[2])
+        contract = self._parse_contract(fields[3:15])
+        if not contract.conId and not self._is_valid(contract):
+            self._error(session, req_id, 200, "No security definition has been found for the request")
+            return
+        con_id = self._register(contract)
+        session.market_data[req_id] = con_id
+        self._send(session, 58, 1, req_id, 1)
+        self._send(session, 81, req_id, TICK_SIZES.get(self.contracts[con_id].secType, 0.01), '', 3)
+        self._send_quote(session, req_id, con_id)
+
+    def _cancel_mkt_data(self, session: _Session, fields: List[str]):
+        session.market_data.pop(int(fields[2]), None)
+
+    def _send_quote(self, session: _Session, req_id: int, con_id: int):
+        bid, ask, last = self._quote(con_id)
+        self._send(session, 1, 6, req_id, BID, bid, 10, 0)
+        self._send(session, 1, 6, req_id, ASK, ask, 10, 0)
+        self._send(session, 1, 6, req_id, LAST, last, 1, 0)
+
+    def _req_open_orders(self, session: _Session, fields: List[str]):
+        self._send(session, 53, 1)
+
+    def _req_completed_orders(self, session: _Session, fields: List[str]):
+        self._send(session, 102)
+
+    def _req_positions(self, session: _Session, fields: List[str]):
+        session.positions = True
+        for con_id in self.positions:
+            self._send_position(session, con_id)
+        self._send(session, 62, 1)
+
+    def _cancel_positions(self, session: _Session, fields: List[str]):
+        session.positions = False
+
+    def _req_account_updates(self, session: _Session, fields: List[str]):
+        session.account_updates = fields[2] == '1'
+        if not session.account_updates:
+            return
+        for tag, value in self.account_values().items():
+            self._send(session, 6, 2, tag, value, '' if tag in ('AccountCode', 'AccountType') else 'USD', self.account)
+        for con_id in self.positions:
+            self._send_portfolio(session, con_id)
+        self._send(session, 8, 1, datetime.now().strftime('%H:%M'))
+        self._send(session, 54, 1, self.account)
+
+    def _req_account_updates_multi(self, session: _Session, fields: List[str]):
+        req_id = int(fields[2])
+        for tag, value in self.account_values().items():
+            self._send(session, 73, 1, req_id, self.account, '', tag, value, 'USD')
+        self._send(session, 74, 1, req_id)
+
+    def _req_account_summary(self, session: _Session, fields: List[str]):
+        req_id = int(fields[2])
+        tags = set(fields[4].split(',')) if len(fields) > 4 and fields[4] else None
+        for tag, value in self.account_values().items():
+            if tags is None or tag in tags:
+                self._send(session, 63, 1, req_id, self.account, tag, value, 'USD')
+        self._send(session, 64, 1, req_id)
+
+    def _req_executions(self, session: _Session, fields: List[str]):
+        req_id = int(fields[2])
+        for execution in self.executions:
+            self._send(session, 11, req_id, *execution)
+        self._send(session, 55, 1, req_id)
+
+    def _req_pnl(self, session: _Session, fields: List[str]):
+        session.pnl[int(fields[1])] = fields[2]
+
+    def _cancel_pnl(self, session: _Session, fields: List[str]):
+        session.pnl.pop(int(fields[1]), None)
+
+    def _req_pnl_single(self, session: _Session, fields: List[str]):
+        session.pnl_single[int(fields[1])] = int(fields[4] or 0)
+
+    def _cancel_pnl_single(self, session: _Session, fields: List[str]):
+        session.pnl_single.pop(int(fields[1]), None)
+
+    # Orders
+
+    def _place_order(self, session: _Session, fields: List[str]):
+        order_id = int(fields[1])
+        contract = self._parse_contract(fields[2:14])
+        action, quantity, order_type = fields[16], float(fields[17] or 0), fields[18]
+        limit_price = float(fields[19]) if fields[19] else None
+        self.next_order_id = max(self.next_order_id, order_id + 1)
+        self.stats['orders'] += 1
+
+        if not contract.conId and not self._is_valid(contract) or contract.conId and contract.conId not in self.contracts:
+            self.stats['rejects'] += 1
+            self._error(session, order_id, 200, "No security definition has been found for the request")
+            return
+        if quantity <= 0 or action not in ('BUY', 'SELL'):
+            self.stats['rejects'] += 1
+            self._error(session, order_id, 201, "Order rejected - reason: invalid order")
+            return
+        if self.reject_rate and random.random() < self.reject_rate:
+            self.stats['rejects'] += 1
+            self._error(session, order_id, 201, "Order rejected - reason: simulated rejection")
+            return
+
+        key = (session.client_id, order_id)
+        perm_id = self.next_perm_id
+        self.next_perm_id += 1
+        loop = asyncio.get_running_loop()
+        state = {
+            'session': session,
+            'order_id': order_id,
+            'perm_id': perm_id,
+            'con_id': self._register(contract),
+            'action': action,
+            'quantity': quantity,
+            'order_type': order_type,
+            'limit_price': limit_price
+        }
+        state['ack'] = loop.call_later(self.ack_delay, self._order_status, state, 'Submitted', 0, quantity, 0.0)
+        state['fill'] = loop.call_later(self.fill_delay + random.uniform(0, self.fill_jitter), self._fill, key)
+        self.open_orders[key] = state
+
+    def _cancel_order(self, session: _Session, fields: List[str]):
+        state = self.open_orders.pop((session.client_id, int(fields[2])), None)
+        if not state:
+            self._error(session, int(fields[2]), 135, "Can't find order with id")
+            return
+        state['ack'].cancel()
+        state['fill'].cancel()
+        self.stats['cancels'] += 1
+        self._order_status(state, 'Cancelled', 0, state['quantity'], 0.0)
+
+    def _global_cancel(self, session: _Session, fields: List[str]):
+        for key in list(self.open_orders):
+            self._cancel_order(self.open_orders[key]['session'], [CANCEL_ORDER, 1, key[1]])
+
+    def _order_status(self, state: Dict[str, Any], status: str, filled: float, remaining: float, price: float):
+        session = state['session']
+        self._send(
+            session, 3, state['order_id'], status, filled, remaining, price,
+            state['perm_id'], 0, price, session.client_id, '', 0
+        )
+
+    def _fill(self, key: tuple):
+        state = self.open_orders.pop(key, None)
+        if not state:
+            return
+        con_id = state['con_id']
+        contract = self.contracts[con_id]
+        bid, ask, _ = self._quote(con_id)
+        if state['order_type'] == 'LMT' and state['limit_price']:
+            price = state['limit_price']
+        else:
+            price = ask if state['action'] == 'BUY' else bid
+        quantity = state['quantity']
+        signed = quantity if state['action'] == 'BUY' else -quantity
+        commission = round(self.commission * quantity, 2)
+
+        realized = 0.0
+        if not self.static_positions:
+            held, avg_cost, total_realized = self.positions.get(con_id, [0, 0.0, 0.0])
+            total, avg_cost, realized = apply_fill(held, avg_cost, signed, price * self._multiplier(con_id))
+            self.positions[con_id] = [total, avg_cost, total_realized + realized]
+        self.cash += realized - commission
+        self.realized += realized - commission
+        self.stats['fills'] += 1
+
+        session = state['session']
+        exec_id = f"0000e0d5.{self.next_exec_id:08d}.01.01"
+        self.next_exec_id += 1
+        execution = (
+            state['order_id'], con_id, contract.symbol, contract.secType,
+            contract.lastTradeDateOrContractMonth, contract.strike, contract.right,
+            contract.multiplier, contract.exchange, contract.currency, contract.localSymbol,
+            contract.tradingClass, exec_id, int(time.time()), self.account, contract.exchange,
+            'BOT' if state['action'] == 'BUY' else 'SLD', quantity, price, state['perm_id'],
+            session.client_id, 0, quantity, price, '', '', '', '', 1
+        )
+        self.executions.append(execution)
+
+        self._send(session, 11, -1, *execution)
+        self._order_status(state, 'Filled', quantity, 0, price)
+        self._send(session, 59, 1, exec_id, commission, 'USD', realized if realized else '', '', '')
+
+        if not self.static_positions:
+            self._broadcast_position(con_id)
+
+    # Updates pushed to subscribed sessions
+
+    def _send_position(self, session: _Session, con_id: int):
+        c = self.contracts[con_id]
+        quantity, avg_cost, _ = self.positions[con_id]
+        self._send(
+            session, 61, 3, self.account, con_id, c.symbol, c.secType,
+            c.lastTradeDateOrContractMonth, c.strike, c.right, c.multiplier, c.exchange,
+            c.currency, c.localSymbol, c.tradingClass, quantity, avg_cost
+        )
+
+    def _send_portfolio(self, session: _Session, con_id: int):
+        c = self.contracts[con_id]
+        quantity, avg_cost, realized = self.positions[con_id]
+        self._send(
+            session, 7, 8, con_id, c.symbol, c.secType, c.lastTradeDateOrContractMonth,
+            c.strike, c.right, c.multiplier, c.primaryExchange, c.currency, c.localSymbol,
+            c.tradingClass, quantity, self._price(con_id), round(self._market_value(con_id), 2),
+            avg_cost, round(self._unrealized(con_id), 2), round(realized, 2), self.account
+        )
+
+    def _broadcast_position(self, con_id: int):
+        values = None
+        for session in self.sessions:
+            if session.positions:
+                self._send_position(session, con_id)
+            if session.account_updates:
+                self._send_portfolio(session, con_id)
+                values = values or self.account_values()
+                for tag in ('NetLiquidation', 'TotalCashValue', 'BuyingPower', 'GrossPositionValue'):
+                    self._send(session, 6, 2, tag, values[tag], 'USD', self.account)
+
+    async def _tick_loop(self):
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            self.step += 1
+            subscribed = {con_id for session in self.sessions for con_id in session.market_data.values()}
+            for con_id in subscribed:
+                self.prices[con_id] = self.price_path(self.contracts[con_id], self.step, self._price(con_id))
+            for session in self.sessions:
+                for req_id, con_id in session.market_data.items():
+                    self._send_quote(session, req_id, con_id)
+
+    async def _pnl_loop(self):
+        while True:
+            await asyncio.sleep(self.pnl_interval)
+            unrealized = sum(self._unrealized(con_id) for con_id in self.positions)
+            for session in self.sessions:
+                for req_id in session.pnl:
+                    daily = self.cash + unrealized - self.start_equity
+                    self._send(session, 94, req_id, round(daily, 2), round(unrealized, 2), round(self.realized, 2))
+                for req_id, con_id in session.pnl_single.items():
+                    if con_id not in self.positions:
+                        continue
+                    quantity, _, realized = self.positions[con_id]
+                    position_unrealized = self._unrealized(con_id)
+                    self._send(
+                        session, 95, req_id, quantity, round(position_unrealized + realized, 2),
+                        round(position_unrealized, 2), round(realized, 2), round(self._market_value(con_id), 2)
+                    )
+
+    _handlers = {
+        START_API: _start_api,
+        REQ_IDS: _req_ids,
+        REQ_CURRENT_TIME: _req_current_time,
+        REQ_CONTRACT_DETAILS: _req_contract_details,
+        REQ_MKT_DATA: _req_mkt_data,
+        CANCEL_MKT_DATA: _cancel_mkt_data,
+        PLACE_ORDER: _place_order,
+        CANCEL_ORDER: _cancel_order,
+        REQ_GLOBAL_CANCEL: _global_cancel,
+        REQ_OPEN_ORDERS: _req_open_orders,
+        REQ_ALL_OPEN_ORDERS: _req_open_orders,
+        REQ_COMPLETED_ORDERS: _req_completed_orders,
+        REQ_POSITIONS: _req_positions,
+        CANCEL_POSITIONS: _cancel_positions,
+        REQ_ACCOUNT_UPDATES: _req_account_updates,
+        REQ_ACCOUNT_UPDATES_MULTI: _req_account_updates_multi,
+        REQ_ACCOUNT_SUMMARY: _req_account_summary,
+        CANCEL_ACCOUNT_SUMMARY: lambda self, session, fields: None,
+        REQ_EXECUTIONS: _req_executions,
+        REQ_PNL: _req_pnl,
+        CANCEL_PNL: _cancel_pnl,
+        REQ_PNL_SINGLE: _req_pnl_single,
+        CANCEL_PNL_SINGLE: _cancel_pnl_single
+    }
+
+async def serve(args):
+    gateway = FakeIBGateway(
+        host=args.host,
+        port=args.port,
+        account=args.account,
+        fill_delay=args.fill_delay,
+        fill_jitter=args.fill_jitter,
+        ack_delay=args.ack_delay,
+        reject_rate=args.reject_rate,
+        tick_interval=args.tick_interval,
+        price_path=price_file_path(args.price_file) if args.price_file else random_walk(args.volatility),
+        commission=args.commission
+    )
+    await gateway.start()
+    print(f"🚀 Fake IB gateway on {args.host}:{gateway.port} (account {args.account})")
+
+    started = time.time()
+    last_drop = started
+    try:
+        while True:
+            await asyncio.sleep(args.stats_every)
+            now = time.time()
+            print(f"📊 {int(now - started)}s clients={len(gateway.sessions)} {gateway.stats}")
+            if args.drop_every and now - last_drop >= args.drop_every:
+                print("🔌 Dropping all client connections")
+                gateway.drop_connections()
+                last_drop = now
+    finally:
+        await gateway.stop()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fake IB gateway speaking the TWS API protocol")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4002)
+    parser.add_argument("--account", default="DU0000000")
+    parser.add_argument("--fill-delay", type=float, default=0.05, help="Seconds from order to fill")
+    parser.add_argument("--fill-jitter", type=float, default=0.0, help="Random extra fill delay (s)")
+    parser.add_argument("--ack-delay", type=float, default=0.002, help="Seconds from order to Submitted")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="Probability an order is rejected")
+    parser.add_argument("--tick-interval", type=float, default=0.25, help="Seconds between quote updates")
+    parser.add_argument("--volatility", type=float, default=1.0, help="Max ticks moved per step in the random walk")
+    parser.add_argument("--price-file", help="CSV of symbol,price rows replayed as the price path")
+    parser.add_argument("--commission", type=float, default=0.85, help="Commission per contract or share")
+    parser.add_argument("--stats-every", type=float, default=10.0, help="Seconds between stats lines")
+    parser.add_argument("--drop-every", type=float, default=0.0, help="Drop all connections every N seconds (0 disables)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -6,8 +6,10 @@ This is the most reliable method for getting real-time prices
 
 import asyncio
 import logging
-from ib_insync import IB, Contract
+from typing import List
+from ib_insync import IB, Contract, Ticker
 from datetime import datetime
+from quote_waiter import wait_for_quote
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,12 +18,16 @@ logger = logging.getLogger(__name__)
 class BidAskPriceGetter:
     """Direct IBKR connection for getting bid/ask prices"""
     
-    def __init__(self):
-        self.ib = IB()
-        self.connected = False
+    def __init__(self, ib: IB = None):
+        # An already connected IB (e.g. the connection hub's) is shared, not disconnected
+        self.owns_connection = ib is None
+        self.ib = ib or IB()
+        self.connected = self.ib.isConnected()
     
     async def connect(self, host='127.0.0.1', port=7497, client_id=1):
         """Connect to IBKR TWS/Gateway"""
+        if self.connected:
+            return
         try:
             await self.ib.connectAsync(host, port, clientId=client_id)
             self.connected = True
@@ -32,83 +38,91 @@ class BidAskPriceGetter:
     
     async def disconnect(self):
         """Disconnect from IBKR"""
-        if self.connected:
+        if self.connected and self.owns_connection:
             self.ib.disconnect()
             self.connected = False
             logger.info("Disconnected from IBKR")
     
-    async def get_es_prices(self, month='20251219'):
+    async def get_es_prices(self, month='20251219', timeout=None):
         """Get bid/ask prices for ES contract"""
-        try:
-            if not self.connected:
-                raise Exception("Not connected to IBKR")
-            
-            # Create ES contract
-            contract = Contract(
-                secType='FUT',
-                symbol='ES',
-                lastTradeDateOrContractMonth=month,
-                exchange='CME',
-                currency='USD'
-            )
-            
-            logger.info(f"Getting prices for {contract.symbol} {contract.lastTradeDateOrContractMonth}")
-            
-            # Request market data
-            ticker = self.ib.reqMktData(contract, '', False, False)
-            
-            # Wait for data (market data can take a moment)
-            logger.info("Waiting for market data...")
-            await asyncio.sleep(2)
-            
-            # Get current prices
-            prices = {
-                'symbol': contract.symbol,
-                'month': contract.lastTradeDateOrContractMonth,
-                'bid': ticker.bid if ticker.bid > 0 else None,
-                'ask': ticker.ask if ticker.ask > 0 else None,
-                'last': ticker.last if ticker.last > 0 else None,
-                'high': ticker.high if ticker.high > 0 else None,
-                'low': ticker.low if ticker.low > 0 else None,
-                'volume': ticker.volume if ticker.volume > 0 else None,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            # Calculate spread
-            if prices['ask'] and prices['bid']:
-                prices['spread'] = prices['ask'] - prices['bid']
-                prices['spread_points'] = prices['spread'] * 4  # ES is 0.25 point increments
-            
-            # Cancel market data request
-            self.ib.cancelMktData(contract)
-            
-            return prices
-            
-        except Exception as e:
-            logger.error(f"Error getting prices: {e}")
-            return None
+        prices = await self.get_snapshot([month], timeout)
+        return prices[0] if prices else None
     
-    async def get_multiple_contracts(self, months=['20241219', '20250321', '20250620', '20250919', '20251219']):
-        """Get prices for multiple ES contracts"""
+    async def get_snapshot(self, months: List[str], timeout=None):
+        """
+        Get bid/ask prices for several ES contracts at once
+        
+        Market data for every month is requested up front. Each contract is
+        done as soon as it has both bid and ask or its timeout passes, so a
+        whole curve takes about as long as a single quote.
+        
+        Args:
+            months: Contract months (e.g., ['20251219', '20260320'])
+            timeout: Seconds to wait for each contract's quote, defaults to Config.QUOTE_READY_TIMEOUT
+        
+        Returns:
+            list: One price dict per month, bid/ask None if no quote arrived in time
+        """
         try:
             if not self.connected:
                 raise Exception("Not connected to IBKR")
             
-            all_prices = []
+            # Create ES contracts
+            contracts = [
+                Contract(
+                    secType='FUT',
+                    symbol='ES',
+                    lastTradeDateOrContractMonth=month,
+                    exchange='CME',
+                    currency='USD'
+                )
+                for month in months
+            ]
             
-            for month in months:
-                logger.info(f"Getting prices for ES {month}...")
-                prices = await self.get_es_prices(month)
-                if prices:
-                    all_prices.append(prices)
-                    await asyncio.sleep(0.5)  # Small delay between requests
+            logger.info(f"Getting prices for ES {', '.join(months)}")
             
-            return all_prices
+            # Request market data for all contracts, then wait for them together
+            tickers = [self.ib.reqMktData(contract, '', False, False) for contract in contracts]
+            try:
+                await asyncio.gather(*(wait_for_quote(ticker, timeout=timeout) for ticker in tickers))
+            finally:
+                # Cancel market data requests
+                for contract in contracts:
+                    self.ib.cancelMktData(contract)
             
+            return [self._prices(contract, ticker) for contract, ticker in zip(contracts, tickers)]
+        
         except Exception as e:
-            logger.error(f"Error getting multiple contracts: {e}")
+            logger.error(f"Error getting prices: {e}")
             return []
     
+    def _prices(self, contract: Contract, ticker: Ticker):
+        """Price dict of a ticker"""
+        prices = {
+            'symbol': contract.symbol,
+            'month': contract.lastTradeDateOrContractMonth,
+            'bid': ticker.bid if ticker.bid > 0 else None,
+            'ask': ticker.ask if ticker.ask > 0 else None,
+            'last': ticker.last if ticker.last > 0 else None,
+            'high': ticker.high if ticker.high > 0 else None,
+            'low': ticker.low if ticker.low > 0 else None,
+            'volume': ticker.volume if ticker.volume > 0 else None,
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        # Calculate spread
+        if prices['ask'] and prices['bid']:
+            prices['spread'] = prices['ask'] - prices['bid']
+            prices['spread_points'] = prices['spread'] * 4  # ES is 0.25 point increments
+        
+        return prices
+    
+    async def get_multiple_contracts(self, months=['20241219', '20250321', '20250620', '20250919', '20251219'],
+                                     timeout=None):
+        """Get prices for multiple ES contracts in one snapshot"""
+        all_prices = await self.get_snapshot(months, timeout)
+        return [prices for prices in all_prices if prices['bid'] or prices['ask'] or prices['last']]
+    
     def print_prices(self, prices):
         """Print prices in a nice format"""
         if not prices:
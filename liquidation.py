@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Liquidation Module
+Submits all closing orders at once and awaits their fills concurrently
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List
+from ib_insync import IB, Contract, MarketOrder
+from order_waiter import wait_for_trade, describe_trade
+
+logger = logging.getLogger(__name__)
+
+class LiquidationEngine:
+    """Concurrent position liquidation with per-order timeouts"""
+
+    def __init__(self, ib: IB, timeout: float = None):
+        self.ib = ib
+        self.timeout = timeout
+        self.legs: List[Dict[str, Any]] = []
+
+    def add(self, contract: Contract, quantity: int, **details):
+        """
+        Add a position to close
+
+        Args:
+            contract: Contract to trade
+            quantity: Signed position size; longs are sold, shorts bought to close
+            details: Extra fields echoed into the result (symbol, strike, ...)
+        """
+        if quantity == 0:
+            return
+        self.legs.append({
+            "contract": contract,
+            "action": "SELL" if quantity > 0 else "BUY",
+            "quantity": int(abs(quantity)),
+            "details": details
+        })
+
+    def _result(self, leg: Dict[str, Any], **fields) -> Dict[str, Any]:
+        result = {
+            "action": "SELL" if leg["action"] == "SELL" else "BUY_TO_CLOSE",
+            "symbol": leg["contract"].symbol,
+            **leg["details"],
+            "quantity": leg["quantity"]
+        }
+        result.update(fields)
+        return result
+
+    async def run(self) -> Dict[str, Any]:
+        """Place every closing market order, then await all fills together"""
+        started = time.perf_counter()
+        results = [None] * len(self.legs)
+        pending = []
+
+        # Submit everything before waiting on anything
+        for i, leg in enumerate(self.legs):
+            try:
+                order = MarketOrder(leg["action"], leg["quantity"])
+                trade = self.ib.placeOrder(leg["contract"], order)
+                pending.append((i, trade))
+                logger.info(f"Liquidation: {leg['action']} {leg['quantity']} {leg['contract'].symbol} submitted (order {trade.order.orderId})")
+            except Exception as e:
+                logger.error(f"Liquidation: error submitting {leg['action']} {leg['contract'].symbol}: {e}")
+                results[i] = self._result(leg, success=False, error=str(e))
+
+        done = await asyncio.gather(*(wait_for_trade(trade, self.timeout) for _, trade in pending))
+
+        total_closed = 0
+        for (i, trade), is_done in zip(pending, done):
+            leg = self.legs[i]
+            status = trade.orderStatus
+            # Partial fills are closed too, whatever happens to the rest of the order
+            total_closed += status.filled
+            if is_done and status.status == 'Filled':
+                results[i] = self._result(
+                    leg,
+                    order_id=trade.order.orderId,
+                    filled=status.filled,
+                    price=status.avgFillPrice,
+                    success=True
+                )
+            elif not is_done:
+                # The closing order is still working at IB and may yet fill
+                logger.warning(f"Liquidation: {leg['contract'].symbol} still working: {describe_trade(trade)}")
+                results[i] = self._result(
+                    leg,
+                    order_id=trade.order.orderId,
+                    filled=status.filled,
+                    price=status.avgFillPrice,
+                    status=status.status,
+                    message=describe_trade(trade),
+                    success=False
+                )
+            else:
+                logger.error(f"Liquidation: failed to close {leg['contract'].symbol}: {status.status}")
+                results[i] = self._result(leg, order_id=trade.order.orderId, filled=status.filled,
+                                          success=False, error=status.status)
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"Liquidation complete: {total_closed} closed across {len(self.legs)} positions in {elapsed:.3f}s")
+
+        return {
+            "closed_positions": total_closed,
+            "results": results,
+            "elapsed": round(elapsed, 3)
+        }
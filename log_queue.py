@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Log Queue Module
+Routes log records through a queue to a background writer thread so no
+file or console I/O happens on the asyncio event loop
+"""
+
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import List, Optional
+from config import Config
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Listener started by setup_logging, None until then
+listener: Optional['BatchQueueListener'] = None
+
+class BatchQueueListener(QueueListener):
+    """
+    QueueListener that drains records in batches and writes each batch to a
+    stream handler with a single flush, rotating the file as needed
+    """
+
+    def __init__(self, log_queue: queue.Queue, *handlers: logging.Handler, batch_size: int = 100):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = max(1, batch_size)
+
+    def _monitor(self):
+        stopping = False
+        while not stopping:
+            record = self.queue.get()
+            if record is self._sentinel:
+                break
+
+            # Take whatever else is already queued, up to the batch size
+            batch = [record]
+            while len(batch) < self.batch_size:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is self._sentinel:
+                    stopping = True
+                    break
+                batch.append(record)
+
+            for handler in self.handlers:
+                self._write(handler, batch)
+
+    def _write(self, handler: logging.Handler, batch: List[logging.LogRecord]):
+        records = [r for r in batch if r.levelno >= handler.level and handler.filter(r)]
+        if not records:
+            return
+        if not isinstance(handler, logging.StreamHandler):
+            for record in records:
+                handler.handle(record)
+            return
+
+        handler.acquire()
+        try:
+            for record in records:
+                try:
+                    if isinstance(handler, RotatingFileHandler) and handler.shouldRollover(record):
+                        handler.doRollover()
+                    handler.stream.write(handler.format(record) + handler.terminator)
+                except Exception:
+                    handler.handleError(record)
+            handler.flush()
+        finally:
+            handler.release()
+
+    def stop(self):
+        """Write out everything still queued and stop the writer thread"""
+        if self._thread:
+            super().stop()
+
+def setup_logging(level: str = None, log_file: str = None) -> BatchQueueListener:
+    """
+    Install a QueueHandler on the root logger and start the background writer
+
+    Args:
+        level: Log level name, defaults to Config.LOG_LEVEL
+        log_file: Log file path, defaults to Config.LOG_FILE
+
+    Returns:
+        BatchQueueListener: The running listener (also stopped at exit)
+    """
+    global listener
+    if listener:
+        return listener
+
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    file_handler = RotatingFileHandler(
+        log_file or Config.LOG_FILE,
+        maxBytes=Config.LOG_MAX_BYTES,
+        backupCount=Config.LOG_BACKUP_COUNT,
+        encoding='utf-8'
+    )
+    console_handler = logging.StreamHandler(sys.stderr)
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, level or Config.LOG_LEVEL))
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+
+    listener = BatchQueueListener(log_queue, file_handler, console_handler, batch_size=Config.LOG_BATCH_SIZE)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
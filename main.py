@@ -1,5 +1,5 @@
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse
 import asyncio
 import logging
 from datetime import datetime
@@ -8,59 +8,157 @@ from dotenv import load_dotenv
 from trading_bot import TradingBot
 from spx_option_trader import SPXOptionTrader
 from spy_stock_trader import SPYStockTrader
+from connection_hub import ConnectionHub
+from startup import StartupOrchestrator
+from alert_queue import AlertQueue, EXIT_LANE, ENTRY_LANE
+from alert_dedup import AlertDeduplicator
+from execution_journal import get_journal
+from state_snapshot import StateSnapshot
+from reconnect import Reconnector
+from metrics import registry, MetricsCollector
+from pydantic import ValidationError
 from models import AlertRequest
-from config import Config
+from log_queue import setup_logging
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, Config.LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(Config.LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging, file and console writes happen on a background thread
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="ES DEC 2025 CME Trading Bot", version="1.0.0")
 
+# Shared IBKR connection
+hub = None
+
 # Initialize trading bots
 trading_bot = None
 spx_option_trader = None
 spy_stock_trader = None
 
+# Concurrent startup of the connection and traders
+orchestrator = StartupOrchestrator()
+startup_task = None
+
+# Periodic checkpoint of working state, restored on restart
+recovery = None
+reconnector = None
+metrics_collector = None
+
+# Structured record of alerts, orders and fills, opened on startup
+journal = None
+
+# Webhook alerts are acknowledged immediately and executed by workers
+alert_queue = AlertQueue()
+alert_dedup = AlertDeduplicator()
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the trading bots on startup"""
-    global trading_bot, spx_option_trader, spy_stock_trader
+    global hub, trading_bot, spx_option_trader, spy_stock_trader, startup_task, recovery, reconnector, metrics_collector, journal
     try:
-        # Initialize ES futures trading bot
-        trading_bot = TradingBot()
-        await trading_bot.connect()
-        logger.info("ES futures trading bot initialized and connected to IBKR")
-        
-        # Initialize SPX option trader
-        spx_option_trader = SPXOptionTrader()
-        await spx_option_trader.connect()
-        logger.info("SPX option trader initialized and connected to IBKR")
-        
-        # Initialize SPY stock trader
-        spy_stock_trader = SPYStockTrader()
-        await spy_stock_trader.connect()
-        logger.info("SPY stock trader initialized and connected to IBKR")
+        journal = get_journal()
+        alert_queue.journal = journal
+        
+        # All traders share one IBKR connection
+        if hub is None:
+            hub = ConnectionHub()
+        reconnector = Reconnector(hub, alert_queue)
+        metrics_collector = MetricsCollector(hub.ib)
+        register_metrics()
+        trading_bot = TradingBot(hub=hub)
+        spx_option_trader = SPXOptionTrader(hub=hub)
+        spy_stock_trader = SPYStockTrader(hub=hub)
+        
+        # Connect and qualify all components concurrently
+        orchestrator.add("ibkr_connection", connect_and_reconcile)
+        orchestrator.add("es_futures", trading_bot.connect)
+        orchestrator.add("spx_options", spx_option_trader.connect)
+        orchestrator.add("spy_stock", spy_stock_trader.connect)
+        
+        # Resume from the last checkpoint: alerts are accepted and held until
+        # the snapshot is reconciled and the traders have connected
+        recovery = StateSnapshot(hub, alert_queue, journal)
+        snapshot = recovery.load()
+        if snapshot:
+            recovery.restore(snapshot)
+            alert_queue.hold()
+        
+        # Run in the background so the webhook server accepts alerts for
+        # instruments that are ready while the others finish
+        startup_task = asyncio.create_task(run_startup())
+        logger.info("Trading bot startup started in the background")
+        
+        # Start the alert workers
+        alert_queue.start()
+        metrics_collector.start()
         
     except Exception as e:
         logger.error(f"Failed to initialize trading bots: {e}")
         raise
 
+async def connect_and_reconcile():
+    """Connect the shared connection and reconcile a restored snapshot"""
+    await hub.connect()
+    recovery.reconcile()
+
+async def run_startup():
+    """Connect everything, release held alerts and start checkpointing"""
+    try:
+        await orchestrator.run()
+    finally:
+        # Held alerts need the traders' qualified contracts. They also run if
+        # a component failed to start, so they fail visibly
+        alert_queue.release()
+    recovery.start()
+
+def register_metrics():
+    """Export queue, connection and market data state read at scrape time"""
+    registry.gauge_callback("ib_connected", "1 while the shared IBKR connection is up",
+                            lambda: int(hub.is_connected()))
+    registry.counter_callback("ib_disconnects_total", "Unexpected IBKR disconnects",
+                              lambda: reconnector.disconnects)
+    registry.counter_callback("ib_reconnect_attempts_total", "IBKR reconnect attempts",
+                              lambda: reconnector.attempts)
+    registry.gauge_callback("ib_last_time_to_recover_seconds", "Duration of the last reconnect",
+                            lambda: reconnector.last_recovery_time)
+    registry.gauge_callback("market_data_age_seconds", "Seconds since each subscription last updated",
+                            lambda: {(symbol,): age for symbol, age in hub.market_data.ages().items()},
+                            ("instrument",))
+    registry.gauge_callback("alert_queue_depth", "Alerts waiting per lane",
+                            lambda: {(lane,): len(queue) for lane, queue in alert_queue.lanes.items()}, ("lane",))
+    registry.gauge_callback("alert_queue_running", "Alerts running per lane",
+                            lambda: {(lane,): count for lane, count in alert_queue.running.items()}, ("lane",))
+    registry.gauge_callback("alert_queue_held", "1 while alerts are held for a reconnect or recovery",
+                            lambda: int(alert_queue.held))
+    registry.counter_callback("alerts_processed_total", "Alerts processed", lambda: alert_queue.processed)
+    registry.counter_callback("alerts_failed_total", "Alerts failed", lambda: alert_queue.failed)
+    registry.counter_callback("alerts_expired_total", "Held alerts expired", lambda: alert_queue.expired)
+    registry.gauge_callback("journal_queue_depth", "Execution journal events waiting to be written",
+                            lambda: journal.metrics()["queued"])
+    registry.counter_callback("pnl_updates_dropped_total", "PnL updates dropped for slow WebSocket clients",
+                              lambda: hub.pnl_service.dropped)
+    registry.counter_callback("tick_journal_ticks_written_total", "Ticks written to the tick journal",
+                              lambda: hub.tick_journal.written if hub.tick_journal else None)
+    registry.counter_callback("tick_journal_ticks_dropped_total", "Ticks overwritten before reaching the tick journal",
+                              lambda: hub.tick_journal.dropped if hub.tick_journal else None)
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up on shutdown"""
-    global trading_bot, spx_option_trader, spy_stock_trader
+    if startup_task and not startup_task.done():
+        startup_task.cancel()
+    if reconnector:
+        await reconnector.stop()
+    if metrics_collector:
+        await metrics_collector.stop()
+    # Let accepted alerts finish so a reload does not drop them
+    await alert_queue.drain()
+    if recovery:
+        await recovery.stop()
+    await alert_queue.stop()
     if trading_bot:
         await trading_bot.disconnect()
         logger.info("ES futures trading bot disconnected")
@@ -70,6 +168,9 @@ async def shutdown_event():
     if spy_stock_trader:
         await spy_stock_trader.disconnect()
         logger.info("SPY stock trader disconnected")
+    if hub:
+        await hub.disconnect()
+        logger.info("Shared IBKR connection closed")
 
 @app.get("/")
 async def root():
@@ -80,7 +181,7 @@ async def root():
 async def get_status():
     """Get trading bot status"""
     if not trading_bot:
-        return {"status": "not_initialized"}
+        return {"status": "not_initialized", "startup": orchestrator.report()}
 
     # Get contract information
     contracts_info = []
@@ -98,12 +199,48 @@ async def get_status():
         "contracts": contracts_info,
         "primary_contract": contracts_info[0] if contracts_info else None,
         "positions": await trading_bot.get_positions(),
-        "account_info": await trading_bot.get_account_info()
+        "account_info": await trading_bot.get_account_info(),
+        "startup": orchestrator.report(),
+        "recovery": recovery.report() if recovery else None,
+        "connection": reconnector.metrics() if reconnector else None
     }
 
+@app.get("/pnl")
+async def get_pnl():
+    """Get the latest streamed account and position PnL"""
+    if not hub:
+        return {"status": "not_initialized"}
+    return hub.pnl_service.snapshot()
+
+@app.websocket("/ws/pnl")
+async def pnl_feed(websocket: WebSocket):
+    """Push a PnL snapshot followed by every account and position update"""
+    await websocket.accept()
+    if not hub:
+        await websocket.close(code=1013)
+        return
+
+    queue = hub.pnl_service.subscribe()
+
+    async def forward():
+        await websocket.send_json(hub.pnl_service.snapshot())
+        while True:
+            await websocket.send_json(await queue.get())
+
+    sender = asyncio.create_task(forward())
+    try:
+        # Client messages are ignored, reading only detects the disconnect
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        hub.pnl_service.unsubscribe(queue)
+
 @app.get("/bid-ask")
-async def get_bid_ask():
-    """Get current bid/ask prices"""
+async def get_bid_ask(window: float = None):
+    """Get current bid/ask prices, with spread percentiles over the last `window` seconds if given"""
     try:
         if not trading_bot:
             raise HTTPException(status_code=500, detail="Trading bot not initialized")
@@ -134,6 +271,9 @@ async def get_bid_ask():
             "ask": market_data['ask'],
             "last": market_data['last'],
             "spread": spread,
+            "spread_stats": trading_bot.market_data.spread_stats(contract, window) if window else None,
+            "age": market_data['age'],
+            "as_of": market_data['as_of'],
             "timestamp": datetime.now().isoformat()
         }
         
@@ -141,24 +281,118 @@ async def get_bid_ask():
         logger.error(f"Error getting bid/ask: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/ML-2-3-4/sell")
+@app.get("/bars")
+async def get_bars(symbol: str = "ES", interval: int = 60, count: int = 100):
+    """Get the most recent finished OHLCV bars of a streamed contract, plus the bar in progress"""
+    if not hub:
+        raise HTTPException(status_code=500, detail="Connection hub not initialized")
+    if interval not in hub.bars.intervals:
+        raise HTTPException(status_code=400, detail=f"Interval must be one of {hub.bars.intervals}")
+
+    symbol = symbol.upper()
+    bars = hub.bars.bars(symbol, interval, count)
+    return {
+        "symbol": symbol,
+        "interval": interval,
+        "count": len(bars),
+        "bars": bars,
+        "current": hub.bars.current(symbol, interval),
+        "timestamp": datetime.now().isoformat()
+    }
+
+# Alert ingestion helpers
+def require_connected(trader, name: str):
+    """Validate that a trader is initialized and connected before queueing an alert"""
+    if not trader:
+        logger.error(f"{name} not initialized")
+        raise HTTPException(status_code=500, detail=f"{name} not initialized")
+    
+    # While recovering from a snapshot alerts are queued until the connection is back
+    if not trader.is_connected() and not alert_queue.held:
+        logger.error(f"{name} not connected to IBKR")
+        raise HTTPException(status_code=500, detail=f"{name} not connected to IBKR")
+
+async def parse_alert(request: Request) -> AlertRequest:
+    """Parse a TradingView alert body (JSON or plain text)"""
+    body = await request.body()
+    if not body:
+        alert = AlertRequest()
+    elif request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            alert = AlertRequest.model_validate_json(body)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid alert payload: {e}")
+    else:
+        alert = AlertRequest(message=body.decode("utf-8", errors="replace"))
+    
+    if not alert.alert_id:
+        alert.alert_id = request.headers.get("x-alert-id")
+    return alert
+
+def enqueue_alert(endpoint: str, alert: AlertRequest, process, lane: str = ENTRY_LANE) -> JSONResponse:
+    """Queue an alert on its priority lane and acknowledge it right away"""
+    existing = alert_dedup.check(endpoint, alert)
+    if existing:
+        alert_id, reason = existing
+        record = alert_queue.get(alert_id)
+        if record:
+            record.merged_alerts += 1
+        journal.record(f"alert_{reason}", alert_id, symbol=alert.symbol, endpoint=endpoint)
+        return JSONResponse(status_code=202, content={
+            "message": f"Alert {reason}, no new order placed",
+            "alert_id": alert_id,
+            "lane": lane,
+            "status": record.status if record else "expired",
+            reason: True,
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    record = alert_queue.submit(endpoint, lambda: process(alert), alert.dict(), lane=lane)
+    alert_dedup.remember(endpoint, alert, record.alert_id)
+    journal.record("alert_received", record.alert_id, symbol=alert.symbol, endpoint=endpoint,
+                   lane=record.lane, payload=record.payload)
+    
+    return JSONResponse(status_code=202, content={
+        "message": "Alert accepted",
+        "alert_id": record.alert_id,
+        "lane": record.lane,
+        "status": record.status,
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.get("/alerts/metrics")
+async def get_alert_metrics():
+    """Get alert queue depth, wait time, processing time and dedup counts"""
+    return {**alert_queue.metrics(), "dedup": alert_dedup.metrics(), "journal": journal.metrics()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/alerts/{alert_id}")
+async def get_alert(alert_id: str):
+    """Get the execution status of a queued alert"""
+    record = alert_queue.get(alert_id)
+    if not record:
+        raise HTTPException(status_code=404, detail=f"Alert {alert_id} not found")
+    return record
+
+@app.post("/ML-2-3-4/sell", status_code=202)
 async def sell_alert(request: Request):
     """Handle sell alert from TradingView - close all positions"""
+    logger.info("SELL ALERT RECEIVED FROM TRADINGVIEW")
+    require_connected(trading_bot, "Trading bot")
+    alert = await parse_alert(request)
+    return enqueue_alert("/ML-2-3-4/sell", alert, process_sell_alert, EXIT_LANE)
+
+async def process_sell_alert(alert: AlertRequest):
+    """Close all positions at market prices"""
     try:
         logger.info("="*50)
-        logger.info("SELL ALERT RECEIVED FROM TRADINGVIEW")
+        logger.info("PROCESSING SELL ALERT")
         logger.info("="*50)
         
-        if not trading_bot:
-            logger.error("Trading bot not initialized")
-            raise HTTPException(status_code=500, detail="Trading bot not initialized")
-        
-        if not trading_bot.is_connected():
-            logger.error("Not connected to IBKR")
-            raise HTTPException(status_code=500, detail="Not connected to IBKR")
-        
-        logger.info("Trading bot is connected and ready")
-        
         # Get current positions
         logger.info("Checking current positions...")
         positions = await trading_bot.get_positions()
@@ -178,34 +412,14 @@ async def sell_alert(request: Request):
         # Close all positions at market price (immediate execution)
         logger.info("Starting position closure process at market prices...")
         try:
-            # Close all positions with market orders
-            results = []
-            total_closed = 0
-            
-            for position in positions:
-                if position.quantity > 0:  # Long position - sell at market price
-                    result = await trading_bot.sell_contracts(position.quantity)
-                    results.append({
-                        "action": "SELL_AT_MARKET",
-                        "quantity": position.quantity,
-                        "result": result.dict()
-                    })
-                    if result.success:
-                        total_closed += result.filled_quantity
-                elif position.quantity < 0:  # Short position - buy to close at market price
-                    result = await trading_bot.buy_contracts(abs(position.quantity))
-                    results.append({
-                        "action": "BUY_TO_CLOSE_AT_MARKET",
-                        "quantity": abs(position.quantity),
-                        "result": result.dict()
-                    })
-                    if result.success:
-                        total_closed += result.filled_quantity
+            # Submit all closing orders at once and await their fills concurrently
+            liquidation = await trading_bot.close_all_positions(positions)
+            total_closed = liquidation["closed_positions"]
             
             result = {
                 "message": f"Successfully closed {total_closed} contracts at market prices",
                 "closed_positions": total_closed,
-                "results": results
+                "results": liquidation["results"]
             }
                 
         except Exception as e:
@@ -228,18 +442,17 @@ async def sell_alert(request: Request):
         logger.error("="*50)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/ML-3-4/buy")
+@app.post("/ML-3-4/buy", status_code=202)
 async def buy_alert(request: Request):
     """Handle buy alert from TradingView - buy 3 contracts"""
+    logger.info("Received BUY alert from TradingView")
+    require_connected(trading_bot, "Trading bot")
+    alert = await parse_alert(request)
+    return enqueue_alert("/ML-3-4/buy", alert, process_buy_alert)
+
+async def process_buy_alert(alert: AlertRequest):
+    """Buy 3 contracts at market price"""
     try:
-        logger.info("Received BUY alert from TradingView")
-        
-        if not trading_bot:
-            raise HTTPException(status_code=500, detail="Trading bot not initialized")
-        
-        if not trading_bot.is_connected():
-            raise HTTPException(status_code=500, detail="Not connected to IBKR")
-        
         # Buy 3 contracts at market price (immediate execution)
         result = await trading_bot.buy_contracts(3)
         
@@ -255,24 +468,19 @@ async def buy_alert(request: Request):
         logger.error(f"Error processing buy alert: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/ML-3-4/buy-limit")
+@app.post("/ML-3-4/buy-limit", status_code=202)
 async def buy_limit_alert(request: Request):
     """Handle buy limit alert from TradingView - buy 3 contracts at ask price"""
+    logger.info("Received BUY LIMIT alert from TradingView")
+    require_connected(trading_bot, "Trading bot")
+    alert = await parse_alert(request)
+    return enqueue_alert("/ML-3-4/buy-limit", alert, process_buy_limit_alert)
+
+async def process_buy_limit_alert(alert: AlertRequest):
+    """Buy 3 contracts at the ask price (or the price given in the alert)"""
     try:
-        logger.info("Received BUY LIMIT alert from TradingView")
-        
-        if not trading_bot:
-            raise HTTPException(status_code=500, detail="Trading bot not initialized")
-        
-        if not trading_bot.is_connected():
-            raise HTTPException(status_code=500, detail="Not connected to IBKR")
-        
-        # Get price from request body if provided
-        body = await request.json() if request.headers.get("content-type") == "application/json" else {}
-        price = body.get("price")
-        
         # Buy 3 contracts at ask price (or specified price)
-        result = await trading_bot.buy_contracts_limit(3, price)
+        result = await trading_bot.buy_contracts_limit(3, alert.price)
         
         logger.info(f"Successfully processed buy limit alert: {result}")
         
@@ -286,21 +494,18 @@ async def buy_limit_alert(request: Request):
         logger.error(f"Error processing buy limit alert: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/ML-2-3-4/sell-limit")
+@app.post("/ML-2-3-4/sell-limit", status_code=202)
 async def sell_limit_alert(request: Request):
     """Handle sell limit alert from TradingView - sell all positions at bid price"""
+    logger.info("Received SELL LIMIT alert from TradingView")
+    require_connected(trading_bot, "Trading bot")
+    alert = await parse_alert(request)
+    return enqueue_alert("/ML-2-3-4/sell-limit", alert, process_sell_limit_alert, EXIT_LANE)
+
+async def process_sell_limit_alert(alert: AlertRequest):
+    """Close all positions with limit orders at the bid price (or the price given in the alert)"""
     try:
-        logger.info("Received SELL LIMIT alert from TradingView")
-        
-        if not trading_bot:
-            raise HTTPException(status_code=500, detail="Trading bot not initialized")
-        
-        if not trading_bot.is_connected():
-            raise HTTPException(status_code=500, detail="Not connected to IBKR")
-        
-        # Get price from request body if provided
-        body = await request.json() if request.headers.get("content-type") == "application/json" else {}
-        price = body.get("price")
+        price = alert.price
         
         # Get current positions
         positions = await trading_bot.get_positions()
@@ -351,24 +556,21 @@ async def sell_limit_alert(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 # SPX Option Trading Endpoints
-@app.post("/option-buy")
+@app.post("/option-buy", status_code=202)
 async def option_buy_alert(request: Request):
     """Handle SPX option buy alert - buy 1 SPXW option contract"""
+    logger.info("SPX OPTION BUY ALERT RECEIVED")
+    require_connected(spx_option_trader, "SPX option trader")
+    alert = await parse_alert(request)
+    return enqueue_alert("/option-buy", alert, process_option_buy_alert)
+
+async def process_option_buy_alert(alert: AlertRequest):
+    """Buy 1 SPX option contract at market price"""
     try:
         logger.info("="*50)
-        logger.info("SPX OPTION BUY ALERT RECEIVED")
+        logger.info("PROCESSING SPX OPTION BUY ALERT")
         logger.info("="*50)
         
-        if not spx_option_trader:
-            logger.error("SPX option trader not initialized")
-            raise HTTPException(status_code=500, detail="SPX option trader not initialized")
-        
-        if not spx_option_trader.is_connected():
-            logger.error("SPX option trader not connected to IBKR")
-            raise HTTPException(status_code=500, detail="SPX option trader not connected to IBKR")
-        
-        logger.info("SPX option trader is connected and ready")
-        
         # Buy 1 SPX option contract at market price
         result = await spx_option_trader.buy_option(1)
         
@@ -386,24 +588,21 @@ async def option_buy_alert(request: Request):
         logger.error("="*50)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/option-sell")
+@app.post("/option-sell", status_code=202)
 async def option_sell_alert(request: Request):
     """Handle SPX option sell alert - close all SPX option positions"""
+    logger.info("SPX OPTION SELL ALERT RECEIVED")
+    require_connected(spx_option_trader, "SPX option trader")
+    alert = await parse_alert(request)
+    return enqueue_alert("/option-sell", alert, process_option_sell_alert, EXIT_LANE)
+
+async def process_option_sell_alert(alert: AlertRequest):
+    """Close all SPX option positions"""
     try:
         logger.info("="*50)
-        logger.info("SPX OPTION SELL ALERT RECEIVED")
+        logger.info("PROCESSING SPX OPTION SELL ALERT")
         logger.info("="*50)
         
-        if not spx_option_trader:
-            logger.error("SPX option trader not initialized")
-            raise HTTPException(status_code=500, detail="SPX option trader not initialized")
-        
-        if not spx_option_trader.is_connected():
-            logger.error("SPX option trader not connected to IBKR")
-            raise HTTPException(status_code=500, detail="SPX option trader not connected to IBKR")
-        
-        logger.info("SPX option trader is connected and ready")
-        
         # Close all SPX option positions
         result = await spx_option_trader.sell_all_option_positions()
         
@@ -422,24 +621,21 @@ async def option_sell_alert(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 # SPY Stock Trading Endpoints
-@app.post("/stock-buy")
+@app.post("/stock-buy", status_code=202)
 async def stock_buy_alert(request: Request):
     """Handle SPY stock buy alert - buy 5 SPY shares"""
+    logger.info("SPY STOCK BUY ALERT RECEIVED")
+    require_connected(spy_stock_trader, "SPY stock trader")
+    alert = await parse_alert(request)
+    return enqueue_alert("/stock-buy", alert, process_stock_buy_alert)
+
+async def process_stock_buy_alert(alert: AlertRequest):
+    """Buy 5 SPY shares at market price"""
     try:
         logger.info("="*50)
-        logger.info("SPY STOCK BUY ALERT RECEIVED")
+        logger.info("PROCESSING SPY STOCK BUY ALERT")
         logger.info("="*50)
         
-        if not spy_stock_trader:
-            logger.error("SPY stock trader not initialized")
-            raise HTTPException(status_code=500, detail="SPY stock trader not initialized")
-        
-        if not spy_stock_trader.is_connected():
-            logger.error("SPY stock trader not connected to IBKR")
-            raise HTTPException(status_code=500, detail="SPY stock trader not connected to IBKR")
-        
-        logger.info("SPY stock trader is connected and ready")
-        
         # Buy 5 SPY shares at market price
         result = await spy_stock_trader.buy_stock(5)
         
@@ -457,24 +653,21 @@ async def stock_buy_alert(request: Request):
         logger.error("="*50)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/stock-sell")
+@app.post("/stock-sell", status_code=202)
 async def stock_sell_alert(request: Request):
     """Handle SPY stock sell alert - close all SPY stock positions"""
+    logger.info("SPY STOCK SELL ALERT RECEIVED")
+    require_connected(spy_stock_trader, "SPY stock trader")
+    alert = await parse_alert(request)
+    return enqueue_alert("/stock-sell", alert, process_stock_sell_alert, EXIT_LANE)
+
+async def process_stock_sell_alert(alert: AlertRequest):
+    """Close all SPY stock positions"""
     try:
         logger.info("="*50)
-        logger.info("SPY STOCK SELL ALERT RECEIVED")
+        logger.info("PROCESSING SPY STOCK SELL ALERT")
         logger.info("="*50)
         
-        if not spy_stock_trader:
-            logger.error("SPY stock trader not initialized")
-            raise HTTPException(status_code=500, detail="SPY stock trader not initialized")
-        
-        if not spy_stock_trader.is_connected():
-            logger.error("SPY stock trader not connected to IBKR")
-            raise HTTPException(status_code=500, detail="SPY stock trader not connected to IBKR")
-        
-        logger.info("SPY stock trader is connected and ready")
-        
         # Close all SPY stock positions
         result = await spy_stock_trader.sell_all_stock_positions()
         
@@ -494,4 +687,4 @@ async def stock_sell_alert(request: Request):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
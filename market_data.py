@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Market Data Module
+Keeps long-lived streaming subscriptions and serves quotes from memory
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Callable
+import numpy as np
+from ib_insync import IB, Contract, Ticker
+from metrics import quote_age
+from tick_buffer import TickRingBuffer, spread_percentiles
+from quote_waiter import wait_for_quote
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+def contract_key(contract: Contract):
+    """Key identifying a contract, conId when qualified or its spec otherwise"""
+    if contract.conId:
+        return contract.conId
+    return (
+        contract.secType,
+        contract.symbol,
+        contract.lastTradeDateOrContractMonth,
+        contract.strike,
+        contract.right,
+        contract.exchange,
+        contract.currency
+    )
+
+class MarketDataCache:
+    """Streaming market data subscriptions with staleness tracking"""
+
+    def __init__(self, ib: IB, max_age: float = None):
+        self.ib = ib
+        self.max_age = max_age if max_age is not None else Config.MARKET_DATA_MAX_AGE
+
+        # contract key -> (contract, ticker)
+        self._subscriptions: Dict[Any, tuple] = {}
+
+        # contract key -> updateEvent handler, detached when unsubscribing
+        self._handlers: Dict[Any, Callable[[Ticker], None]] = {}
+
+        # contract key -> wall clock time of the last ticker update
+        self._updated: Dict[Any, float] = {}
+
+        # contract key -> ticker.time of the last update recorded, see _on_update
+        self._last_update: Dict[Any, Any] = {}
+
+        # contract key -> recent tick history, kept across resubscriptions
+        self.ticks: Dict[Any, TickRingBuffer] = {}
+        self._tick_contracts: Dict[Any, Contract] = {}
+
+        # TickJournal serving history older than the ring buffers, set by the hub
+        self.journal = None
+
+        # Called with (contract, ticker) on every ticker update
+        self.tick_handlers: List[Callable[[Contract, Ticker], None]] = []
+
+    def subscribe(self, contract: Contract) -> Ticker:
+        """Start streaming a contract, or return the existing ticker"""
+        key = contract_key(contract)
+        subscription = self._subscriptions.get(key)
+        if subscription:
+            return subscription[1]
+
+        ticker = self.ib.reqMktData(contract, '', False, False)
+        if key not in self.ticks:
+            self.ticks[key] = TickRingBuffer()
+            self._tick_contracts[key] = contract
+        # ib_insync hands back the same Ticker when a contract is requested again,
+        # so it must only ever carry one of our handlers or ticks are recorded twice
+        handler = self._handlers.get(key)
+        if handler is None:
+            handler = self._handlers[key] = lambda t, key=key, contract=contract: self._on_update(key, contract, t)
+        if handler not in ticker.updateEvent:
+            ticker.updateEvent += handler
+        self._subscriptions[key] = (contract, ticker)
+        logger.info(f"Streaming market data for {contract.symbol} {contract.lastTradeDateOrContractMonth}")
+        return ticker
+
+    def unsubscribe(self, contract: Contract):
+        """Stop streaming a contract"""
+        key = contract_key(contract)
+        subscription = self._subscriptions.pop(key, None)
+        self._updated.pop(key, None)
+        self._detach(key, subscription)
+        if subscription:
+            try:
+                self.ib.cancelMktData(subscription[0])
+            except Exception as e:
+                logger.warning(f"Error cancelling market data for {contract.symbol}: {e}")
+
+    def close(self):
+        """Cancel all subscriptions"""
+        for contract, _ in list(self._subscriptions.values()):
+            self.unsubscribe(contract)
+
+    def _detach(self, key, subscription: Optional[tuple]):
+        """Remove the update handler from a subscription's ticker"""
+        handler = self._handlers.pop(key, None)
+        if subscription and handler:
+            subscription[1].updateEvent -= handler
+
+    def resubscribe(self) -> int:
+        """Request every subscription again after a reconnect, the old tickers no longer update"""
+        contracts = [contract for contract, _ in self._subscriptions.values()]
+        for key, subscription in list(self._subscriptions.items()):
+            self._detach(key, subscription)
+        self._subscriptions.clear()
+        for contract in contracts:
+            self.subscribe(contract)
+        return len(contracts)
+
+    def _on_update(self, key, contract: Contract, ticker: Ticker):
+        # Invariant: one handler per Ticker (see subscribe), and ib_insync gives every
+        # network batch its own ticker.time. The only dedup for buffer, journal and
+        # tick handlers; a repeated time here means a handler leaked.
+        if ticker.time is not None:
+            if self._last_update.get(key) == ticker.time:
+                return
+            self._last_update[key] = ticker.time
+        self._updated[key] = time.time()
+        self.ticks[key].append_ticker(ticker)
+        for handler in self.tick_handlers:
+            handler(contract, ticker)
+
+    def age(self, contract: Contract) -> Optional[float]:
+        """Seconds since the last update for a contract, None if never updated"""
+        updated = self._updated.get(contract_key(contract))
+        return time.time() - updated if updated else None
+
+    def tick_buffers(self) -> List[tuple]:
+        """(contract key, contract, ring buffer) of every contract streamed so far"""
+        return [(key, self._tick_contracts[key], buffer) for key, buffer in self.ticks.items()]
+
+    def history(self, contract: Contract, seconds: float) -> Optional[np.ndarray]:
+        """Ticks of the last `seconds` seconds as a structured array, None if not subscribed"""
+        buffer = self.ticks.get(contract_key(contract))
+        if not buffer:
+            return None
+        now = time.time()
+        ticks = buffer.window(seconds, now)
+        # Older ticks than the ring buffer holds come from the journal
+        if self.journal and len(buffer) == buffer.capacity and len(ticks) == len(buffer):
+            older = self.journal.window(contract, now - seconds, ticks['time'][0])
+            if len(older):
+                ticks = np.concatenate((older, ticks))
+        return ticks
+
+    def spread_stats(self, contract: Contract, seconds: float) -> Optional[Dict[str, Any]]:
+        """Spread percentiles over the last `seconds` seconds, None if not subscribed"""
+        ticks = self.history(contract, seconds)
+        return spread_percentiles(ticks) if ticks is not None else None
+
+    def ages(self) -> Dict[str, Optional[float]]:
+        """Seconds since the last update of every subscription, by symbol"""
+        return {contract.symbol: self.age(contract) for contract, _ in self._subscriptions.values()}
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Last quote of every subscription"""
+        quotes = []
+        for key, (contract, ticker) in self._subscriptions.items():
+            updated = self._updated.get(key)
+            quotes.append({
+                'con_id': contract.conId,
+                'symbol': contract.symbol,
+                'local_symbol': contract.localSymbol,
+                'bid': ticker.bid if ticker.bid > 0 else None,
+                'ask': ticker.ask if ticker.ask > 0 else None,
+                'last': ticker.last if ticker.last > 0 else None,
+                'as_of': datetime.fromtimestamp(updated).isoformat() if updated else None
+            })
+        return quotes
+
+    async def _refresh(self, contract: Contract) -> Optional[Ticker]:
+        """Replace a stale subscription with a fresh one and wait for data, None if none arrived in time"""
+        self.unsubscribe(contract)
+        ticker = self.subscribe(contract)
+        # The Ticker is reused and still holds the old quote until the first update arrives
+        if not await wait_for_quote(ticker, fresh=True):
+            return None
+        return ticker
+
+    async def get_quote(self, contract: Contract, max_age: float = None) -> Dict[str, Any]:
+        """
+        Get bid/ask/last for a contract from the streaming cache
+
+        Falls back to a fresh subscription when the cached quote is older
+        than max_age seconds (defaults to Config.MARKET_DATA_MAX_AGE). If no
+        fresh quote arrives either, bid/ask/last are None and 'stale' is True;
+        the old prices are never served in their place.
+        """
+        if max_age is None:
+            max_age = self.max_age
+
+        ticker = self.subscribe(contract)
+        age = self.age(contract)
+        if age is None or age > max_age:
+            logger.info(f"Cached quote for {contract.symbol} is stale (age={age}), refreshing subscription")
+            ticker = await self._refresh(contract)
+            if ticker is None:
+                logger.warning(f"No fresh quote for {contract.symbol} after refreshing its subscription")
+                return {'bid': None, 'ask': None, 'last': None, 'age': None, 'as_of': None, 'stale': True}
+            age = self.age(contract)
+        if age is not None:
+            quote_age.observe(age, contract.symbol)
+
+        updated = self._updated.get(contract_key(contract))
+        return {
+            'bid': ticker.bid if ticker.bid > 0 else None,
+            'ask': ticker.ask if ticker.ask > 0 else None,
+            'last': ticker.last if ticker.last > 0 else None,
+            'age': age,
+            'as_of': datetime.fromtimestamp(updated).isoformat() if updated else None,
+            'stale': False
+        }
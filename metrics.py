@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Metrics Module
+Prometheus text-format counters and histograms for the trading hot paths
+
+Everything is recorded on the event loop thread, so updates need no locks.
+A histogram observation is a bisect over fixed buckets and two increments
+on preallocated series; label series are created once on first use.
+"""
+
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from ib_insync import IB, Fill, Trade
+from alert_queue import current_alert_origin
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Seconds, from sub-millisecond event handling to slow fills
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Seconds, for quote ages
+AGE_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# Submitted orders tracked until they are done
+ORDER_HISTORY_SIZE = 10000
+
+def _labels(names: Tuple[str, ...], values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+class _HistogramSeries:
+    __slots__ = ('counts', 'sum')
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+class Histogram:
+    """Fixed-bucket histogram with optional labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, _HistogramSeries] = {}
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = _HistogramSeries(len(self.buckets) + 1)
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series.counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series.sum)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+class _Callback:
+    """Gauge or counter read from application state at scrape time"""
+
+    def __init__(self, name: str, documentation: str, kind: str, fn: Callable[[], Any],
+                 labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> List[str]:
+        try:
+            values = self.fn()
+        except Exception as e:
+            logger.debug(f"Metric {self.name} unavailable: {e}")
+            return []
+        if values is None:
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in values.items():
+            if value is not None:
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+class Registry:
+    """Metrics exported by /metrics"""
+
+    def __init__(self):
+        self.metrics: Dict[str, Any] = {}
+
+    def _add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._add(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name: str, documentation: str, fn: Callable[[], Any], labelnames: Iterable[str] = ()):
+        """Gauge whose value (or {label tuple: value}) is read from fn at scrape time"""
+        self._add(_Callback(name, documentation, "gauge", fn, labelnames))
+
+    def counter_callback(self, name: str, documentation: str, fn: Callable[[], Any], labelnames: Iterable[str] = ()):
+        """Counter whose value is read from fn at scrape time"""
+        self._add(_Callback(name, documentation, "counter", fn, labelnames))
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# Hot-path metrics
+alert_to_submit = registry.histogram(
+    "alert_to_submit_seconds", "Alert receipt to order submission", ("endpoint", "instrument"))
+submit_to_fill = registry.histogram(
+    "submit_to_fill_seconds", "Order submission to first fill", ("endpoint", "instrument"))
+order_ack = registry.histogram(
+    "order_ack_seconds", "Order submission to first status from IB", ("instrument",))
+orders_submitted = registry.counter(
+    "orders_submitted_total", "Orders submitted", ("endpoint", "instrument"))
+fills = registry.counter(
+    "fills_total", "Executions received", ("instrument", "side"))
+quote_age = registry.histogram(
+    "market_data_quote_age_seconds", "Age of cached quotes when read", ("instrument",), AGE_BUCKETS)
+ib_round_trip = registry.histogram(
+    "ib_round_trip_seconds", "reqCurrentTime round trip to IB")
+loop_lag = registry.histogram(
+    "event_loop_lag_seconds", "Event loop scheduling delay")
+
+class OrderLatencyTracker:
+    """Records receipt-to-submit, submit-to-ack and submit-to-fill latency from IB order events"""
+
+    def __init__(self):
+        # orderId -> [submitted, endpoint, instrument, acked]
+        self._orders: "OrderedDict[int, list]" = OrderedDict()
+        self._attached = set()
+
+    def attach(self, ib: IB) -> 'OrderLatencyTracker':
+        """Subscribe to an IB connection's order events, once per connection"""
+        if id(ib) in self._attached:
+            return self
+        self._attached.add(id(ib))
+        ib.newOrderEvent += self._on_new_order
+        ib.orderStatusEvent += self._on_order_status
+        ib.execDetailsEvent += self._on_exec_details
+        return self
+
+    def _on_new_order(self, trade: Trade):
+        now = time.perf_counter()
+        origin = current_alert_origin.get()
+        endpoint = origin[0] if origin else "none"
+        instrument = trade.contract.symbol
+        if origin:
+            alert_to_submit.observe(now - origin[1], endpoint, instrument)
+        orders_submitted.inc(endpoint, instrument)
+        self._orders[trade.order.orderId] = [now, endpoint, instrument, False]
+        if len(self._orders) > ORDER_HISTORY_SIZE:
+            self._orders.popitem(last=False)
+
+    def _on_order_status(self, trade: Trade):
+        entry = self._orders.get(trade.order.orderId)
+        if entry is None:
+            return
+        if not entry[3] and trade.orderStatus.status not in ('PendingSubmit', 'ApiPending'):
+            entry[3] = True
+            order_ack.observe(time.perf_counter() - entry[0], entry[2])
+        if trade.isDone():
+            self._orders.pop(trade.order.orderId, None)
+
+    def _on_exec_details(self, trade: Trade, fill: Fill):
+        fills.inc(fill.contract.symbol, fill.execution.side)
+        entry = self._orders.get(fill.execution.orderId)
+        if entry is not None and entry[0]:
+            submit_to_fill.observe(time.perf_counter() - entry[0], entry[1], entry[2])
+            # Only the first fill of an order counts
+            entry[0] = 0.0
+
+order_tracker = OrderLatencyTracker()
+
+class MetricsCollector:
+    """
+    Background samplers for event loop lag and IB round-trip time
+
+    Args:
+        ib: IB connection probed with reqCurrentTime
+        lag_interval: Seconds between loop lag samples, defaults to Config.METRICS_LOOP_LAG_INTERVAL
+        probe_interval: Seconds between IB probes, defaults to Config.METRICS_PROBE_INTERVAL
+    """
+
+    def __init__(self, ib: IB, lag_interval: float = None, probe_interval: float = None):
+        self.ib = ib
+        self.lag_interval = lag_interval if lag_interval is not None else Config.METRICS_LOOP_LAG_INTERVAL
+        self.probe_interval = probe_interval if probe_interval is not None else Config.METRICS_PROBE_INTERVAL
+        self.last_loop_lag: Optional[float] = None
+        self.last_round_trip: Optional[float] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        if self._tasks:
+            return
+        if self.lag_interval:
+            self._tasks.append(asyncio.create_task(self._sample_loop_lag()))
+        if self.probe_interval:
+            self._tasks.append(asyncio.create_task(self._probe_ib()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _sample_loop_lag(self):
+        while True:
+            expected = time.perf_counter() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            self.last_loop_lag = max(0.0, time.perf_counter() - expected)
+            loop_lag.observe(self.last_loop_lag)
+
+    async def _probe_ib(self):
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            if not self.ib.isConnected():
+                continue
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(self.ib.reqCurrentTimeAsync(), self.probe_interval)
+            except Exception as e:
+                logger.debug(f"IB round-trip probe failed: {e}")
+                continue
+            self.last_round_trip = time.perf_counter() - started
+            ib_round_trip.observe(self.last_round_trip)
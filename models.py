@@ -9,6 +9,7 @@ class AlertRequest(BaseModel):
     price: Optional[float] = None
     timestamp: Optional[str] = None
     message: Optional[str] = None
+    alert_id: Optional[str] = None  # Idempotency key; also read from the X-Alert-Id header
 
 class Position(BaseModel):
     """Model for position information"""
@@ -26,6 +27,7 @@ class TradeResult(BaseModel):
     order_id: Optional[int] = None
     filled_quantity: Optional[int] = None
     average_price: Optional[float] = None
+    status: Optional[str] = None  # IB order status when the order was still working at the fill timeout
     timestamp: datetime = datetime.now()
 
 class AccountInfo(BaseModel):
@@ -35,3 +37,21 @@ class AccountInfo(BaseModel):
     net_liquidation: float
     total_cash_value: float
     gross_position_value: float
+    extra: Dict[str, float] = {}
+    as_of: Optional[datetime] = None
+
+class AlertRecord(BaseModel):
+    """Model for a queued webhook alert and its execution status"""
+    alert_id: str
+    endpoint: str
+    lane: str = "entry"
+    status: str = "queued"
+    merged_alerts: int = 0
+    payload: Optional[Dict[str, Any]] = None
+    received_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    wait_time: Optional[float] = None
+    processing_time: Optional[float] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
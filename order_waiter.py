@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Order Completion Module
+Awaits order completion from ib-insync trade events instead of polling
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+from ib_insync import IB, Trade
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# orderId -> trade being awaited, re-pointed by adopt_trades() after a reconnect
+_waiting: Dict[int, Trade] = {}
+
+async def wait_for_trade(trade: Trade, timeout: Optional[float] = None) -> bool:
+    """
+    Wait until a trade reaches a done state (Filled, Cancelled, ApiCancelled)
+
+    Args:
+        trade: Trade returned by ib.placeOrder
+        timeout: Seconds to wait; None uses Config.ORDER_FILL_TIMEOUT,
+                 0 waits indefinitely
+
+    Returns:
+        bool: True if the trade is done, False if the timeout expired
+    """
+    if trade.isDone():
+        return True
+
+    if timeout is None:
+        timeout = Config.ORDER_FILL_TIMEOUT
+    if not timeout or timeout <= 0:
+        timeout = None
+
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    def on_update(*args):
+        if trade.isDone() and not done.done():
+            done.set_result(True)
+
+    trade.statusEvent += on_update
+    trade.filledEvent += on_update
+    trade.cancelledEvent += on_update
+    _waiting[trade.order.orderId] = trade
+    try:
+        # Re-check after subscribing in case the status changed in between
+        on_update()
+        await asyncio.wait_for(done, timeout)
+        return True
+    except asyncio.TimeoutError:
+        logger.warning(f"Order not done after {timeout}s, still working: {describe_trade(trade)}")
+        return False
+    finally:
+        if _waiting.get(trade.order.orderId) is trade:
+            del _waiting[trade.order.orderId]
+        trade.statusEvent -= on_update
+        trade.filledEvent -= on_update
+        trade.cancelledEvent -= on_update
+
+def describe_trade(trade: Trade) -> str:
+    """Live state of an order, e.g. 'order 12 Submitted, filled 1/3'"""
+    status = trade.orderStatus
+    return f"order {trade.order.orderId} {status.status}, filled {status.filled:g}/{trade.order.totalQuantity:g}"
+
+def adopt_trades(ib: IB) -> int:
+    """
+    Link awaited trades to the trades synced after a reconnect
+
+    ib_insync rebuilds its Trade objects on connect, so a trade awaited
+    across a disconnect would never update again. The awaited trade takes
+    over the synced trade's status, fills and log, and its events are
+    forwarded, so waiters and callers see the outcome.
+
+    Returns:
+        int: Number of awaited trades linked
+    """
+    synced = {}
+    for trade in ib.trades():
+        if trade.order.permId:
+            synced[("perm", trade.order.permId)] = trade
+        if trade.order.orderId:
+            synced[("id", trade.order.orderId)] = trade
+
+    adopted = 0
+    for trade in list(_waiting.values()):
+        order = trade.order
+        new = (synced.get(("perm", order.permId)) if order.permId else None) or synced.get(("id", order.orderId))
+        if new is None or new is trade:
+            continue
+
+        # Orders completed while disconnected come back without fill totals
+        status = new.orderStatus
+        if not status.filled and new.fills:
+            shares = sum(fill.execution.shares for fill in new.fills)
+            status.filled = shares
+            status.avgFillPrice = sum(f.execution.shares * f.execution.price for f in new.fills) / shares
+
+        trade.orderStatus, trade.fills, trade.log = status, new.fills, new.log
+        new.statusEvent += trade.statusEvent
+        new.filledEvent += trade.filledEvent
+        new.cancelledEvent += trade.cancelledEvent
+        trade.statusEvent.emit(trade)
+        adopted += 1
+
+    if adopted:
+        logger.info(f"Re-linked {adopted} awaited orders to their synced state")
+    return adopted
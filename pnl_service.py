@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+PnL Service Module
+Streams account and per-position profit and loss from reqPnL/reqPnLSingle
+and fans the updates out to WebSocket subscribers
+"""
+
+import asyncio
+import logging
+import math
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+from ib_insync import IB, Contract, PnL, PnLSingle
+from ib_insync import Position as IBPosition
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+def _number(value: float) -> Optional[float]:
+    """PnL fields are NaN until IB sends a value, which JSON cannot carry"""
+    if value is None or math.isnan(value):
+        return None
+    return value
+
+class PnLService:
+    """Rolling PnL values kept in memory and pushed to subscriber queues"""
+
+    def __init__(self, ib: IB, queue_size: int = None):
+        self.ib = ib
+        self.queue_size = queue_size or Config.PNL_QUEUE_SIZE
+
+        self.account: Optional[str] = None
+
+        # Latest account level values
+        self.account_pnl: Dict[str, Any] = {}
+
+        # conId -> latest per-position values
+        self.positions: Dict[int, Dict[str, Any]] = {}
+
+        # conId -> contract of every position with a PnLSingle subscription
+        self._contracts: Dict[int, Contract] = {}
+
+        # One bounded queue per connected client
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.dropped = 0
+
+        ib.pnlEvent += self._on_pnl
+        ib.pnlSingleEvent += self._on_pnl_single
+        ib.positionEvent += self._on_position
+
+    def start(self, account: str = None):
+        """Subscribe to account PnL and to PnL for every open position"""
+        if self.account:
+            return
+        account = account or Config.IBKR_ACCOUNT_ID
+        if not account:
+            accounts = self.ib.managedAccounts()
+            account = accounts[0] if accounts else ''
+        if not account:
+            logger.warning("No account available, PnL streaming disabled")
+            return
+
+        self.account = account
+        self.ib.reqPnL(account)
+        for position in self.ib.positions():
+            self._on_position(position)
+        logger.info(f"PnL streaming started for {account} with {len(self._contracts)} positions")
+
+    def stop(self):
+        """Cancel all PnL subscriptions"""
+        if not self.account:
+            return
+        if self.ib.isConnected():
+            for con_id in self._contracts:
+                self.ib.cancelPnLSingle(self.account, '', con_id)
+            self.ib.cancelPnL(self.account)
+        self._contracts.clear()
+        self.account = None
+
+    def _on_position(self, position: IBPosition):
+        if not self.account or position.account != self.account:
+            return
+        con_id = position.contract.conId
+        if position.position and con_id not in self._contracts:
+            self._contracts[con_id] = position.contract
+            self.ib.reqPnLSingle(self.account, '', con_id)
+        elif not position.position and con_id in self._contracts:
+            self._contracts.pop(con_id)
+            self.ib.cancelPnLSingle(self.account, '', con_id)
+            if self.positions.pop(con_id, None) is not None:
+                self._publish({"type": "position_closed", "con_id": con_id, "as_of": datetime.now().isoformat()})
+
+    def _on_pnl(self, pnl: PnL):
+        if pnl.account != self.account or pnl.modelCode:
+            return
+        self.account_pnl = {
+            "account": pnl.account,
+            "daily_pnl": _number(pnl.dailyPnL),
+            "unrealized_pnl": _number(pnl.unrealizedPnL),
+            "realized_pnl": _number(pnl.realizedPnL),
+            "as_of": datetime.now().isoformat()
+        }
+        self._publish({"type": "account", **self.account_pnl})
+
+    def _on_pnl_single(self, pnl: PnLSingle):
+        contract = self._contracts.get(pnl.conId)
+        if contract is None or pnl.account != self.account:
+            return
+        values = {
+            "con_id": pnl.conId,
+            "symbol": contract.symbol,
+            "sec_type": contract.secType,
+            "local_symbol": contract.localSymbol,
+            "position": pnl.position,
+            "daily_pnl": _number(pnl.dailyPnL),
+            "unrealized_pnl": _number(pnl.unrealizedPnL),
+            "realized_pnl": _number(pnl.realizedPnL),
+            "value": _number(pnl.value),
+            "as_of": datetime.now().isoformat()
+        }
+        self.positions[pnl.conId] = values
+        self._publish({"type": "position", **values})
+
+    def _publish(self, message: Dict[str, Any]):
+        for queue in self.subscribers:
+            if queue.full():
+                # Slow client: drop its oldest update rather than block the event loop
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(message)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a client queue that receives every update"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove a client queue"""
+        self.subscribers.discard(queue)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Latest account and position values"""
+        return {
+            "type": "snapshot",
+            "account": self.account_pnl or None,
+            "positions": list(self.positions.values()),
+            "subscribers": len(self.subscribers),
+            "timestamp": datetime.now().isoformat()
+        }
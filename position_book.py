@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Position Book Module
+Positions kept up to date from IB position and portfolio events so lookups
+are dictionary reads instead of portfolio scans
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from ib_insync import IB, Contract, PortfolioItem
+from ib_insync import Position as IBPosition
+from models import Position
+
+logger = logging.getLogger(__name__)
+
+class PositionBook:
+    """Incrementally maintained positions indexed by conId and symbol"""
+
+    def __init__(self, ib: IB):
+        self.ib = ib
+
+        # conId -> position entry
+        self.entries: Dict[int, Dict[str, Any]] = {}
+
+        # symbol -> {conId: position entry}
+        self.by_symbol: Dict[str, Dict[int, Dict[str, Any]]] = {}
+
+        # conId -> Position model, rebuilt only when the entry changes
+        self._models: Dict[int, Position] = {}
+
+        self.updated: Optional[float] = None
+
+        ib.positionEvent += self._on_position
+        ib.updatePortfolioEvent += self._on_portfolio
+
+    def load(self):
+        """Rebuild the book from the positions and portfolio synced on connect"""
+        self.entries.clear()
+        self.by_symbol.clear()
+        self._models.clear()
+        for position in self.ib.positions():
+            self._on_position(position)
+        for item in self.ib.portfolio():
+            self._on_portfolio(item)
+        logger.info(f"Position book loaded with {len(self.entries)} positions")
+
+    def restore(self, entries: List[Dict[str, Any]]):
+        """Seed the book with saved entries until the broker sync replaces them"""
+        for saved in entries:
+            entry = self._entry(saved["contract"])
+            entry.update({key: value for key, value in saved.items() if key != "contract"})
+            self._models.pop(saved["contract"].conId, None)
+        logger.info(f"Position book restored {len(entries)} saved positions")
+
+    def _entry(self, contract: Contract) -> Dict[str, Any]:
+        entry = self.entries.get(contract.conId)
+        if entry is None:
+            entry = {
+                "contract": contract,
+                "quantity": 0.0,
+                "average_cost": 0.0,
+                "market_value": 0.0,
+                "unrealized_pnl": 0.0,
+                "realized_pnl": 0.0
+            }
+            self.entries[contract.conId] = entry
+            self.by_symbol.setdefault(contract.symbol, {})[contract.conId] = entry
+        elif contract.exchange or not entry["contract"].exchange:
+            # Portfolio contracts carry no exchange, keep the one we have
+            entry["contract"] = contract
+        return entry
+
+    def _remove(self, con_id: int):
+        entry = self.entries.pop(con_id, None)
+        self._models.pop(con_id, None)
+        if entry:
+            symbol_entries = self.by_symbol.get(entry["contract"].symbol, {})
+            symbol_entries.pop(con_id, None)
+            if not symbol_entries:
+                self.by_symbol.pop(entry["contract"].symbol, None)
+
+    def _on_position(self, position: IBPosition):
+        self.updated = time.time()
+        if not position.position:
+            self._remove(position.contract.conId)
+            return
+        entry = self._entry(position.contract)
+        entry["quantity"] = position.position
+        entry["average_cost"] = position.avgCost
+        self._models.pop(position.contract.conId, None)
+
+    def _on_portfolio(self, item: PortfolioItem):
+        self.updated = time.time()
+        if not item.position:
+            self._remove(item.contract.conId)
+            return
+        entry = self._entry(item.contract)
+        entry["quantity"] = item.position
+        entry["average_cost"] = item.averageCost
+        entry["market_value"] = item.marketValue
+        entry["unrealized_pnl"] = item.unrealizedPNL
+        entry["realized_pnl"] = item.realizedPNL
+        self._models.pop(item.contract.conId, None)
+
+    def get(self, con_id: int) -> Optional[Dict[str, Any]]:
+        """Position entry for a conId"""
+        return self.entries.get(con_id)
+
+    def for_symbol(self, symbol: str, sec_type: str = None) -> List[Dict[str, Any]]:
+        """Position entries for a symbol, optionally of one security type"""
+        entries = self.by_symbol.get(symbol)
+        if not entries:
+            return []
+        return [e for e in entries.values() if not sec_type or e["contract"].secType == sec_type]
+
+    def positions(self, symbol: str, sec_type: str = None) -> List[Position]:
+        """Position models for a symbol"""
+        result = []
+        for entry in self.for_symbol(symbol, sec_type):
+            con_id = entry["contract"].conId
+            model = self._models.get(con_id)
+            if model is None:
+                model = Position(
+                    symbol=entry["contract"].symbol,
+                    quantity=int(entry["quantity"]),
+                    average_price=entry["average_cost"],
+                    market_value=entry["market_value"],
+                    unrealized_pnl=entry["unrealized_pnl"],
+                    realized_pnl=entry["realized_pnl"]
+                )
+                self._models[con_id] = model
+            result.append(model)
+        return result
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Quote Readiness Module
+Awaits complete quotes from ib-insync ticker events instead of sleeping
+"""
+
+import asyncio
+import logging
+from typing import Optional, Sequence
+from ib_insync import Ticker
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+def quote_ready(ticker: Ticker, fields: Sequence[str] = None) -> bool:
+    """True when every field of the ticker has a valid price or size (not NaN, above zero)"""
+    for field in fields or Config.QUOTE_READY_FIELDS:
+        value = getattr(ticker, field)
+        if value is None or not value > 0:
+            return False
+    return True
+
+async def wait_for_quote(ticker: Ticker, fields: Sequence[str] = None, timeout: Optional[float] = None,
+                         fresh: bool = False) -> bool:
+    """
+    Wait until a ticker has valid values for the given fields
+
+    Args:
+        ticker: Ticker returned by ib.reqMktData
+        fields: Ticker attributes to wait for; defaults to Config.QUOTE_READY_FIELDS (bid, ask)
+        timeout: Seconds to wait; None uses Config.QUOTE_READY_TIMEOUT,
+                 0 waits indefinitely
+        fresh: Ignore the values the ticker already has and wait for the next
+               update, for tickers reused by a new subscription
+
+    Returns:
+        bool: True if the quote is ready, False if the timeout expired
+    """
+    fields = fields or Config.QUOTE_READY_FIELDS
+    if not fresh and quote_ready(ticker, fields):
+        return True
+
+    if timeout is None:
+        timeout = Config.QUOTE_READY_TIMEOUT
+    if not timeout or timeout <= 0:
+        timeout = None
+
+    loop = asyncio.get_running_loop()
+    ready = loop.create_future()
+
+    def on_update(*args):
+        if quote_ready(ticker, fields) and not ready.done():
+            ready.set_result(True)
+
+    ticker.updateEvent += on_update
+    try:
+        await asyncio.wait_for(ready, timeout)
+        return True
+    except asyncio.TimeoutError:
+        symbol = ticker.contract.symbol if ticker.contract else ''
+        logger.warning(f"No {'/'.join(fields)} for {symbol} after {timeout}s")
+        return False
+    finally:
+        ticker.updateEvent -= on_update
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Reconnect Module
+Restores the shared IBKR connection after an unexpected disconnect, with
+jittered exponential backoff and a resync of contracts, market data,
+orders and positions
+"""
+
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from order_waiter import adopt_trades
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class Reconnector:
+    """
+    Watches the hub's connection and reconnects it when TWS drops
+
+    While reconnecting, webhook alerts are accepted and held in the alert
+    queue. After the resync, alerts that waited longer than alert_max_age
+    are expired instead of run, the rest are released.
+
+    Args:
+        hub: ConnectionHub to keep connected
+        alert_queue: AlertQueue held while reconnecting
+        base_delay: First retry delay in seconds, defaults to Config.RECONNECT_BASE_DELAY
+        max_delay: Retry delay cap in seconds, defaults to Config.RECONNECT_MAX_DELAY
+        alert_max_age: Max seconds a held alert may wait, defaults to Config.RECONNECT_ALERT_MAX_AGE
+    """
+
+    def __init__(self, hub, alert_queue=None, base_delay: float = None, max_delay: float = None,
+                 alert_max_age: float = None):
+        self.hub = hub
+        self.alert_queue = alert_queue
+        self.base_delay = base_delay if base_delay is not None else Config.RECONNECT_BASE_DELAY
+        self.max_delay = max_delay if max_delay is not None else Config.RECONNECT_MAX_DELAY
+        self.alert_max_age = alert_max_age if alert_max_age is not None else Config.RECONNECT_ALERT_MAX_AGE
+
+        self._task: Optional[asyncio.Task] = None
+        self._down_since: Optional[float] = None
+        self.disconnected_at: Optional[datetime] = None
+
+        # Metrics
+        self.disconnects = 0
+        self.attempts = 0
+        self.recoveries = 0
+        self.last_recovery_time: Optional[float] = None
+        self.max_recovery_time = 0.0
+        self.total_recovery_time = 0.0
+
+        hub.ib.disconnectedEvent += self._on_disconnected
+
+    @property
+    def reconnecting(self) -> bool:
+        return self._task is not None
+
+    def delay(self, attempt: int) -> float:
+        """Backoff before an attempt: exponential, capped, with the upper half jittered"""
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _on_disconnected(self):
+        # hub.disconnect() clears hub.connected first, so only drops get here
+        if not self.hub.connected or self._task:
+            return
+        self.disconnects += 1
+        self._down_since = time.perf_counter()
+        self.disconnected_at = datetime.now()
+        logger.error("Lost connection to IBKR, reconnecting")
+
+        # The old session's subscriptions are gone with it
+        self.hub.pnl_service.stop()
+        if self.alert_queue:
+            self.alert_queue.hold()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        attempt = 0
+        try:
+            while True:
+                await asyncio.sleep(self.delay(attempt))
+                attempt += 1
+                self.attempts += 1
+                try:
+                    await self.hub.connect()
+                    break
+                except Exception as e:
+                    logger.warning(f"Reconnect attempt {attempt} failed: {e}")
+
+            # connect() reloaded positions, account values and PnL and
+            # re-qualified contracts from the cache; the rest is ours
+            resubscribed = self.hub.market_data.resubscribe()
+            adopted = adopt_trades(self.hub.ib)
+
+            recovery_time = time.perf_counter() - self._down_since
+            self.recoveries += 1
+            self.last_recovery_time = recovery_time
+            self.max_recovery_time = max(self.max_recovery_time, recovery_time)
+            self.total_recovery_time += recovery_time
+            logger.info(f"Reconnected to IBKR after {recovery_time:.2f}s ({attempt} attempts): "
+                        f"{resubscribed} market data subscriptions, "
+                        f"{len(self.hub.ib.openTrades())} open orders, {adopted} awaited orders re-linked, "
+                        f"{len(self.hub.position_book.entries)} positions")
+            if self.hub.journal:
+                self.hub.journal.record("reconnected", recovery_time=round(recovery_time, 3), attempts=attempt,
+                                        open_orders=len(self.hub.ib.openTrades()))
+        finally:
+            self._task = None
+            self._down_since = None
+            if self.alert_queue:
+                self.alert_queue.expire(self.alert_max_age)
+                self.alert_queue.release()
+
+    async def stop(self):
+        """Stop reconnecting, used on shutdown"""
+        self.hub.ib.disconnectedEvent -= self._on_disconnected
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Connection state and time-to-recover metrics"""
+        return {
+            "connected": self.hub.is_connected(),
+            "reconnecting": self.reconnecting,
+            "down_for": round(time.perf_counter() - self._down_since, 3) if self._down_since else None,
+            "last_disconnect": self.disconnected_at.isoformat() if self.disconnected_at else None,
+            "disconnects": self.disconnects,
+            "reconnect_attempts": self.attempts,
+            "recoveries": self.recoveries,
+            "last_time_to_recover": round(self.last_recovery_time, 3) if self.last_recovery_time is not None else None,
+            "avg_time_to_recover": round(self.total_recovery_time / self.recoveries, 3) if self.recoveries else None,
+            "max_time_to_recover": round(self.max_recovery_time, 3)
+        }
@@ -3,11 +3,25 @@
 Restart the bot to load new code
 """
 
+import os
+import signal
 import subprocess
 import time
 import requests
 import sys
 
+PID_FILE = 'supervisor.pid'
+
+def reload_supervisor() -> bool:
+    """Ask a running supervisor to swap in the new code, keeping the IBKR session"""
+    try:
+        with open(PID_FILE, 'r') as f:
+            pid = int(f.read().strip())
+        os.kill(pid, signal.SIGHUP)
+        return True
+    except (FileNotFoundError, ValueError, ProcessLookupError):
+        return False
+
 def restart_bot():
     """Restart the bot"""
     print("🔄 Restarting Bot to Load New Code")
@@ -25,10 +39,17 @@ def restart_bot():
         except:
             print("❌ Bot is not running")
         
+        if reload_supervisor():
+            print("\n2. ✅ Reload signal sent to the supervisor")
+            print("   • The IBKR session stays connected while the new code starts")
+            print("   • Progress is logged by supervisor.py")
+            return
+
         print("\n2. Please restart the bot manually:")
         print("   • Stop the current bot (Ctrl+C)")
         print("   • Run: python run_bot.py")
         print("   • Or run: python main.py")
+        print("   • Or run: python supervisor.py to reload without reconnecting next time")
         
         print("\n3. After restarting, test the sell alert:")
         print("   • Run: python test_sell_fix.py")
@@ -19,5 +19,6 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=False,
-        log_level=Config.LOG_LEVEL.lower()
+        log_level=Config.LOG_LEVEL.lower(),
+        log_config=None  # uvicorn logs go through the queued root handler set up in main
     )
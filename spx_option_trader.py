@@ -4,11 +4,16 @@ SPX Option Trading Module
 Handles SPXW options trading for specific contracts
 """
 
-import asyncio
 import logging
 from typing import Optional, Dict, Any
 from ib_insync import IB, Option, MarketOrder, util
 from models import TradeResult
+from order_waiter import wait_for_trade, describe_trade
+from market_data import MarketDataCache
+from position_book import PositionBook
+from execution_journal import get_journal
+from contract_cache import qualify_contracts
+from liquidation import LiquidationEngine
 from config import Config
 
 logger = logging.getLogger(__name__)
@@ -16,11 +21,20 @@ logger = logging.getLogger(__name__)
 class SPXOptionTrader:
     """SPX Option Trading Bot using ib-insync"""
     
-    def __init__(self):
-        self.ib = IB()
+    def __init__(self, hub=None):
+        # Use the shared connection hub if provided, otherwise a private connection
+        self.hub = hub
+        self.ib = hub.ib if hub else IB()
         self.connected = False
         self.account_id = Config.IBKR_ACCOUNT_ID
         
+        # Streaming market data for the traded contract
+        self.market_data = hub.market_data if hub else MarketDataCache(self.ib)
+        self.position_book = hub.position_book if hub else PositionBook(self.ib)
+        
+        # Orders and fills recorded to the execution journal
+        self.journal = hub.journal if hub else get_journal().attach(self.ib)
+        
         # SPXW Option contract details
         self.option_symbol = 'SPXW'
         self.expiration = '20251010'  # 10 Oct 2025
@@ -35,21 +49,49 @@ class SPXOptionTrader:
         
         # Store qualified contract
         self.option_contract = None
+        
+        # Define the SPX option contract
+        self.option_spec = Option(
+            symbol=self.option_symbol,
+            lastTradeDateOrContractMonth=self.expiration,
+            strike=self.strike,
+            right=self.right,
+            exchange=self.exchange,
+            currency=self.currency,
+            tradingClass=self.trading_class
+        )
+        
+        if hub:
+            hub.register(self)
+    
+    def contract_specs(self):
+        """Contracts to qualify when connecting through the hub"""
+        return [self.option_spec]
     
     async def connect(self, host: str = None, port: int = None, client_id: int = None):
         """Connect to IBKR TWS/IB Gateway"""
         try:
-            # Use config values if not provided
-            host = host or Config.IBKR_HOST
-            port = port or Config.IBKR_PORT
-            client_id = client_id or (Config.IBKR_CLIENT_ID + 10)  # Use different client ID
-            
-            await self.ib.connectAsync(host, port, clientId=client_id)
-            self.connected = True
-            logger.info(f"SPX Option Trader connected to IBKR at {host}:{port}")
+            if self.hub:
+                # Shared connection - the hub has already batch-qualified our contract
+                await self.hub.connect(host, port, client_id)
+                self.connected = True
+                logger.info("SPX Option Trader attached to shared IBKR connection")
+            else:
+                # Use config values if not provided
+                host = host or Config.IBKR_HOST
+                port = port or Config.IBKR_PORT
+                client_id = client_id or (Config.IBKR_CLIENT_ID + 10)  # Use different client ID
+                
+                await self.ib.connectAsync(host, port, clientId=client_id)
+                self.connected = True
+                self.position_book.load()
+                logger.info(f"SPX Option Trader connected to IBKR at {host}:{port}")
             
             # Qualify the option contract
             await self._qualify_option_contract()
+            
+            # Keep market data streaming for the traded contract
+            self.market_data.subscribe(self.option_contract)
                 
         except Exception as e:
             logger.error(f"Failed to connect SPX Option Trader to IBKR: {e}")
@@ -59,21 +101,12 @@ class SPXOptionTrader:
     async def _qualify_option_contract(self):
         """Qualify the SPX option contract"""
         try:
-            # Define the SPX option contract
-            option_contract = Option(
-                symbol=self.option_symbol,
-                lastTradeDateOrContractMonth=self.expiration,
-                strike=self.strike,
-                right=self.right,
-                exchange=self.exchange,
-                currency=self.currency,
-                tradingClass=self.trading_class
-            )
+            option_contract = self.option_spec
             
             logger.info(f"Qualifying SPX option contract: {option_contract.symbol} {option_contract.strike} {option_contract.right} {option_contract.lastTradeDateOrContractMonth}")
             
-            # Qualify the contract
-            contracts = await self.ib.qualifyContractsAsync(option_contract)
+            # Qualify the contract (served from the contract cache when known)
+            contracts = await qualify_contracts(self.ib, option_contract)
             if not contracts:
                 raise Exception('SPX option contract not found or not tradable')
             
@@ -88,7 +121,10 @@ class SPXOptionTrader:
         """Disconnect from IBKR"""
         try:
             if self.connected:
-                self.ib.disconnect()
+                # The shared connection is closed by the hub
+                if not self.hub:
+                    self.market_data.close()
+                    self.ib.disconnect()
                 self.connected = False
                 logger.info("SPX Option Trader disconnected from IBKR")
         except Exception as e:
@@ -104,25 +140,19 @@ class SPXOptionTrader:
             if not self.is_connected():
                 raise Exception("Not connected to IBKR")
             
-            # Get portfolio items
-            portfolio_items = self.ib.portfolio()
-            
-            # Filter for SPX option positions
+            # Read from the event-maintained position book
             option_positions = []
-            for item in portfolio_items:
-                if (item.contract.symbol == self.option_symbol and 
-                    item.contract.secType == 'OPT' and
-                    item.position != 0):
-                    option_positions.append({
-                        'symbol': item.contract.symbol,
-                        'strike': item.contract.strike,
-                        'right': item.contract.right,
-                        'expiration': item.contract.lastTradeDateOrContractMonth,
-                        'quantity': int(item.position),
-                        'average_price': getattr(item, 'averageCost', 0.0),
-                        'market_value': getattr(item, 'marketValue', 0.0),
-                        'unrealized_pnl': getattr(item, 'unrealizedPNL', 0.0)
-                    })
+            for item in self.position_book.for_symbol(self.option_symbol, 'OPT'):
+                option_positions.append({
+                    'symbol': item['contract'].symbol,
+                    'strike': item['contract'].strike,
+                    'right': item['contract'].right,
+                    'expiration': item['contract'].lastTradeDateOrContractMonth,
+                    'quantity': int(item['quantity']),
+                    'average_price': item['average_cost'],
+                    'market_value': item['market_value'],
+                    'unrealized_pnl': item['unrealized_pnl']
+                })
             
             logger.info(f"Found {len(option_positions)} SPX option positions")
             return option_positions
@@ -154,8 +184,7 @@ class SPXOptionTrader:
             trade = self.ib.placeOrder(self.option_contract, order)
             
             # Wait for order to be filled
-            while not trade.isDone():
-                await asyncio.sleep(0.1)
+            done = await wait_for_trade(trade)
             
             if trade.orderStatus.status == 'Filled':
                 filled_quantity = trade.orderStatus.filled
@@ -170,6 +199,18 @@ class SPXOptionTrader:
                     filled_quantity=filled_quantity,
                     average_price=average_price
                 )
+            elif not done:
+                # Still working at IB after the fill timeout: report its live state, not a failure
+                message = f"SPX option buy order still working: {describe_trade(trade)}"
+                logger.warning(message)
+                
+                return TradeResult(
+                    success=False,
+                    message=message,
+                    order_id=trade.order.orderId,
+                    filled_quantity=int(trade.orderStatus.filled),
+                    status=trade.orderStatus.status
+                )
             else:
                 error_msg = f"SPX option buy order not filled: {trade.orderStatus.status}"
                 logger.error(error_msg)
@@ -206,105 +247,29 @@ class SPXOptionTrader:
             
             logger.info(f"Found {len(positions)} SPX option positions to close")
             results = []
-            total_closed = 0
-            
-            for position in positions:
-                try:
-                    # Create contract for this specific position
-                    contract = Option(
-                        symbol=position['symbol'],
-                        lastTradeDateOrContractMonth=position['expiration'],
-                        strike=position['strike'],
-                        right=position['right'],
-                        exchange=self.exchange,
-                        currency=self.currency,
-                        tradingClass=self.trading_class
-                    )
-                    
-                    # Qualify the contract
-                    qualified_contracts = await self.ib.qualifyContractsAsync(contract)
-                    if not qualified_contracts:
-                        logger.error(f"Could not qualify contract for position: {position}")
-                        continue
-                    
-                    qualified_contract = qualified_contracts[0]
-                    
-                    if position['quantity'] > 0:  # Long position - sell at market
-                        logger.info(f"Closing long SPX option position: SELL {position['quantity']} contracts")
-                        
-                        order = MarketOrder('SELL', position['quantity'])
-                        trade = self.ib.placeOrder(qualified_contract, order)
-                        
-                        # Wait for order to be filled
-                        while not trade.isDone():
-                            await asyncio.sleep(0.1)
-                        
-                        if trade.orderStatus.status == 'Filled':
-                            filled_quantity = trade.orderStatus.filled
-                            average_price = trade.orderStatus.avgFillPrice
-                            logger.info(f"✓ Successfully closed long SPX option position: {filled_quantity} contracts at ${average_price}")
-                            total_closed += filled_quantity
-                            results.append({
-                                "action": "SELL",
-                                "symbol": position['symbol'],
-                                "strike": position['strike'],
-                                "right": position['right'],
-                                "quantity": position['quantity'],
-                                "filled": filled_quantity,
-                                "price": average_price,
-                                "success": True
-                            })
-                        else:
-                            logger.error(f"Failed to close long SPX option position: {trade.orderStatus.status}")
-                            results.append({
-                                "action": "SELL",
-                                "symbol": position['symbol'],
-                                "strike": position['strike'],
-                                "right": position['right'],
-                                "quantity": position['quantity'],
-                                "success": False,
-                                "error": trade.orderStatus.status
-                            })
-                    
-                    elif position['quantity'] < 0:  # Short position - buy to close
-                        logger.info(f"Closing short SPX option position: BUY {abs(position['quantity'])} contracts")
-                        
-                        order = MarketOrder('BUY', abs(position['quantity']))
-                        trade = self.ib.placeOrder(qualified_contract, order)
-                        
-                        # Wait for order to be filled
-                        while not trade.isDone():
-                            await asyncio.sleep(0.1)
-                        
-                        if trade.orderStatus.status == 'Filled':
-                            filled_quantity = trade.orderStatus.filled
-                            average_price = trade.orderStatus.avgFillPrice
-                            logger.info(f"✓ Successfully closed short SPX option position: {filled_quantity} contracts at ${average_price}")
-                            total_closed += filled_quantity
-                            results.append({
-                                "action": "BUY_TO_CLOSE",
-                                "symbol": position['symbol'],
-                                "strike": position['strike'],
-                                "right": position['right'],
-                                "quantity": abs(position['quantity']),
-                                "filled": filled_quantity,
-                                "price": average_price,
-                                "success": True
-                            })
-                        else:
-                            logger.error(f"Failed to close short SPX option position: {trade.orderStatus.status}")
-                            results.append({
-                                "action": "BUY_TO_CLOSE",
-                                "symbol": position['symbol'],
-                                "strike": position['strike'],
-                                "right": position['right'],
-                                "quantity": abs(position['quantity']),
-                                "success": False,
-                                "error": trade.orderStatus.status
-                            })
-                
-                except Exception as e:
-                    logger.error(f"Error closing SPX option position {position}: {e}")
+            
+            # Create contracts for each position
+            contracts = [
+                Option(
+                    symbol=position['symbol'],
+                    lastTradeDateOrContractMonth=position['expiration'],
+                    strike=position['strike'],
+                    right=position['right'],
+                    exchange=self.exchange,
+                    currency=self.currency,
+                    tradingClass=self.trading_class
+                )
+                for position in positions
+            ]
+            
+            # Qualify in one batch (served from the contract cache, no round trip for known contracts)
+            await qualify_contracts(self.ib, *contracts)
+            
+            # Submit every closing market order at once and await fills concurrently
+            engine = LiquidationEngine(self.ib)
+            for position, contract in zip(positions, contracts):
+                if not contract.conId:
+                    logger.error(f"Could not qualify contract for position: {position}")
                     results.append({
                         "action": "CLOSE",
                         "symbol": position['symbol'],
@@ -312,8 +277,21 @@ class SPXOptionTrader:
                         "right": position['right'],
                         "quantity": abs(position['quantity']),
                         "success": False,
-                        "error": str(e)
+                        "error": "Could not qualify contract"
                     })
+                    continue
+                
+                engine.add(
+                    contract,
+                    position['quantity'],
+                    symbol=position['symbol'],
+                    strike=position['strike'],
+                    right=position['right']
+                )
+            
+            liquidation = await engine.run()
+            total_closed = liquidation["closed_positions"]
+            results = liquidation["results"] + results
             
             logger.info(f"SPX option position closure complete: {total_closed} contracts closed")
             
@@ -341,22 +319,16 @@ class SPXOptionTrader:
             if not self.option_contract:
                 raise Exception("SPX option contract not qualified")
             
-            # Request market data
-            ticker = self.ib.reqMktData(self.option_contract, '', False, False)
-            
-            # Wait for data
-            await asyncio.sleep(1)
-            
-            # Get bid and ask prices
-            bid = ticker.bid if ticker.bid > 0 else None
-            ask = ticker.ask if ticker.ask > 0 else None
-            last = ticker.last if ticker.last > 0 else None
+            # Serve from the streaming cache
+            market_data = await self.market_data.get_quote(self.option_contract)
+            if market_data['stale']:
+                raise Exception(f"No fresh quote for {self.option_contract.symbol}")
+            bid = market_data['bid']
+            ask = market_data['ask']
+            last = market_data['last']
             
             logger.info(f"SPX option market data: Bid=${bid}, Ask=${ask}, Last=${last}")
             
-            # Cancel market data request
-            self.ib.cancelMktData(self.option_contract)
-            
             return {
                 'symbol': self.option_contract.symbol,
                 'strike': self.option_contract.strike,
@@ -365,7 +337,9 @@ class SPXOptionTrader:
                 'bid': bid,
                 'ask': ask,
                 'last': last,
-                'spread': (ask - bid) if (ask and bid) else None
+                'spread': (ask - bid) if (ask and bid) else None,
+                'age': market_data['age'],
+                'as_of': market_data['as_of']
             }
             
         except Exception as e:
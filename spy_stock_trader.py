@@ -4,11 +4,16 @@ SPY Stock Trading Module
 Handles SPY ETF stock trading
 """
 
-import asyncio
 import logging
 from typing import Optional, Dict, Any
 from ib_insync import IB, Stock, MarketOrder, util
 from models import TradeResult
+from order_waiter import wait_for_trade, describe_trade
+from market_data import MarketDataCache
+from position_book import PositionBook
+from execution_journal import get_journal
+from contract_cache import qualify_contracts
+from liquidation import LiquidationEngine
 from config import Config
 
 logger = logging.getLogger(__name__)
@@ -16,11 +21,20 @@ logger = logging.getLogger(__name__)
 class SPYStockTrader:
     """SPY Stock Trading Bot using ib-insync"""
     
-    def __init__(self):
-        self.ib = IB()
+    def __init__(self, hub=None):
+        # Use the shared connection hub if provided, otherwise a private connection
+        self.hub = hub
+        self.ib = hub.ib if hub else IB()
         self.connected = False
         self.account_id = Config.IBKR_ACCOUNT_ID
         
+        # Streaming market data for the traded contract
+        self.market_data = hub.market_data if hub else MarketDataCache(self.ib)
+        self.position_book = hub.position_book if hub else PositionBook(self.ib)
+        
+        # Orders and fills recorded to the execution journal
+        self.journal = hub.journal if hub else get_journal().attach(self.ib)
+        
         # SPY Stock details
         self.stock_symbol = 'SPY'
         self.exchange = 'SMART'
@@ -31,21 +45,45 @@ class SPYStockTrader:
         
         # Store qualified contract
         self.stock_contract = None
+        
+        # Define the SPY stock contract
+        self.stock_spec = Stock(
+            symbol=self.stock_symbol,
+            exchange=self.exchange,
+            currency=self.currency
+        )
+        
+        if hub:
+            hub.register(self)
+    
+    def contract_specs(self):
+        """Contracts to qualify when connecting through the hub"""
+        return [self.stock_spec]
     
     async def connect(self, host: str = None, port: int = None, client_id: int = None):
         """Connect to IBKR TWS/IB Gateway"""
         try:
-            # Use config values if not provided
-            host = host or Config.IBKR_HOST
-            port = port or Config.IBKR_PORT
-            client_id = client_id or (Config.IBKR_CLIENT_ID + 20)  # Use different client ID
-            
-            await self.ib.connectAsync(host, port, clientId=client_id)
-            self.connected = True
-            logger.info(f"SPY Stock Trader connected to IBKR at {host}:{port}")
+            if self.hub:
+                # Shared connection - the hub has already batch-qualified our contract
+                await self.hub.connect(host, port, client_id)
+                self.connected = True
+                logger.info("SPY Stock Trader attached to shared IBKR connection")
+            else:
+                # Use config values if not provided
+                host = host or Config.IBKR_HOST
+                port = port or Config.IBKR_PORT
+                client_id = client_id or (Config.IBKR_CLIENT_ID + 20)  # Use different client ID
+                
+                await self.ib.connectAsync(host, port, clientId=client_id)
+                self.connected = True
+                self.position_book.load()
+                logger.info(f"SPY Stock Trader connected to IBKR at {host}:{port}")
             
             # Qualify the stock contract
             await self._qualify_stock_contract()
+            
+            # Keep market data streaming for the traded contract
+            self.market_data.subscribe(self.stock_contract)
                 
         except Exception as e:
             logger.error(f"Failed to connect SPY Stock Trader to IBKR: {e}")
@@ -55,17 +93,12 @@ class SPYStockTrader:
     async def _qualify_stock_contract(self):
         """Qualify the SPY stock contract"""
         try:
-            # Define the SPY stock contract
-            stock_contract = Stock(
-                symbol=self.stock_symbol,
-                exchange=self.exchange,
-                currency=self.currency
-            )
+            stock_contract = self.stock_spec
             
             logger.info(f"Qualifying SPY stock contract: {stock_contract.symbol} on {stock_contract.exchange}")
             
-            # Qualify the contract
-            contracts = await self.ib.qualifyContractsAsync(stock_contract)
+            # Qualify the contract (served from the contract cache when known)
+            contracts = await qualify_contracts(self.ib, stock_contract)
             if not contracts:
                 raise Exception('SPY stock contract not found or not tradable')
             
@@ -80,7 +113,10 @@ class SPYStockTrader:
         """Disconnect from IBKR"""
         try:
             if self.connected:
-                self.ib.disconnect()
+                # The shared connection is closed by the hub
+                if not self.hub:
+                    self.market_data.close()
+                    self.ib.disconnect()
                 self.connected = False
                 logger.info("SPY Stock Trader disconnected from IBKR")
         except Exception as e:
@@ -96,23 +132,17 @@ class SPYStockTrader:
             if not self.is_connected():
                 raise Exception("Not connected to IBKR")
             
-            # Get portfolio items
-            portfolio_items = self.ib.portfolio()
-            
-            # Filter for SPY stock positions
+            # Read from the event-maintained position book
             stock_positions = []
-            for item in portfolio_items:
-                if (item.contract.symbol == self.stock_symbol and 
-                    item.contract.secType == 'STK' and
-                    item.position != 0):
-                    stock_positions.append({
-                        'symbol': item.contract.symbol,
-                        'exchange': item.contract.exchange,
-                        'quantity': int(item.position),
-                        'average_price': getattr(item, 'averageCost', 0.0),
-                        'market_value': getattr(item, 'marketValue', 0.0),
-                        'unrealized_pnl': getattr(item, 'unrealizedPNL', 0.0)
-                    })
+            for item in self.position_book.for_symbol(self.stock_symbol, 'STK'):
+                stock_positions.append({
+                    'symbol': item['contract'].symbol,
+                    'exchange': item['contract'].exchange,
+                    'quantity': int(item['quantity']),
+                    'average_price': item['average_cost'],
+                    'market_value': item['market_value'],
+                    'unrealized_pnl': item['unrealized_pnl']
+                })
             
             logger.info(f"Found {len(stock_positions)} SPY stock positions")
             return stock_positions
@@ -144,8 +174,7 @@ class SPYStockTrader:
             trade = self.ib.placeOrder(self.stock_contract, order)
             
             # Wait for order to be filled
-            while not trade.isDone():
-                await asyncio.sleep(0.1)
+            done = await wait_for_trade(trade)
             
             if trade.orderStatus.status == 'Filled':
                 filled_quantity = trade.orderStatus.filled
@@ -160,6 +189,18 @@ class SPYStockTrader:
                     filled_quantity=filled_quantity,
                     average_price=average_price
                 )
+            elif not done:
+                # Still working at IB after the fill timeout: report its live state, not a failure
+                message = f"SPY stock buy order still working: {describe_trade(trade)}"
+                logger.warning(message)
+                
+                return TradeResult(
+                    success=False,
+                    message=message,
+                    order_id=trade.order.orderId,
+                    filled_quantity=int(trade.orderStatus.filled),
+                    status=trade.orderStatus.status
+                )
             else:
                 error_msg = f"SPY stock buy order not filled: {trade.orderStatus.status}"
                 logger.error(error_msg)
@@ -195,93 +236,21 @@ class SPYStockTrader:
                 }
             
             logger.info(f"Found {len(positions)} SPY stock positions to close")
-            results = []
-            total_closed = 0
             
+            # Submit every closing market order at once and await fills concurrently
+            engine = LiquidationEngine(self.ib)
             for position in positions:
-                try:
-                    if position['quantity'] > 0:  # Long position - sell at market
-                        logger.info(f"Closing long SPY stock position: SELL {position['quantity']} shares")
-                        
-                        order = MarketOrder('SELL', position['quantity'])
-                        trade = self.ib.placeOrder(self.stock_contract, order)
-                        
-                        # Wait for order to be filled
-                        while not trade.isDone():
-                            await asyncio.sleep(0.1)
-                        
-                        if trade.orderStatus.status == 'Filled':
-                            filled_quantity = trade.orderStatus.filled
-                            average_price = trade.orderStatus.avgFillPrice
-                            logger.info(f"✓ Successfully closed long SPY stock position: {filled_quantity} shares at ${average_price}")
-                            total_closed += filled_quantity
-                            results.append({
-                                "action": "SELL",
-                                "symbol": position['symbol'],
-                                "quantity": position['quantity'],
-                                "filled": filled_quantity,
-                                "price": average_price,
-                                "success": True
-                            })
-                        else:
-                            logger.error(f"Failed to close long SPY stock position: {trade.orderStatus.status}")
-                            results.append({
-                                "action": "SELL",
-                                "symbol": position['symbol'],
-                                "quantity": position['quantity'],
-                                "success": False,
-                                "error": trade.orderStatus.status
-                            })
-                    
-                    elif position['quantity'] < 0:  # Short position - buy to close
-                        logger.info(f"Closing short SPY stock position: BUY {abs(position['quantity'])} shares")
-                        
-                        order = MarketOrder('BUY', abs(position['quantity']))
-                        trade = self.ib.placeOrder(self.stock_contract, order)
-                        
-                        # Wait for order to be filled
-                        while not trade.isDone():
-                            await asyncio.sleep(0.1)
-                        
-                        if trade.orderStatus.status == 'Filled':
-                            filled_quantity = trade.orderStatus.filled
-                            average_price = trade.orderStatus.avgFillPrice
-                            logger.info(f"✓ Successfully closed short SPY stock position: {filled_quantity} shares at ${average_price}")
-                            total_closed += filled_quantity
-                            results.append({
-                                "action": "BUY_TO_CLOSE",
-                                "symbol": position['symbol'],
-                                "quantity": abs(position['quantity']),
-                                "filled": filled_quantity,
-                                "price": average_price,
-                                "success": True
-                            })
-                        else:
-                            logger.error(f"Failed to close short SPY stock position: {trade.orderStatus.status}")
-                            results.append({
-                                "action": "BUY_TO_CLOSE",
-                                "symbol": position['symbol'],
-                                "quantity": abs(position['quantity']),
-                                "success": False,
-                                "error": trade.orderStatus.status
-                            })
-                
-                except Exception as e:
-                    logger.error(f"Error closing SPY stock position {position}: {e}")
-                    results.append({
-                        "action": "CLOSE",
-                        "symbol": position['symbol'],
-                        "quantity": abs(position['quantity']),
-                        "success": False,
-                        "error": str(e)
-                    })
+                engine.add(self.stock_contract, position['quantity'], symbol=position['symbol'])
+            
+            liquidation = await engine.run()
+            total_closed = liquidation["closed_positions"]
             
             logger.info(f"SPY stock position closure complete: {total_closed} shares closed")
             
             return {
                 "message": f"Successfully closed {total_closed} SPY stock shares",
                 "closed_positions": total_closed,
-                "results": results
+                "results": liquidation["results"]
             }
             
         except Exception as e:
@@ -302,29 +271,25 @@ class SPYStockTrader:
             if not self.stock_contract:
                 raise Exception("SPY stock contract not qualified")
             
-            # Request market data
-            ticker = self.ib.reqMktData(self.stock_contract, '', False, False)
-            
-            # Wait for data
-            await asyncio.sleep(1)
-            
-            # Get bid and ask prices
-            bid = ticker.bid if ticker.bid > 0 else None
-            ask = ticker.ask if ticker.ask > 0 else None
-            last = ticker.last if ticker.last > 0 else None
+            # Serve from the streaming cache
+            market_data = await self.market_data.get_quote(self.stock_contract)
+            if market_data['stale']:
+                raise Exception(f"No fresh quote for {self.stock_contract.symbol}")
+            bid = market_data['bid']
+            ask = market_data['ask']
+            last = market_data['last']
             
             logger.info(f"SPY stock market data: Bid=${bid}, Ask=${ask}, Last=${last}")
             
-            # Cancel market data request
-            self.ib.cancelMktData(self.stock_contract)
-            
             return {
                 'symbol': self.stock_contract.symbol,
                 'exchange': self.stock_contract.exchange,
                 'bid': bid,
                 'ask': ask,
                 'last': last,
-                'spread': (ask - bid) if (ask and bid) else None
+                'spread': (ask - bid) if (ask and bid) else None,
+                'age': market_data['age'],
+                'as_of': market_data['as_of']
             }
             
         except Exception as e:
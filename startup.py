@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Startup Orchestration Module
+Connects and qualifies all trading components concurrently
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+class StartupOrchestrator:
+    """Runs component startups concurrently and tracks per-component readiness"""
+
+    def __init__(self):
+        # component name -> start coroutine function
+        self._starters: Dict[str, Callable[[], Awaitable]] = {}
+
+        # component name -> readiness details
+        self.components: Dict[str, Dict[str, Any]] = {}
+
+        self.started_at = None
+        self.finished_at = None
+
+    def add(self, name: str, start: Callable[[], Awaitable]):
+        """Register a component start coroutine function"""
+        self._starters[name] = start
+        self.components[name] = {"status": "pending", "elapsed": None, "error": None}
+
+    async def _start_component(self, name: str):
+        component = self.components[name]
+        component["status"] = "starting"
+        started = time.perf_counter()
+        try:
+            await self._starters[name]()
+            component["status"] = "ready"
+            logger.info(f"Startup: {name} ready in {time.perf_counter() - started:.3f}s")
+        except Exception as e:
+            component["status"] = "failed"
+            component["error"] = str(e)
+            logger.error(f"Startup: {name} failed: {e}")
+        finally:
+            component["elapsed"] = round(time.perf_counter() - started, 3)
+
+    async def run(self):
+        """Start all components concurrently; failures are isolated per component"""
+        self.started_at = time.perf_counter()
+        await asyncio.gather(*(self._start_component(name) for name in self._starters))
+        self.finished_at = time.perf_counter()
+
+        ready = sum(1 for c in self.components.values() if c["status"] == "ready")
+        logger.info(f"Cold start complete in {self.cold_start_time():.3f}s: {ready}/{len(self.components)} components ready")
+
+    def is_ready(self, name: str) -> bool:
+        """Check if a component finished starting successfully"""
+        component = self.components.get(name)
+        return bool(component) and component["status"] == "ready"
+
+    def cold_start_time(self):
+        """Total cold-start time in seconds, None while still starting"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def report(self) -> Dict[str, Any]:
+        """Readiness report for the status endpoint"""
+        cold_start = self.cold_start_time()
+        return {
+            "complete": self.finished_at is not None,
+            "cold_start_seconds": round(cold_start, 3) if cold_start is not None else None,
+            "components": self.components
+        }
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+State Snapshot Module
+Periodically checkpoints the bot's working state so a restarted process can
+resume from it and reconcile against the broker instead of starting cold
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from ib_insync import Contract
+from contract_cache import CACHED_FIELDS
+from models import AlertRecord
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored layout changes; older files are discarded
+SNAPSHOT_VERSION = 1
+
+# Alert statuses that mean the alert had not finished when the snapshot was taken
+PENDING_ALERT_STATUSES = ("queued", "processing")
+
+def _contract_fields(contract: Contract) -> Dict[str, Any]:
+    return {field: getattr(contract, field) for field in CACHED_FIELDS}
+
+class StateSnapshot:
+    """
+    Checkpoint and recovery of contracts, open orders, positions, quotes
+    and in-flight alerts
+
+    Args:
+        hub: ConnectionHub whose traders, position book and market data are saved
+        alert_queue: AlertQueue whose unfinished alerts are saved
+        journal: ExecutionJournal linking orders to alert ids
+        path: Snapshot file, defaults to Config.SNAPSHOT_FILE
+        interval: Seconds between checkpoints, defaults to Config.SNAPSHOT_INTERVAL
+    """
+
+    def __init__(self, hub, alert_queue, journal=None, path: str = None, interval: float = None):
+        self.hub = hub
+        self.alert_queue = alert_queue
+        self.journal = journal
+        self.path = path or Config.SNAPSHOT_FILE
+        self.interval = interval if interval is not None else Config.SNAPSHOT_INTERVAL
+
+        self.restored: Optional[Dict[str, Any]] = None
+        self.last_diff: Optional[Dict[str, Any]] = None
+        self.saved_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # Checkpoint
+
+    def capture(self) -> Dict[str, Any]:
+        """Current working state as a JSON-serializable dict"""
+        order_alerts = self.journal.order_alerts() if self.journal else {}
+
+        contracts = {
+            type(trader).__name__: [_contract_fields(c) for c in trader.contract_specs() if c.conId]
+            for trader in self.hub.traders
+        }
+
+        orders = []
+        for trade in self.hub.ib.openTrades():
+            order, status = trade.order, trade.orderStatus
+            orders.append({
+                "order_id": order.orderId,
+                "perm_id": order.permId,
+                "alert_id": order_alerts.get(order.orderId),
+                "contract": _contract_fields(trade.contract),
+                "action": order.action,
+                "order_type": order.orderType,
+                "quantity": order.totalQuantity,
+                "limit_price": order.lmtPrice if order.orderType == 'LMT' else None,
+                "status": status.status,
+                "filled": status.filled
+            })
+
+        positions = [
+            {
+                "contract": _contract_fields(entry["contract"]),
+                **{key: value for key, value in entry.items() if key != "contract"}
+            }
+            for entry in self.hub.position_book.entries.values()
+        ]
+
+        alerts = [
+            record.dict() for record in self.alert_queue.alerts.values()
+            if record.status in PENDING_ALERT_STATUSES
+        ]
+
+        return {
+            "version": SNAPSHOT_VERSION,
+            "saved_at": time.time(),
+            "contracts": contracts,
+            "orders": orders,
+            "positions": positions,
+            "quotes": self.hub.market_data.snapshot(),
+            "alerts": alerts
+        }
+
+    def _write(self, data: Dict[str, Any]):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, self.path)
+
+    async def save(self):
+        """Capture on the loop, write the file atomically off the loop"""
+        data = self.capture()
+        try:
+            await asyncio.to_thread(self._write, data)
+            self.saved_at = data["saved_at"]
+        except Exception as e:
+            logger.warning(f"Could not write state snapshot {self.path}: {e}")
+
+    def start(self):
+        """Start periodic checkpoints"""
+        if self.interval and not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            # Keep the last good checkpoint while the broker state is gone
+            if self.hub.is_connected():
+                await self.save()
+
+    async def stop(self):
+        """Stop checkpointing and write a final snapshot"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+            await self.save()
+
+    # Recovery
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Read the snapshot file if it is current and recent enough"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not read state snapshot {self.path}: {e}")
+            return None
+
+        if data.get("version") != SNAPSHOT_VERSION:
+            logger.info(f"State snapshot version {data.get('version')} is outdated, ignoring it")
+            return None
+        age = time.time() - data.get("saved_at", 0)
+        if age > Config.SNAPSHOT_MAX_AGE:
+            logger.info(f"State snapshot is {age:.0f}s old, starting cold")
+            return None
+        return data
+
+    def restore(self, data: Dict[str, Any]):
+        """Apply a snapshot before connecting: qualified contracts, positions and alert history"""
+        self.restored = data
+
+        # Contracts are matched to each trader's specs in order
+        restored_contracts = 0
+        for trader in self.hub.traders:
+            saved = iter(data["contracts"].get(type(trader).__name__, []))
+            for contract in trader.contract_specs():
+                if contract.conId:
+                    continue
+                fields = next(saved, None)
+                if fields and (fields["secType"], fields["symbol"]) == (contract.secType, contract.symbol):
+                    for field, value in fields.items():
+                        setattr(contract, field, value)
+                    restored_contracts += 1
+
+        # Last known positions serve reads until the broker sync replaces them
+        self.hub.position_book.restore([
+            {**position, "contract": Contract(**position["contract"])}
+            for position in data["positions"]
+        ])
+
+        # Unfinished alerts stay visible through /alerts/{id}
+        for alert in data["alerts"]:
+            record = AlertRecord(**{**alert, "status": "interrupted"})
+            self.alert_queue.alerts[record.alert_id] = record
+
+        age = time.time() - data["saved_at"]
+        logger.info(f"Restored state snapshot from {age:.1f}s ago: {restored_contracts} contracts, "
+                    f"{len(data['positions'])} positions, {len(data['orders'])} open orders, "
+                    f"{len(data['alerts'])} unfinished alerts")
+
+    def reconcile(self) -> Optional[Dict[str, Any]]:
+        """Diff the restored snapshot against the broker state after connecting"""
+        data = self.restored
+        if not data:
+            return None
+
+        # On a supervisor reload the previous worker writes its final snapshot
+        # after this process restored an older one; diff against the newest
+        latest = self.load()
+        if latest and latest["saved_at"] > data["saved_at"]:
+            pending = {alert["alert_id"] for alert in latest["alerts"]}
+            for alert in data["alerts"]:
+                if alert["alert_id"] not in pending:
+                    self.alert_queue.alerts.pop(alert["alert_id"], None)
+            for alert in latest["alerts"]:
+                record = AlertRecord(**{**alert, "status": "interrupted"})
+                self.alert_queue.alerts.setdefault(record.alert_id, record)
+            data = latest
+
+        # Positions
+        saved_positions = {p["contract"]["conId"]: p for p in data["positions"]}
+        live_positions = self.hub.position_book.entries
+        positions = {"unchanged": 0, "changed": [], "opened": [], "closed": []}
+        for con_id, saved in saved_positions.items():
+            live = live_positions.get(con_id)
+            if live is None:
+                positions["closed"].append({"con_id": con_id, "symbol": saved["contract"]["symbol"],
+                                            "was": saved["quantity"]})
+            elif live["quantity"] != saved["quantity"]:
+                positions["changed"].append({"con_id": con_id, "symbol": saved["contract"]["symbol"],
+                                             "was": saved["quantity"], "now": live["quantity"]})
+            else:
+                positions["unchanged"] += 1
+        for con_id, live in live_positions.items():
+            if con_id not in saved_positions:
+                positions["opened"].append({"con_id": con_id, "symbol": live["contract"].symbol,
+                                            "now": live["quantity"]})
+
+        # Orders, matched by permId and falling back to orderId
+        trades = {}
+        for trade in self.hub.ib.trades():
+            trades[("perm", trade.order.permId)] = trade
+            trades[("id", trade.order.orderId)] = trade
+        orders = {"still_open": [], "completed": [], "unknown": []}
+        for saved in data["orders"]:
+            trade = (trades.get(("perm", saved["perm_id"])) if saved["perm_id"] else None) \
+                or trades.get(("id", saved["order_id"]))
+            entry = {"order_id": saved["order_id"], "alert_id": saved["alert_id"],
+                     "symbol": saved["contract"]["symbol"]}
+            if trade is None:
+                orders["unknown"].append(entry)
+            elif trade.isDone():
+                orders["completed"].append({**entry, "status": trade.orderStatus.status,
+                                            "filled": trade.orderStatus.filled})
+            else:
+                orders["still_open"].append(entry)
+                # Later status changes and fills keep their alert id in the journal
+                if self.journal and saved["alert_id"]:
+                    self.journal.link_order(trade.order.orderId, saved["alert_id"])
+
+        diff = {
+            "snapshot_age": round(time.time() - data["saved_at"], 3),
+            "positions": positions,
+            "orders": orders,
+            "interrupted_alerts": [
+                {
+                    "alert_id": alert["alert_id"],
+                    "endpoint": alert["endpoint"],
+                    "status": alert["status"],
+                    "orders": [o["order_id"] for o in data["orders"] if o["alert_id"] == alert["alert_id"]]
+                }
+                for alert in data["alerts"]
+            ]
+        }
+        self.last_diff = diff
+        self.restored = None
+
+        if self.journal:
+            self.journal.record("recovery", **diff)
+        drift = len(positions["changed"]) + len(positions["opened"]) + len(positions["closed"])
+        logger.info(f"Reconciled snapshot with broker: {positions['unchanged']} positions unchanged, "
+                    f"{drift} differ, {len(orders['still_open'])} orders still open, "
+                    f"{len(orders['completed'])} completed while down, "
+                    f"{len(diff['interrupted_alerts'])} alerts interrupted")
+        for alert in diff["interrupted_alerts"]:
+            logger.warning(f"Alert {alert['alert_id']} ({alert['endpoint']}) was {alert['status']} "
+                           f"when the bot stopped and was not re-run")
+        return diff
+
+    def report(self) -> Dict[str, Any]:
+        """Checkpoint status and the last recovery diff for /status"""
+        return {
+            "path": self.path,
+            "saved_at": datetime.fromtimestamp(self.saved_at).isoformat() if self.saved_at else None,
+            "recovering": self.restored is not None,
+            "last_recovery": self.last_diff
+        }
@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Supervisor Module
+Keeps the IBKR API session in a long-running process and runs the FastAPI
+app as a replaceable worker process, so new code is swapped in without
+reconnecting to TWS or closing the webhook port
+
+The supervisor owns two sockets:
+- the TWS API connection, relayed to the current worker over loopback
+- the HTTP listening socket, inherited by every worker
+
+A reload (SIGHUP, --watch or restart_bot.py) starts a new worker next to
+the old one. Once the new worker has imported the app and is waiting to
+connect, the old worker is stopped gracefully and the relay hands the live
+session to the new worker. Alerts arriving in between queue on the shared
+HTTP socket or in the new worker's held alert queue. If the new code fails
+to start, the old worker keeps running.
+
+POSIX only: workers inherit the HTTP socket by file descriptor.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import struct
+import sys
+import time
+from typing import Any, Dict, List, Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# TWS API client protocol range, same as ib_insync
+MIN_CLIENT_VERSION = 157
+MAX_CLIENT_VERSION = 176
+
+# Client -> server message ids
+REQ_ACCOUNT_UPDATES = 6
+REQ_IDS = 8
+PLACE_ORDER = 3
+REQ_POSITIONS = 61
+CANCEL_POSITIONS = 64
+START_API = 71
+
+# Server -> client message ids
+NEXT_VALID_ID = 9
+MANAGED_ACCOUNTS = 15
+
+# Streaming requests: request id -> (reqId field index, cancel id, cancel version)
+SUBSCRIPTIONS = {
+    1: (2, 2, 2),        # reqMktData
+    50: (2, 51, 1),      # reqRealTimeBars
+    62: (2, 63, 1),      # reqAccountSummary
+    74: (2, 75, 1),      # reqPositionsMulti
+    76: (2, 77, 1),      # reqAccountUpdatesMulti
+    92: (1, 93, None),   # reqPnL
+    94: (1, 95, None),   # reqPnLSingle
+    97: (1, 98, None),   # reqTickByTickData
+}
+
+# cancel id -> reqId field index
+CANCELS = {cancel: index for index, cancel, _ in SUBSCRIPTIONS.values()}
+
+# Seconds a stopped worker gets to finish its alerts before it is killed
+WORKER_STOP_TIMEOUT = 30
+
+PID_FILE = 'supervisor.pid'
+
+def encode(*fields) -> bytes:
+    """Length-prefixed TWS API message"""
+    payload = ''.join(f"{field}\0" for field in fields).encode()
+    return struct.pack('>I', len(payload)) + payload
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    """Read one length-prefixed message payload"""
+    size = struct.unpack('>I', await reader.readexactly(4))[0]
+    return await reader.readexactly(size)
+
+def decode(payload: bytes) -> List[str]:
+    return payload.decode(errors='backslashreplace').split('\0')[:-1]
+
+class _WorkerSession:
+    """API client connection from a worker process"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.ready = False
+
+        # (request id, reqId) -> cancel message sent when the worker goes away
+        self.subscriptions: Dict[tuple, bytes] = {}
+        self.account_updates = set()
+        self.positions = False
+
+class IBRelay:
+    """
+    Single upstream TWS API session relayed to one worker at a time
+
+    The upstream handshake is done once. Each worker gets the stored
+    handshake replies and a fresh order id; its streaming subscriptions are
+    tracked and cancelled upstream when it disconnects.
+    """
+
+    def __init__(self, host: str = None, port: int = None, client_id: int = None,
+                 listen_port: int = None):
+        self.host = host or Config.IBKR_HOST
+        self.port = port or Config.IBKR_PORT
+        self.client_id = client_id or Config.IBKR_CLIENT_ID
+        self.listen_port = listen_port if listen_port is not None else Config.SUPERVISOR_RELAY_PORT
+
+        self.server_version: Optional[str] = None
+        self.conn_time: Optional[str] = None
+        self.accounts = ''
+
+        self._upstream_reader: Optional[asyncio.StreamReader] = None
+        self._upstream_writer: Optional[asyncio.StreamWriter] = None
+        self.upstream_ready = asyncio.Event()
+        self._ids: Optional[asyncio.Future] = None
+
+        self.active: Optional[_WorkerSession] = None
+        self.pending: Optional[_WorkerSession] = None
+        self._pending_event = asyncio.Event()
+        # Set whenever the active worker or the upstream session changes
+        self._changed = asyncio.Event()
+        self._attach_lock = asyncio.Lock()
+
+        # Highest order or request id any worker has used
+        self.max_id = 0
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._task: Optional[asyncio.Task] = None
+        self._detached_at: Optional[float] = None
+
+        self.stats: Dict[str, Any] = {
+            "upstream_connects": 0,
+            "attaches": 0,
+            "last_handoff_ms": None,
+            "dropped_messages": 0
+        }
+
+    async def start(self):
+        """Connect upstream and start accepting workers"""
+        self._server = await asyncio.start_server(self._on_worker, '127.0.0.1', self.listen_port)
+        self.listen_port = self._server.sockets[0].getsockname()[1]
+        self._task = asyncio.create_task(self._upstream_loop())
+        await self.upstream_ready.wait()
+        logger.info(f"IB relay listening on 127.0.0.1:{self.listen_port}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        if self._server:
+            self._server.close()
+        for session in (self.active, self.pending):
+            if session:
+                session.writer.close()
+        if self._upstream_writer:
+            self._upstream_writer.close()
+
+    # Upstream
+
+    async def _connect_upstream(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        version = f"v{MIN_CLIENT_VERSION}..{MAX_CLIENT_VERSION}".encode()
+        writer.write(b'API\0' + struct.pack('>I', len(version)) + version)
+        self.server_version, self.conn_time = decode(await read_frame(reader))
+        writer.write(encode(START_API, 2, self.client_id, ''))
+
+        # Handshake completes with nextValidId and managedAccounts
+        next_id = None
+        self.accounts = ''
+        while next_id is None or not self.accounts:
+            fields = decode(await read_frame(reader))
+            if fields[0] == str(NEXT_VALID_ID):
+                next_id = int(fields[2])
+            elif fields[0] == str(MANAGED_ACCOUNTS):
+                self.accounts = fields[2]
+        self.max_id = max(self.max_id, next_id - 1)
+
+        self._upstream_reader, self._upstream_writer = reader, writer
+        self.stats["upstream_connects"] += 1
+        logger.info(f"IB relay connected to {self.host}:{self.port} (server version {self.server_version}, "
+                    f"client ID {self.client_id})")
+
+    async def _upstream_loop(self):
+        while True:
+            try:
+                await self._connect_upstream()
+                self.upstream_ready.set()
+                self._changed.set()
+                while True:
+                    payload = await read_frame(self._upstream_reader)
+                    msg_id = payload[:payload.find(b'\0')]
+                    if msg_id == b'9' and self._ids and not self._ids.done():
+                        self._ids.set_result(int(decode(payload)[2]))
+                        continue
+                    session = self.active
+                    if session and session.ready:
+                        session.writer.write(struct.pack('>I', len(payload)) + payload)
+                    else:
+                        self.stats["dropped_messages"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"IB relay upstream connection lost: {e}")
+            self.upstream_ready.clear()
+            # The worker sees a disconnect and reconnects through the relay
+            if self.active:
+                self.active.writer.close()
+            await asyncio.sleep(Config.SUPERVISOR_RECONNECT_DELAY)
+
+    # Workers
+
+    async def _on_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = _WorkerSession(reader, writer)
+        try:
+            if await reader.readexactly(4) != b'API\0':
+                writer.close()
+                return
+            await read_frame(reader)  # client version range
+
+            if self.pending:
+                self.pending.writer.close()
+            self.pending = session
+            self._changed.set()
+            self._pending_event.set()
+            logger.info("Worker connected to IB relay")
+
+            while self.active or not self.upstream_ready.is_set():
+                self._changed.clear()
+                await self._changed.wait()
+                if self.pending is not session:
+                    return
+            if self.pending is not session:
+                return
+            self.pending = None
+            self._pending_event.clear()
+
+            async with self._attach_lock:
+                await self._attach(session)
+            await self._worker_loop(session)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if self.pending is session:
+                self.pending = None
+                self._pending_event.clear()
+            if self.active is session:
+                self._detach(session)
+            writer.close()
+
+    async def _attach(self, session: _WorkerSession):
+        session.writer.write(encode(self.server_version, self.conn_time))
+
+        # The worker's startApi is answered from the stored session
+        fields = decode(await read_frame(session.reader))
+        if fields[0] != str(START_API):
+            raise ConnectionError(f"Expected startApi, got message {fields[0]}")
+
+        self._ids = asyncio.get_running_loop().create_future()
+        self._upstream_writer.write(encode(REQ_IDS, 1, 1))
+        next_id = max(await asyncio.wait_for(self._ids, 5), self.max_id + 1)
+
+        self.active = session
+        session.ready = True
+        session.writer.write(encode(NEXT_VALID_ID, 1, next_id))
+        session.writer.write(encode(MANAGED_ACCOUNTS, 1, self.accounts))
+
+        self.stats["attaches"] += 1
+        if self._detached_at is not None:
+            self.stats["last_handoff_ms"] = round((time.perf_counter() - self._detached_at) * 1000, 3)
+            logger.info(f"Worker attached to the live IB session {self.stats['last_handoff_ms']} ms "
+                        f"after the previous worker left")
+        else:
+            logger.info("Worker attached to the live IB session")
+
+    async def _worker_loop(self, session: _WorkerSession):
+        while True:
+            payload = await read_frame(session.reader)
+            self._track(session, decode(payload))
+            self._upstream_writer.write(struct.pack('>I', len(payload)) + payload)
+
+    def _track(self, session: _WorkerSession, fields: List[str]):
+        msg_id = int(fields[0])
+        if msg_id in SUBSCRIPTIONS:
+            index, cancel, version = SUBSCRIPTIONS[msg_id]
+            req_id = int(fields[index])
+            self.max_id = max(self.max_id, req_id)
+            session.subscriptions[(cancel, req_id)] = (
+                encode(cancel, version, req_id) if version else encode(cancel, req_id))
+        elif msg_id in CANCELS:
+            session.subscriptions.pop((msg_id, int(fields[CANCELS[msg_id]])), None)
+        elif msg_id == PLACE_ORDER:
+            self.max_id = max(self.max_id, int(fields[1]))
+        elif msg_id == REQ_ACCOUNT_UPDATES:
+            if fields[2] in ('1', 'True'):
+                session.account_updates.add(fields[3])
+            else:
+                session.account_updates.discard(fields[3])
+        elif msg_id == REQ_POSITIONS:
+            session.positions = True
+        elif msg_id == CANCEL_POSITIONS:
+            session.positions = False
+
+    def _detach(self, session: _WorkerSession):
+        """Cancel everything the worker subscribed to, then hand over to a waiting worker"""
+        self.active = None
+        self._detached_at = time.perf_counter()
+        self._changed.set()
+        if self._upstream_writer and self.upstream_ready.is_set():
+            for message in session.subscriptions.values():
+                self._upstream_writer.write(message)
+            for account in session.account_updates:
+                self._upstream_writer.write(encode(REQ_ACCOUNT_UPDATES, 2, 0, account))
+            if session.positions:
+                self._upstream_writer.write(encode(CANCEL_POSITIONS, 1))
+        logger.info(f"Worker detached from IB relay, cancelled {len(session.subscriptions)} subscriptions")
+
+    async def wait_pending(self, timeout: float) -> bool:
+        """Wait until a new worker is connected and waiting to attach"""
+        try:
+            await asyncio.wait_for(self._pending_event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+class Supervisor:
+    """
+    Runs the relay and one app worker, replacing the worker on reload
+
+    Args:
+        host: HTTP bind address for the webhook server
+        port: HTTP port for the webhook server
+        watch: Reload automatically when a .py file in the project changes
+    """
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 8000, watch: bool = False):
+        self.host = host
+        self.port = port
+        self.watch = watch
+        self.relay = IBRelay()
+        self.http_socket: Optional[socket.socket] = None
+        self.worker: Optional[asyncio.subprocess.Process] = None
+        self._reloading = asyncio.Lock()
+        self._stopping = asyncio.Event()
+        self.reloads = 0
+
+    async def _spawn(self) -> asyncio.subprocess.Process:
+        env = dict(
+            os.environ,
+            IBKR_HOST='127.0.0.1',
+            IBKR_PORT=str(self.relay.listen_port),
+            IBKR_CLIENT_ID=str(self.relay.client_id),
+            # A new worker waits at the relay while the old one finishes
+            IBKR_CONNECT_TIMEOUT=str(WORKER_STOP_TIMEOUT + Config.SUPERVISOR_RELOAD_TIMEOUT)
+        )
+        fd = self.http_socket.fileno()
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), '--worker-fd', str(fd),
+            pass_fds=(fd,), env=env
+        )
+        logger.info(f"Started worker process {process.pid}")
+        return process
+
+    async def _stop_worker(self, process: asyncio.subprocess.Process):
+        if process.returncode is not None:
+            return
+        # uvicorn shuts down gracefully on SIGTERM: in-flight requests and
+        # queued alerts finish, a final state snapshot is written
+        process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), WORKER_STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Worker {process.pid} did not stop in {WORKER_STOP_TIMEOUT}s, killing it")
+            process.kill()
+            await process.wait()
+
+    async def reload(self) -> bool:
+        """Swap in a worker running the current code on disk"""
+        async with self._reloading:
+            started = time.perf_counter()
+            logger.info("Reloading worker")
+            new = await self._spawn()
+            wait_exit = asyncio.create_task(new.wait())
+            wait_relay = asyncio.create_task(self.relay.wait_pending(Config.SUPERVISOR_RELOAD_TIMEOUT))
+            await asyncio.wait((wait_exit, wait_relay), return_when=asyncio.FIRST_COMPLETED)
+            wait_exit.cancel()
+            ready = wait_relay.done() and wait_relay.result() and new.returncode is None
+            wait_relay.cancel()
+
+            if not ready:
+                logger.error("New worker failed to start, keeping the running worker")
+                await self._stop_worker(new)
+                return False
+
+            old, self.worker = self.worker, new
+            if old:
+                await self._stop_worker(old)
+            self.reloads += 1
+            logger.info(f"Reload complete in {time.perf_counter() - started:.3f}s, "
+                        f"IB session hand-off {self.relay.stats['last_handoff_ms']} ms")
+            return True
+
+    async def _watch_files(self):
+        root = os.path.dirname(os.path.abspath(__file__))
+
+        def mtimes():
+            return {
+                name: os.stat(os.path.join(root, name)).st_mtime
+                for name in os.listdir(root) if name.endswith('.py')
+            }
+
+        known = mtimes()
+        while True:
+            await asyncio.sleep(1)
+            current = mtimes()
+            if current != known:
+                known = current
+                await self.reload()
+
+    async def _monitor(self):
+        """Restart the worker if it exits on its own"""
+        while True:
+            worker = self.worker
+            await worker.wait()
+            if self._stopping.is_set():
+                return
+            if worker is self.worker and not self._reloading.locked():
+                logger.error(f"Worker {worker.pid} exited with code {worker.returncode}, restarting it")
+                await asyncio.sleep(1)
+                self.worker = await self._spawn()
+
+    async def run(self):
+        """Run until SIGINT/SIGTERM, reloading on SIGHUP"""
+        await self.relay.start()
+        self.http_socket = socket.create_server((self.host, self.port), backlog=512)
+        self.http_socket.set_inheritable(True)
+        self.worker = await self._spawn()
+
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(self.reload()))
+        loop.add_signal_handler(signal.SIGINT, self._stopping.set)
+        loop.add_signal_handler(signal.SIGTERM, self._stopping.set)
+        with open(PID_FILE, 'w') as f:
+            f.write(str(os.getpid()))
+
+        tasks = [asyncio.create_task(self._monitor())]
+        if self.watch:
+            tasks.append(asyncio.create_task(self._watch_files()))
+        logger.info(f"Supervisor serving http://{self.host}:{self.port} (pid {os.getpid()}), "
+                    f"send SIGHUP to reload")
+
+        await self._stopping.wait()
+        for task in tasks:
+            task.cancel()
+        await self._stop_worker(self.worker)
+        await self.relay.stop()
+        self.http_socket.close()
+        if os.path.exists(PID_FILE):
+            os.remove(PID_FILE)
+        logger.info("Supervisor stopped")
+
+def run_worker(fd: int):
+    """Run the FastAPI app on a listening socket inherited from the supervisor"""
+    import uvicorn
+    uvicorn.run("main:app", fd=fd, log_level=Config.LOG_LEVEL.lower(), log_config=None)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the bot with a persistent IBKR session and reloadable workers")
+    parser.add_argument("--host", default="0.0.0.0", help="HTTP bind address")
+    parser.add_argument("--port", type=int, default=8000, help="HTTP port")
+    parser.add_argument("--watch", action="store_true", help="Reload when a .py file changes")
+    parser.add_argument("--worker-fd", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker_fd is not None:
+        run_worker(args.worker_fd)
+        return
+
+    logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL),
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    print("🚀 Starting trading bot supervisor")
+    print("=" * 50)
+    print(f"IBKR Host: {Config.IBKR_HOST}:{Config.IBKR_PORT} (client ID {Config.IBKR_CLIENT_ID})")
+    print(f"Webhooks: http://{args.host}:{args.port}")
+    print("=" * 50)
+    asyncio.run(Supervisor(args.host, args.port, args.watch).run())
+
+if __name__ == "__main__":
+    main()
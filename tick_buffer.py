@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tick Buffer Module
+Fixed-capacity, preallocated per-contract tick history in NumPy structured
+arrays with vectorized time-window accessors
+"""
+
+import time
+from typing import Dict, Optional, Sequence
+import numpy as np
+from config import Config
+
+# One record per ticker update; prices are NaN until IB sends them
+TICK_DTYPE = np.dtype([
+    ('time', 'f8'),
+    ('bid', 'f8'),
+    ('ask', 'f8'),
+    ('last', 'f8'),
+    ('bid_size', 'f8'),
+    ('ask_size', 'f8')
+])
+
+class TickRingBuffer:
+    """
+    Ring buffer of the most recent ticks of one contract
+
+    Storage is allocated once. append() writes six scalars into the
+    preallocated columns and advances an index; readers get NumPy views or,
+    when a window wraps around the end of the buffer, one concatenated copy.
+    """
+
+    def __init__(self, capacity: int = None):
+        self.capacity = max(1, capacity or Config.TICK_BUFFER_SIZE)
+        self.data = np.full(self.capacity, np.nan, dtype=TICK_DTYPE)
+
+        # Column views, written directly on the hot path
+        self._time = self.data['time']
+        self._bid = self.data['bid']
+        self._ask = self.data['ask']
+        self._last = self.data['last']
+        self._bid_size = self.data['bid_size']
+        self._ask_size = self.data['ask_size']
+
+        # Next write position and number of ticks written in total
+        self._head = 0
+        self.total = 0
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def append(self, timestamp: float, bid: float, ask: float, last: float, bid_size: float, ask_size: float):
+        """Record one tick, overwriting the oldest once full"""
+        i = self._head
+        self._time[i] = timestamp
+        self._bid[i] = bid
+        self._ask[i] = ask
+        self._last[i] = last
+        self._bid_size[i] = bid_size
+        self._ask_size[i] = ask_size
+        self._head = i + 1 if i + 1 < self.capacity else 0
+        self.total += 1
+
+    def append_ticker(self, ticker):
+        """Record the current state of an ib_insync Ticker"""
+        self.append(time.time(), ticker.bid, ticker.ask, ticker.last, ticker.bidSize, ticker.askSize)
+
+    def _segments(self) -> tuple:
+        """(older, newer) views in time order"""
+        if self.total < self.capacity:
+            return self.data[:self._head], self.data[:0]
+        return self.data[self._head:], self.data[:self._head]
+
+    def last(self, n: int) -> np.ndarray:
+        """The last n ticks, oldest first"""
+        n = min(n, len(self))
+        if n <= 0:
+            return self.data[:0]
+        start = self._head - n
+        if start >= 0:
+            return self.data[start:self._head]
+        return np.concatenate((self.data[start:], self.data[:self._head]))
+
+    def window(self, seconds: float, now: float = None) -> np.ndarray:
+        """Ticks of the last `seconds` seconds, oldest first"""
+        since = (now if now is not None else time.time()) - seconds
+        older, newer = self._segments()
+        i = int(np.searchsorted(older['time'], since))
+        if i < len(older):
+            return np.concatenate((older[i:], newer)) if len(newer) else older[i:]
+        return newer[int(np.searchsorted(newer['time'], since)):]
+
+    def spread_percentiles(self, seconds: float, percentiles: Sequence[float] = (50, 90, 99),
+                           now: float = None) -> Dict[str, Optional[float]]:
+        """Bid/ask spread percentiles over the last `seconds` seconds"""
+        return spread_percentiles(self.window(seconds, now), percentiles)
+
+def spread_percentiles(ticks: np.ndarray, percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, Optional[float]]:
+    """Bid/ask spread percentiles of TICK_DTYPE records"""
+    spreads = ticks['ask'] - ticks['bid']
+    spreads = spreads[~np.isnan(spreads)]
+    result: Dict[str, Optional[float]] = {"ticks": int(len(ticks)), "quotes": int(len(spreads))}
+    values = np.percentile(spreads, percentiles) if len(spreads) else [None] * len(percentiles)
+    for q, value in zip(percentiles, values):
+        result[f"p{q:g}"] = float(value) if value is not None else None
+    return result
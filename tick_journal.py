@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Tick Journal Module
+Persists every streamed tick to per-day, per-contract files of fixed-size
+TICK_DTYPE records that readers memory-map as NumPy arrays
+"""
+
+import argparse
+import asyncio
+import glob
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, Optional, Tuple
+import numpy as np
+from ib_insync import Contract
+from tick_buffer import TICK_DTYPE
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+def journal_name(contract: Contract) -> str:
+    """File name of a contract's journal: ESZ5, SPY, SPXW250115C05900000"""
+    return (contract.localSymbol or contract.symbol).replace(' ', '')
+
+def journal_path(directory: str, day: str, name: str) -> str:
+    return os.path.join(directory, day, f"{name}.ticks")
+
+def open_ticks(path: str) -> np.ndarray:
+    """Map a journal file read-only as a TICK_DTYPE array, without parsing or copying"""
+    # A record still being appended is left out
+    size = os.path.getsize(path) // TICK_DTYPE.itemsize
+    if not size:
+        return np.empty(0, dtype=TICK_DTYPE)
+    return np.memmap(path, dtype=TICK_DTYPE, mode='r', shape=(size,))
+
+def _split_days(ticks: np.ndarray) -> Iterator[Tuple[str, np.ndarray]]:
+    """(YYYYMMDD, ticks of that day) in time order, usually a single day"""
+    times = ticks['time']
+    while len(ticks):
+        day = datetime.fromtimestamp(times[0]).date()
+        midnight = datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+        i = int(np.searchsorted(times, midnight)) if times[-1] >= midnight else len(ticks)
+        yield day.strftime('%Y%m%d'), ticks[:i]
+        ticks, times = ticks[i:], times[i:]
+
+class TickJournal:
+    """
+    Appends the ticks recorded by a MarketDataCache to disk
+
+    Nothing is added to the per-tick path: every flush_interval seconds the
+    ticks each ring buffer recorded since the last flush are copied out in
+    one slice on the event loop, and a background thread appends them to
+    {directory}/{YYYYMMDD}/{contract}.ticks.
+
+    Args:
+        market_data: MarketDataCache whose ring buffers are journaled
+        directory: Journal directory, defaults to Config.TICK_JOURNAL_DIR
+        flush_interval: Seconds between flushes, defaults to Config.TICK_JOURNAL_FLUSH_INTERVAL
+    """
+
+    def __init__(self, market_data, directory: str = None, flush_interval: float = None):
+        self.market_data = market_data
+        self.directory = directory or Config.TICK_JOURNAL_DIR
+        self.flush_interval = flush_interval or Config.TICK_JOURNAL_FLUSH_INTERVAL
+
+        # contract key -> buffer.total already handed to the writer
+        self._flushed: Dict[Any, int] = {}
+
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.written = 0
+        self.dropped = 0
+
+    def start(self):
+        if not self._thread or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._write_loop, name="tick-journal", daemon=True)
+            self._thread.start()
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Hand the ticks recorded since the last flush to the writer thread"""
+        for key, contract, buffer in self.market_data.tick_buffers():
+            new = buffer.total - self._flushed.get(key, 0)
+            if new <= 0:
+                continue
+            if new > buffer.capacity:
+                # The ring buffer wrapped around between two flushes
+                self.dropped += new - buffer.capacity
+                logger.warning(f"Tick journal missed {new - buffer.capacity} {contract.symbol} ticks, "
+                               f"raise TICK_BUFFER_SIZE or lower TICK_JOURNAL_FLUSH_INTERVAL")
+                new = buffer.capacity
+            self._flushed[key] = buffer.total
+            self._queue.put((journal_name(contract), buffer.last(new).copy()))
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            name, ticks = item
+            for day, part in _split_days(ticks):
+                path = journal_path(self.directory, day, name)
+                try:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, 'ab') as f:
+                        part.tofile(f)
+                    self.written += len(part)
+                except OSError as e:
+                    logger.error(f"Could not write {len(part)} ticks to {path}: {e}")
+
+    def stop(self):
+        """Flush what is left and wait for the writer thread"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self.flush()
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def window(self, contract: Contract, since: float, until: float = None) -> np.ndarray:
+        """Journaled ticks with since <= time < until, oldest first"""
+        until = until if until is not None else time.time()
+        name = journal_name(contract)
+        parts = []
+        day = datetime.fromtimestamp(since).date()
+        while day <= datetime.fromtimestamp(until).date():
+            path = journal_path(self.directory, day.strftime('%Y%m%d'), name)
+            if os.path.exists(path):
+                ticks = open_ticks(path)
+                times = ticks['time']
+                parts.append(ticks[np.searchsorted(times, since):np.searchsorted(times, until)])
+            day += timedelta(days=1)
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=TICK_DTYPE)
+
+def main():
+    parser = argparse.ArgumentParser(description="Open and summarize journaled ticks")
+    parser.add_argument("name", help="Contract file name or prefix, e.g. ES, SPY, SPXW")
+    parser.add_argument("--day", default=datetime.now().strftime('%Y%m%d'), help="Trading day, YYYYMMDD")
+    parser.add_argument("--dir", default=Config.TICK_JOURNAL_DIR, help="Journal directory")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(journal_path(args.dir, args.day, f"{args.name}*")))
+    if not paths:
+        print(f"No journal files for {args.name} on {args.day} in {args.dir}")
+        return
+    for path in paths:
+        started = time.perf_counter()
+        ticks = open_ticks(path)
+        opened = time.perf_counter()
+        spreads = ticks['ask'] - ticks['bid']
+        spreads = spreads[~np.isnan(spreads)]
+        scanned = time.perf_counter()
+        print(f"{os.path.basename(path)}: {len(ticks)} ticks, "
+              f"open {(opened - started) * 1000:.2f} ms, scan {(scanned - opened) * 1000:.2f} ms")
+        if len(ticks):
+            print(f"  {datetime.fromtimestamp(ticks['time'][0]).isoformat()} - "
+                  f"{datetime.fromtimestamp(ticks['time'][-1]).isoformat()}, "
+                  f"median spread {np.median(spreads) if len(spreads) else float('nan'):g}")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-import asyncio
 import logging
 import os
 from typing import List, Dict, Optional, Any
@@ -6,6 +5,13 @@ from datetime import datetime
 from ib_insync import IB, Contract, MarketOrder, LimitOrder, util
 from ib_insync.objects import Position as IBPosition
 from models import Position, TradeResult, AccountInfo
+from order_waiter import wait_for_trade, describe_trade
+from market_data import MarketDataCache
+from position_book import PositionBook
+from execution_journal import get_journal
+from account_store import AccountStore, ACCOUNT_TAGS
+from contract_cache import qualify_contracts
+from liquidation import LiquidationEngine
 from config import Config
 
 logger = logging.getLogger(__name__)
@@ -13,16 +19,31 @@ logger = logging.getLogger(__name__)
 class TradingBot:
     """ES CME Future Trading Bot using ib-insync"""
     
-    def __init__(self):
-        self.ib = IB()
+    def __init__(self, hub=None):
+        # Use the shared connection hub if provided, otherwise a private connection
+        self.hub = hub
+        self.ib = hub.ib if hub else IB()
         self.connected = False
         self.account_id = Config.IBKR_ACCOUNT_ID
         
+        # Streaming market data for the configured contracts
+        self.market_data = hub.market_data if hub else MarketDataCache(self.ib)
+        
+        # Positions maintained from IB events
+        self.position_book = hub.position_book if hub else PositionBook(self.ib)
+        self.account_store = hub.account_store if hub else AccountStore(self.ib)
+        
+        # Orders and fills recorded to the execution journal
+        self.journal = hub.journal if hub else get_journal().attach(self.ib)
+        
         # Load selected contracts
         self.contracts = self.load_selected_contracts()
         
         # Contract multiplier for ES futures
         self.contract_multiplier = 50
+        
+        if hub:
+            hub.register(self)
     
     def load_selected_contracts(self):
         """Load selected contracts from file or use default"""
@@ -67,32 +88,40 @@ class TradingBot:
     def get_primary_contract(self):
         """Get the primary contract for trading"""
         return self.contracts[0] if self.contracts else None
+    
+    def contract_specs(self):
+        """Contracts to qualify when connecting through the hub"""
+        return self.contracts
         
     async def connect(self, host: str = None, port: int = None, client_id: int = None):
         """Connect to IBKR TWS/IB Gateway"""
         try:
-            # Use config values if not provided
-            host = host or Config.IBKR_HOST
-            port = port or Config.IBKR_PORT
-            client_id = client_id or Config.IBKR_CLIENT_ID
-            
-            await self.ib.connectAsync(host, port, clientId=client_id)
-            self.connected = True
-            logger.info(f"Connected to IBKR at {host}:{port}")
+            if self.hub:
+                # Shared connection - the hub has already batch-qualified our contracts
+                await self.hub.connect(host, port, client_id)
+                self.connected = True
+                logger.info("ES futures trader attached to shared IBKR connection")
+            else:
+                # Use config values if not provided
+                host = host or Config.IBKR_HOST
+                port = port or Config.IBKR_PORT
+                client_id = client_id or Config.IBKR_CLIENT_ID
+                
+                await self.ib.connectAsync(host, port, clientId=client_id)
+                self.connected = True
+                self.position_book.load()
+                self.account_store.load()
+                logger.info(f"Connected to IBKR at {host}:{port}")
             
             # Qualify the contracts
             try:
-                qualified_contracts = []
+                # Known contracts come from the on-disk cache, the rest in one batch
+                qualified_contracts = await qualify_contracts(self.ib, *self.contracts)
                 for contract in self.contracts:
-                    try:
-                        qualified = await self.ib.qualifyContractsAsync(contract)
-                        if qualified:
-                            qualified_contracts.extend(qualified)
-                            logger.info(f"Qualified contract: {contract.symbol} {contract.lastTradeDateOrContractMonth}")
-                        else:
-                            logger.warning(f"Could not qualify {contract.symbol} {contract.lastTradeDateOrContractMonth}")
-                    except Exception as e:
-                        logger.warning(f"Error qualifying {contract.symbol} {contract.lastTradeDateOrContractMonth}: {e}")
+                    if contract.conId:
+                        logger.info(f"Qualified contract: {contract.symbol} {contract.lastTradeDateOrContractMonth}")
+                    else:
+                        logger.warning(f"Could not qualify {contract.symbol} {contract.lastTradeDateOrContractMonth}")
                 
                 if qualified_contracts:
                     self.contracts = qualified_contracts
@@ -119,6 +148,10 @@ class TradingBot:
                 logger.error(f"Contract qualification error: {e}")
                 # Continue without qualification - some brokers work without it
                 logger.warning("Continuing without contract qualification")
+            
+            # Keep market data streaming for all configured contracts
+            for contract in self.contracts:
+                self.market_data.subscribe(contract)
                 
         except Exception as e:
             logger.error(f"Failed to connect to IBKR: {e}")
@@ -129,7 +162,10 @@ class TradingBot:
         """Disconnect from IBKR"""
         try:
             if self.connected:
-                self.ib.disconnect()
+                # The shared connection is closed by the hub
+                if not self.hub:
+                    self.market_data.close()
+                    self.ib.disconnect()
                 self.connected = False
                 logger.info("Disconnected from IBKR")
         except Exception as e:
@@ -140,69 +176,12 @@ class TradingBot:
         return self.connected and self.ib.isConnected()
     
     async def get_positions(self) -> List[Position]:
-        """Get current positions"""
+        """Get current ES positions from the event-maintained position book"""
         try:
             if not self.is_connected():
                 raise Exception("Not connected to IBKR")
             
-            # Get positions from IBKR
-            ib_positions = self.ib.positions()
-            logger.info(f"Raw IBKR positions count: {len(ib_positions)}")
-            
-            # Also get portfolio items (which might contain position data)
-            portfolio_items = self.ib.portfolio()
-            logger.info(f"Portfolio items count: {len(portfolio_items)}")
-            
-            # Log all positions for debugging
-            for i, pos in enumerate(ib_positions):
-                logger.info(f"Position {i+1}: {pos.contract.symbol} {pos.contract.secType} {pos.contract.exchange} {pos.contract.lastTradeDateOrContractMonth} - Qty: {pos.position}")
-            
-            # Log portfolio items
-            for i, item in enumerate(portfolio_items):
-                logger.info(f"Portfolio {i+1}: {item.contract.symbol} {item.contract.secType} {item.contract.exchange} {item.contract.lastTradeDateOrContractMonth} - Qty: {item.position}")
-            
-            positions = []
-            
-            # Check portfolio items first (they have more complete data)
-            for item in portfolio_items:
-                if item.position != 0:  # Only non-zero positions
-                    # Check if it's an ES contract
-                    is_es = item.contract.symbol == 'ES'
-                    
-                    if is_es:
-                        position = Position(
-                            symbol=item.contract.symbol,
-                            quantity=int(item.position),
-                            average_price=getattr(item, 'averageCost', 0.0),
-                            market_value=getattr(item, 'marketValue', 0.0),
-                            unrealized_pnl=getattr(item, 'unrealizedPNL', 0.0),
-                            realized_pnl=getattr(item, 'realizedPNL', 0.0)
-                        )
-                        positions.append(position)
-                        logger.info(f"✅ Added ES position from portfolio: {position.symbol} {position.quantity} @ ${position.average_price}")
-            
-            # If no positions found in portfolio, check regular positions
-            if not positions:
-                logger.info("No ES positions found in portfolio, checking regular positions...")
-                for pos in ib_positions:
-                    if pos.position != 0:  # Only non-zero positions
-                        # Check if it's an ES contract
-                        is_es = pos.contract.symbol == 'ES'
-                        
-                        if is_es:
-                            position = Position(
-                                symbol=pos.contract.symbol,
-                                quantity=int(pos.position),
-                                average_price=getattr(pos, 'averageCost', 0.0),
-                                market_value=getattr(pos, 'marketValue', 0.0),
-                                unrealized_pnl=getattr(pos, 'unrealizedPNL', 0.0),
-                                realized_pnl=getattr(pos, 'realizedPNL', 0.0)
-                            )
-                            positions.append(position)
-                            logger.info(f"✅ Added ES position from positions: {position.symbol} {position.quantity} @ ${position.average_price}")
-            
-            logger.info(f"Retrieved {len(positions)} ES positions")
-            return positions
+            return self.position_book.positions('ES')
             
         except Exception as e:
             logger.error(f"Error getting positions: {e}")
@@ -214,19 +193,16 @@ class TradingBot:
             if not self.is_connected():
                 raise Exception("Not connected to IBKR")
             
-            # Get account summary
-            account_values = self.ib.accountSummary()
-            
-            account_info = {}
-            for value in account_values:
-                account_info[value.tag] = float(value.value)
-            
+            # Served from the streaming account store
+            store = self.account_store
             return AccountInfo(
-                account_id=self.account_id,
-                buying_power=account_info.get('BuyingPower', 0.0),
-                net_liquidation=account_info.get('NetLiquidation', 0.0),
-                total_cash_value=account_info.get('TotalCashValue', 0.0),
-                gross_position_value=account_info.get('GrossPositionValue', 0.0)
+                account_id=self.account_id or store.account or '',
+                buying_power=store.get('BuyingPower'),
+                net_liquidation=store.get('NetLiquidation'),
+                total_cash_value=store.get('TotalCashValue'),
+                gross_position_value=store.get('GrossPositionValue'),
+                extra={tag: value for tag, value in store.values.items() if tag not in ACCOUNT_TAGS},
+                as_of=store.as_of()
             )
             
         except Exception as e:
@@ -239,27 +215,14 @@ class TradingBot:
             if not self.is_connected():
                 raise Exception("Not connected to IBKR")
             
-            # Request market data
-            ticker = self.ib.reqMktData(contract, '', False, False)
-            
-            # Wait for data
-            await asyncio.sleep(1)
-            
-            # Get bid and ask prices
-            bid = ticker.bid if ticker.bid > 0 else None
-            ask = ticker.ask if ticker.ask > 0 else None
-            last = ticker.last if ticker.last > 0 else None
+            # Serve from the streaming cache
+            market_data = await self.market_data.get_quote(contract)
+            if market_data['stale']:
+                raise Exception(f"No fresh quote for {contract.symbol}")
             
-            logger.info(f"Market data for {contract.symbol}: Bid=${bid}, Ask=${ask}, Last=${last}")
+            logger.info(f"Market data for {contract.symbol}: Bid=${market_data['bid']}, Ask=${market_data['ask']}, Last=${market_data['last']}")
             
-            # Cancel market data request
-            self.ib.cancelMktData(contract)
-            
-            return {
-                'bid': bid,
-                'ask': ask,
-                'last': last
-            }
+            return market_data
             
         except Exception as e:
             logger.error(f"Error getting market data: {e}")
@@ -304,8 +267,7 @@ class TradingBot:
             trade = self.ib.placeOrder(primary_contract, order)
             
             # Wait for order to be filled
-            while not trade.isDone():
-                await asyncio.sleep(0.1)
+            done = await wait_for_trade(trade)
             
             if trade.orderStatus.status == 'Filled':
                 filled_quantity = trade.orderStatus.filled
@@ -320,6 +282,18 @@ class TradingBot:
                     filled_quantity=filled_quantity,
                     average_price=average_price
                 )
+            elif not done:
+                # Still working at IB after the fill timeout: report its live state, not a failure
+                message = f"Order still working: {describe_trade(trade)}"
+                logger.warning(message)
+                
+                return TradeResult(
+                    success=False,
+                    message=message,
+                    order_id=trade.order.orderId,
+                    filled_quantity=int(trade.orderStatus.filled),
+                    status=trade.orderStatus.status
+                )
             else:
                 error_msg = f"Order not filled: {trade.orderStatus.status}"
                 logger.error(error_msg)
@@ -374,8 +348,7 @@ class TradingBot:
             trade = self.ib.placeOrder(primary_contract, order)
             
             # Wait for order to be filled
-            while not trade.isDone():
-                await asyncio.sleep(0.1)
+            done = await wait_for_trade(trade)
             
             if trade.orderStatus.status == 'Filled':
                 filled_quantity = trade.orderStatus.filled
@@ -390,6 +363,18 @@ class TradingBot:
                     filled_quantity=filled_quantity,
                     average_price=average_price
                 )
+            elif not done:
+                # Still working at IB after the fill timeout: report its live state, not a failure
+                message = f"Order still working: {describe_trade(trade)}"
+                logger.warning(message)
+                
+                return TradeResult(
+                    success=False,
+                    message=message,
+                    order_id=trade.order.orderId,
+                    filled_quantity=int(trade.orderStatus.filled),
+                    status=trade.orderStatus.status
+                )
             else:
                 error_msg = f"Order not filled: {trade.orderStatus.status}"
                 logger.error(error_msg)
@@ -429,8 +414,7 @@ class TradingBot:
             trade = self.ib.placeOrder(primary_contract, order)
             
             # Wait for order to be filled
-            while not trade.isDone():
-                await asyncio.sleep(0.1)
+            done = await wait_for_trade(trade)
             
             if trade.orderStatus.status == 'Filled':
                 filled_quantity = trade.orderStatus.filled
@@ -445,6 +429,18 @@ class TradingBot:
                     filled_quantity=filled_quantity,
                     average_price=average_price
                 )
+            elif not done:
+                # Still working at IB after the fill timeout: report its live state, not a failure
+                message = f"Order still working: {describe_trade(trade)}"
+                logger.warning(message)
+                
+                return TradeResult(
+                    success=False,
+                    message=message,
+                    order_id=trade.order.orderId,
+                    filled_quantity=int(trade.orderStatus.filled),
+                    status=trade.orderStatus.status
+                )
             else:
                 error_msg = f"Order not filled: {trade.orderStatus.status}"
                 logger.error(error_msg)
@@ -484,8 +480,7 @@ class TradingBot:
             trade = self.ib.placeOrder(primary_contract, order)
             
             # Wait for order to be filled
-            while not trade.isDone():
-                await asyncio.sleep(0.1)
+            done = await wait_for_trade(trade)
             
             if trade.orderStatus.status == 'Filled':
                 filled_quantity = trade.orderStatus.filled
@@ -500,6 +495,18 @@ class TradingBot:
                     filled_quantity=filled_quantity,
                     average_price=average_price
                 )
+            elif not done:
+                # Still working at IB after the fill timeout: report its live state, not a failure
+                message = f"Order still working: {describe_trade(trade)}"
+                logger.warning(message)
+                
+                return TradeResult(
+                    success=False,
+                    message=message,
+                    order_id=trade.order.orderId,
+                    filled_quantity=int(trade.orderStatus.filled),
+                    status=trade.orderStatus.status
+                )
             else:
                 error_msg = f"Order not filled: {trade.orderStatus.status}"
                 logger.error(error_msg)
@@ -546,131 +553,26 @@ class TradingBot:
                 }
             
             logger.info(f"Found {len(non_zero_positions)} non-zero positions to close")
-            results = []
-            total_closed = 0
             
-            for i, pos in enumerate(non_zero_positions, 1):
-                logger.info(f"Processing position {i}/{len(non_zero_positions)}: {pos.contract.symbol} {pos.position}")
-                
-                if pos.position > 0:  # Long position - sell at market price
-                    try:
-                        logger.info(f"Closing long position: SELL {pos.position} {pos.contract.symbol} contracts at market price")
-
-                        # Ensure contract has exchange specified
-                        contract = pos.contract
-                        if not contract.exchange:
-                            contract.exchange = 'CME'  # Default to CME for ES futures
-                            logger.info(f"Set exchange to CME for contract: {contract.symbol}")
-
-                        # Use market order for immediate execution
-                        order = MarketOrder('SELL', int(pos.position))
-                        trade = self.ib.placeOrder(contract, order)
-                    
-                        # Wait for order to be filled (with timeout)
-                        timeout = 30  # 30 seconds timeout
-                        waited = 0
-                        while not trade.isDone() and waited < timeout:
-                            await asyncio.sleep(0.1)
-                            waited += 0.1
-                        
-                        if trade.isDone():
-                            if trade.orderStatus.status == 'Filled':
-                                filled_quantity = trade.orderStatus.filled
-                                average_price = trade.orderStatus.avgFillPrice
-                                logger.info(f"Successfully closed long position: {filled_quantity} contracts at ${average_price}")
-                                total_closed += filled_quantity
-                                results.append({
-                                    "action": "SELL",
-                                    "symbol": pos.contract.symbol,
-                                    "quantity": pos.position,
-                                    "filled": filled_quantity,
-                                    "price": average_price,
-                                    "success": True
-                                })
-                            else:
-                                logger.error(f"Failed to close long position: {trade.orderStatus.status}")
-                                results.append({
-                                    "action": "SELL",
-                                    "symbol": pos.contract.symbol,
-                                    "quantity": pos.position,
-                                    "success": False,
-                                    "error": trade.orderStatus.status
-                                })
-                        else:
-                            logger.error(f"Order timeout for long position: {pos.contract.symbol}")
-                            results.append({
-                                "action": "SELL",
-                                "symbol": pos.contract.symbol,
-                                "quantity": pos.position,
-                                "success": False,
-                                "error": "Timeout"
-                            })
-                    except Exception as e:
-                        logger.error(f"Error closing long position {pos.contract.symbol}: {e}")
-                        results.append({
-                            "action": "SELL",
-                            "symbol": pos.contract.symbol,
-                            "quantity": pos.position,
-                            "success": False,
-                            "error": str(e)
-                        })
-                        
-                elif pos.position < 0:  # Short position - buy to close at market price
-                    try:
-                        logger.info(f"Closing short position: BUY {abs(pos.position)} {pos.contract.symbol} contracts at market price")
-                        
-                        # Ensure contract has exchange specified
-                        contract = pos.contract
-                        if not contract.exchange:
-                            contract.exchange = 'CME'  # Default to CME for ES futures
-                            logger.info(f"Set exchange to CME for contract: {contract.symbol}")
-                        
-                        # Use market order for immediate execution
-                        order = MarketOrder('BUY', int(abs(pos.position)))
-                        trade = self.ib.placeOrder(contract, order)
-                    
-                        # Wait for order to be filled
-                        while not trade.isDone():
-                            await asyncio.sleep(0.1)
-                        
-                        if trade.orderStatus.status == 'Filled':
-                            filled_quantity = trade.orderStatus.filled
-                            average_price = trade.orderStatus.avgFillPrice
-                            logger.info(f"Successfully closed short position: {filled_quantity} contracts at ${average_price}")
-                            total_closed += filled_quantity
-                            results.append({
-                                "action": "BUY_TO_CLOSE",
-                                "symbol": pos.contract.symbol,
-                                "quantity": abs(pos.position),
-                                "filled": filled_quantity,
-                                "price": average_price,
-                                "success": True
-                            })
-                        else:
-                            logger.error(f"Failed to close short position: {trade.orderStatus.status}")
-                            results.append({
-                                "action": "BUY_TO_CLOSE",
-                                "symbol": pos.contract.symbol,
-                                "quantity": abs(pos.position),
-                                "success": False,
-                                "error": trade.orderStatus.status
-                            })
-                    except Exception as e:
-                        logger.error(f"Error closing short position {pos.contract.symbol}: {e}")
-                        results.append({
-                            "action": "BUY_TO_CLOSE",
-                            "symbol": pos.contract.symbol,
-                            "quantity": abs(pos.position),
-                            "success": False,
-                            "error": str(e)
-                        })
+            # Submit every closing market order at once and await fills concurrently
+            engine = LiquidationEngine(self.ib)
+            for pos in non_zero_positions:
+                # Ensure contract has exchange specified
+                contract = pos.contract
+                if not contract.exchange:
+                    contract.exchange = 'CME'  # Default to CME for ES futures
+                    logger.info(f"Set exchange to CME for contract: {contract.symbol}")
+                engine.add(contract, pos.position)
+            
+            liquidation = await engine.run()
+            total_closed = liquidation["closed_positions"]
             
             logger.info(f"Force close complete: {total_closed} contracts closed across {len(non_zero_positions)} positions")
             
             return {
                 "message": f"Successfully closed {total_closed} contracts",
                 "closed_positions": total_closed,
-                "results": results
+                "results": liquidation["results"]
             }
             
         except Exception as e:
@@ -682,14 +584,15 @@ class TradingBot:
                 "results": []
             }
 
-    async def close_all_positions(self) -> Dict[str, Any]:
-        """Close all open positions"""
+    async def close_all_positions(self, positions: List[Position] = None) -> Dict[str, Any]:
+        """Close all open positions on the primary contract"""
         try:
             if not self.is_connected():
                 raise Exception("Not connected to IBKR")
             
             logger.info("Starting close_all_positions process...")
-            positions = await self.get_positions()
+            if positions is None:
+                positions = await self.get_positions()
             
             if not positions:
                 logger.info("No positions found - sell alert skipped")
@@ -699,49 +602,34 @@ class TradingBot:
                     "results": []
                 }
             
+            primary_contract = self.get_primary_contract()
+            if not primary_contract:
+                raise Exception("No contracts available")
+            
+            # Ensure contract has exchange specified
+            if not primary_contract.exchange:
+                primary_contract.exchange = 'CME'
+                logger.info(f"Set exchange to CME for primary contract: {primary_contract.symbol}")
+            
             logger.info(f"Found {len(positions)} positions to close")
-            results = []
-            total_closed = 0
             
-            for i, position in enumerate(positions, 1):
-                logger.info(f"Processing position {i}/{len(positions)}: {position.symbol} {position.quantity}")
-                
-                if position.quantity > 0:  # Long position
-                    logger.info(f"Closing long position: SELL {position.quantity} contracts")
-                    result = await self.sell_contracts(position.quantity)
-                    results.append({
-                        "action": "SELL",
-                        "quantity": position.quantity,
-                        "result": result.dict()
-                    })
-                    if result.success:
-                        total_closed += result.filled_quantity
-                        logger.info(f"Successfully closed long position: {result.filled_quantity} contracts")
-                    else:
-                        logger.error(f"Failed to close long position: {result.message}")
-                        
-                elif position.quantity < 0:  # Short position
-                    logger.info(f"Closing short position: BUY {abs(position.quantity)} contracts")
-                    result = await self.buy_contracts(abs(position.quantity))
-                    results.append({
-                        "action": "BUY_TO_CLOSE",
-                        "quantity": abs(position.quantity),
-                        "result": result.dict()
-                    })
-                    if result.success:
-                        total_closed += result.filled_quantity
-                        logger.info(f"Successfully closed short position: {result.filled_quantity} contracts")
-                    else:
-                        logger.error(f"Failed to close short position: {result.message}")
-                else:
+            # Submit every closing market order at once and await fills concurrently
+            engine = LiquidationEngine(self.ib)
+            for position in positions:
+                if position.quantity == 0:
                     logger.info(f"Zero position skipped: {position.quantity}")
+                    continue
+                engine.add(primary_contract, position.quantity)
+            
+            liquidation = await engine.run()
+            total_closed = liquidation["closed_positions"]
             
             logger.info(f"Close all positions complete: {total_closed} contracts closed across {len(positions)} positions")
             
             return {
                 "message": f"Successfully closed {total_closed} contracts",
                 "closed_positions": total_closed,
-                "results": results
+                "results": liquidation["results"]
             }
             
         except Exception as e:
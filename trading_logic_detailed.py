@@ -8,6 +8,7 @@ import asyncio
 import logging
 from ib_insync import IB, Contract, MarketOrder, LimitOrder
 from datetime import datetime
+from quote_waiter import wait_for_quote
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -56,8 +57,8 @@ class DetailedTradingLogic:
             # Request market data
             ticker = self.ib.reqMktData(self.contract, '', False, False)
             
-            # Wait for data
-            await asyncio.sleep(1.5)
+            # Wait for bid and ask
+            await wait_for_quote(ticker)
             
             # Get prices
             bid = ticker.bid if ticker.bid > 0 else None